@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Fleet-wide command fan-out: send one command to many devices and collect the answers.
+
+Built on the send_command pattern of mqtt_test.py / mqtt_command_test.py, but
+for thousands of devices: a window of `--concurrency` commands in flight,
+a correlation id per device, and one subscription to iot/devices/+/response
+whose messages are matched to pending commands through a dict keyed by id.
+Unanswered commands are re-sent (same id, so a late answer still counts) up
+to `--retries` times. Every result is streamed as soon as it is final, as a
+line on the console and optionally as NDJSON in `--output`.
+
+    python command_dispatcher.py calibrate --devices-file devices.txt --concurrency 200 --output results.ndjson
+    python command_dispatcher.py read_sensors --devices 1000 --broker 127.0.0.1 --port 1883 --transport tcp
+    python command_dispatcher.py status --device-id esp32-weather-01 --plain
+"""
+
+import argparse
+import json
+import os
+import ssl
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+
+import paho.mqtt.client as mqtt
+
+from mqtt_command_test import REPLY_TOPIC, broker_address, password, port, transport_protocol, username
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from simulator.hdr import HdrHistogram
+
+
+class PendingCommand:
+    __slots__ = ("id", "device_id", "first_sent", "last_sent", "attempts", "done")
+
+    def __init__(self, command_id, device_id):
+        self.id = command_id
+        self.device_id = device_id
+        self.first_sent = None
+        self.last_sent = None
+        self.attempts = 0
+        self.done = False
+
+
+class CommandDispatcher:
+    """Fans one command out to many devices and matches the answers by correlation id"""
+
+    def __init__(self, client, command, device_ids, params=None, concurrency=100, timeout=10.0,
+                 retries=1, plain=False, on_result=None):
+        self.client = client
+        self.command = command
+        self.params = params or {}
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.plain = plain
+        self.on_result = on_result
+
+        self.lock = threading.Condition()
+        self.queue = deque(PendingCommand(uuid.uuid4().hex[:16], device_id) for device_id in device_ids)
+        self.total = len(self.queue)
+        # Hash indexes for matching: by correlation id, and by device for --plain answers
+        self.pending = {}
+        self.by_device = {}
+        # Deadlines in send order; equal timeouts keep it sorted, so expiry is a popleft
+        self.deadlines = deque()
+
+        self.latency = HdrHistogram()
+        self.counts = {"ok": 0, "timeout": 0, "failed": 0, "retried": 0, "unmatched": 0}
+        self.reply_kind = REPLY_TOPIC.get(command, "response") if plain else "response"
+
+    def subscribe(self, client):
+        """Subscribe to the reply topic; returns the message id its SUBACK will carry"""
+        return client.subscribe(f"iot/devices/+/{self.reply_kind}", 0)[1]
+
+    def payload(self, record):
+        if self.plain:
+            return self.command
+        return json.dumps({"id": record.id, "command": self.command, **self.params})
+
+    def on_message(self, client, userdata, msg):
+        received = time.monotonic()
+        parts = msg.topic.split("/")
+        if len(parts) != 4 or parts[3] != self.reply_kind:
+            return
+        payload = msg.payload.decode("utf-8", errors="replace")
+        with self.lock:
+            if self.plain:
+                record = self.by_device.get(parts[2])
+            else:
+                try:
+                    record = self.pending.get(json.loads(payload).get("id"))
+                except (ValueError, AttributeError):
+                    record = None
+            if record is None or record.device_id != parts[2]:
+                self.counts["unmatched"] += 1
+                return
+            self.finish(record, "ok", received, payload)
+
+    def finish(self, record, status, now, response=None):
+        """Final result for one device (lock held)"""
+        record.done = True
+        self.pending.pop(record.id, None)
+        self.by_device.pop(record.device_id, None)
+        self.counts[status] += 1
+        latency_ms = None
+        if status == "ok":
+            latency = now - record.first_sent
+            latency_ms = round(latency * 1000, 1)
+            self.latency.record(int(latency * 1e6))
+        if self.on_result is not None:
+            try:
+                response = json.loads(response) if response else None
+            except ValueError:
+                pass
+            self.on_result({
+                "device_id": record.device_id, "id": record.id, "command": self.command, "status": status,
+                "attempts": record.attempts, "latency_ms": latency_ms, "response": response,
+            })
+        self.lock.notify()
+
+    def send(self, record, now):
+        """Publish one attempt (lock held)"""
+        record.attempts += 1
+        record.last_sent = now
+        if record.first_sent is None:
+            record.first_sent = now
+        self.pending[record.id] = record
+        self.by_device[record.device_id] = record
+        result = self.client.publish(f"iot/devices/{record.device_id}/commands", self.payload(record))
+        if result.rc != mqtt.MQTT_ERR_SUCCESS:
+            self.finish(record, "failed", now)
+            return
+        self.deadlines.append((now + self.timeout, record, record.attempts))
+
+    def expire(self, now):
+        """Retry or give up on commands whose deadline passed (lock held)"""
+        while self.deadlines and self.deadlines[0][0] <= now:
+            _, record, attempt = self.deadlines.popleft()
+            if record.done or attempt != record.attempts:
+                continue  # answered, or a newer attempt owns the deadline
+            if record.attempts <= self.retries:
+                self.counts["retried"] += 1
+                self.send(record, now)
+            else:
+                self.finish(record, "timeout", now)
+
+    @property
+    def in_flight(self):
+        return len(self.pending)
+
+    @property
+    def completed(self):
+        return self.counts["ok"] + self.counts["timeout"] + self.counts["failed"]
+
+    def run(self, report_every=5.0):
+        start = time.monotonic()
+        next_report = start + report_every
+        with self.lock:
+            while self.completed < self.total:
+                now = time.monotonic()
+                self.expire(now)
+                while self.queue and self.in_flight < self.concurrency:
+                    self.send(self.queue.popleft(), now)
+                if now >= next_report:
+                    self.print_progress(now - start)
+                    next_report = now + report_every
+                # Wake up for the next answer, or at the latest when the oldest deadline passes
+                wait = 0.5 if not self.deadlines else min(0.5, max(0.0, self.deadlines[0][0] - now))
+                self.lock.wait(wait)
+        return time.monotonic() - start
+
+    def print_progress(self, elapsed):
+        counts = self.counts
+        print(f"⏱️  {elapsed:6.1f}s | done {self.completed}/{self.total} | in flight {self.in_flight} | "
+              f"ok {counts['ok']} | timeout {counts['timeout']} | retried {counts['retried']} | "
+              f"p50 {self.latency.percentile(50) / 1000:.0f} ms")
+
+    def print_summary(self, elapsed):
+        counts = self.counts
+        rate = counts["ok"] / self.total if self.total else 0
+        print("\n📊 Dispatch Results:")
+        print("=" * 60)
+        print(f"Command: {self.command} → {self.total} devices in {elapsed:.1f}s")
+        print(f"Answered: {counts['ok']} ({rate:.1%}) | timeout {counts['timeout']} | failed {counts['failed']} | "
+              f"retries {counts['retried']} | unmatched answers {counts['unmatched']}")
+        if self.latency.total:
+            print("Latency (from first send): " + " | ".join(
+                f"p{percent:g} {self.latency.percentile(percent) / 1000:.1f} ms" for percent in (50, 90, 99, 99.9)
+            ) + f" | max {self.latency.max / 1000:.1f} ms")
+
+
+def load_device_ids(args):
+    device_ids = list(args.device_id)
+    if args.devices_file:
+        with open(args.devices_file, encoding="utf-8") as f:
+            device_ids.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    if args.devices:
+        device_ids.extend(f"{args.prefix}{index:02d}" for index in range(1, args.devices + 1))
+    # Keep order, drop duplicates: one command per device
+    return list(dict.fromkeys(device_ids))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send one command to many devices and collect the answers")
+    parser.add_argument("command", help="command to send, e.g. calibrate or read_sensors")
+    parser.add_argument("--params", default=None, help='extra JSON fields for the command, e.g. \'{"offset": 0.5}\'')
+    parser.add_argument("--device-id", action="append", default=[], help="target device id; repeatable")
+    parser.add_argument("--devices-file", default=None, help="file with one device id per line")
+    parser.add_argument("--devices", type=int, default=0, help="target <prefix>01 .. <prefix>NN (emulated fleets)")
+    parser.add_argument("--prefix", default="esp32-weather-", help="id prefix for --devices (default esp32-weather-)")
+    parser.add_argument("--concurrency", type=int, default=100, help="commands in flight at once (default 100)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait per attempt (default 10)")
+    parser.add_argument("--retries", type=int, default=1, help="re-sends after a timeout (default 1)")
+    parser.add_argument("--plain", action="store_true", help="send the bare command string like the current firmware expects")
+    parser.add_argument("--output", default=None, help="append each result as an NDJSON line to this file")
+    parser.add_argument("--quiet", action="store_true", help="only print progress and the summary")
+    parser.add_argument("--broker", default=broker_address, help=f"MQTT broker host (default {broker_address})")
+    parser.add_argument("--port", type=int, default=port, help=f"MQTT broker port (default {port})")
+    parser.add_argument("--transport", default=transport_protocol, choices=("tcp", "websockets"),
+                        help=f"MQTT transport (default {transport_protocol})")
+    args = parser.parse_args()
+
+    device_ids = load_device_ids(args)
+    if not device_ids:
+        parser.error("no target devices (use --device-id, --devices-file or --devices)")
+    params = json.loads(args.params) if args.params else None
+    if params and args.plain:
+        parser.error("--params needs JSON commands (drop --plain)")
+
+    output = open(args.output, "a", encoding="utf-8") if args.output else None
+
+    def on_result(result):
+        if output is not None:
+            output.write(json.dumps(result) + "\n")
+        if not args.quiet:
+            if result["status"] == "ok":
+                retry = f", attempt {result['attempts']}" if result["attempts"] > 1 else ""
+                print(f"✅ {result['device_id']}: {result['latency_ms']} ms{retry}")
+            else:
+                print(f"❌ {result['device_id']}: {result['status']} after {result['attempts']} attempts")
+
+    client = mqtt.Client(client_id=f"command_dispatcher_{uuid.uuid4().hex[:8]}", transport=args.transport)
+    if username:
+        client.username_pw_set(username, password)
+    if args.port in (443, 8883):
+        client.tls_set(tls_version=ssl.PROTOCOL_TLS)
+    client.max_inflight_messages_set(args.concurrency)
+    client.max_queued_messages_set(0)
+
+    dispatcher = CommandDispatcher(client, args.command, device_ids, params=params, concurrency=args.concurrency,
+                                   timeout=args.timeout, retries=args.retries, plain=args.plain, on_result=on_result)
+    connected = threading.Event()
+    subscribed = threading.Event()
+    subscribe_mid = []
+
+    def on_connect(client, userdata, flags, rc):
+        if rc == 0:
+            subscribe_mid[:] = [dispatcher.subscribe(client)]
+            connected.set()
+        else:
+            print(f"❌ Gagal terhubung, kode balasan: {rc}")
+
+    def on_subscribe(client, userdata, mid, granted_qos):
+        # Both callbacks run on paho's thread, so the mid is stored before its SUBACK is handled
+        if mid in subscribe_mid:
+            subscribed.set()
+
+    client.on_connect = on_connect
+    client.on_subscribe = on_subscribe
+    client.on_message = dispatcher.on_message
+
+    print(f"🔄 Connecting to MQTT broker: {args.broker}:{args.port}")
+    try:
+        client.connect(args.broker, args.port)
+    except Exception as e:
+        print(f"❌ Connection failed: {e}")
+        return
+    client.loop_start()
+    if not connected.wait(10):
+        print("❌ No CONNACK from broker")
+        client.loop_stop()
+        return
+    # Answers published before the SUBACK would be lost and counted as timeouts
+    if not subscribed.wait(10):
+        print("❌ No SUBACK from broker")
+        client.loop_stop()
+        return
+
+    print(f"📤 Sending '{args.command}' to {len(device_ids)} devices ({args.concurrency} in flight, "
+          f"timeout {args.timeout:g}s, {args.retries} retries)")
+    elapsed = 0.0
+    try:
+        elapsed = dispatcher.run()
+    except KeyboardInterrupt:
+        print("\n⏹️  Dispatch interrupted by user")
+    finally:
+        client.loop_stop()
+        client.disconnect()
+        if output is not None:
+            output.close()
+        dispatcher.print_summary(elapsed)
+
+
+if __name__ == "__main__":
+    main()
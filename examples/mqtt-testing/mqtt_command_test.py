@@ -1,8 +1,39 @@
 #!/usr/bin/env python3
-import paho.mqtt.client as mqtt
-import time
-import ssl
+"""
+Concurrent MQTT command round-trip tester.
+
+Sends every command in `commands_to_test` to one or more devices, several
+devices at a time, and measures the round trip of each command until its
+answer arrives. No fixed sleeps: after restart / reset_wifi / deep_sleep /
+factory_reset the device's next command waits until it publishes its
+online status again, and that reboot time is reported too.
+
+Commands are sent as JSON with an id, {"id": "...", "command": "..."}, and
+answers on /response are matched by that id. Use --plain for the current
+firmware, which only understands bare strings: the answer is then the next
+message on the topic the firmware replies on (read_sensors -> /data,
+status -> /status, everything else -> /response).
+
+    # Against local emulated devices (python -m simulator.responder --devices 20 ...)
+    python mqtt_command_test.py --broker 127.0.0.1 --port 1883 --transport tcp --devices 20 --rounds 5
+    # Against a real ESP32
+    python mqtt_command_test.py --plain
+"""
+
+import argparse
 import json
+import os
+import ssl
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+
+import paho.mqtt.client as mqtt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from simulator.hdr import HdrHistogram
 
 # MQTT Configuration
 broker_address = "mqtt.astrodev.cloud"
@@ -15,16 +46,10 @@ password = "Astroboy26@"
 # Test device ID
 test_device_id = "esp32-weather-01"
 
-# MQTT Topics
-command_topic = f"iot/devices/{test_device_id}/commands"
-response_topic = f"iot/devices/{test_device_id}/response"
-data_topic = f"iot/devices/{test_device_id}/data"
-status_topic = f"iot/devices/{test_device_id}/status"
-
 # Available commands to test
 commands_to_test = [
     "read_sensors",
-    "status", 
+    "status",
     "led_on",
     "led_off",
     "calibrate",
@@ -34,162 +59,258 @@ commands_to_test = [
     "factory_reset"
 ]
 
-received_messages = []
-
-def on_connect(client, userdata, flags, rc):
-    if rc == 0:
-        print("✅ Berhasil terhubung ke Broker MQTT (Command Tester)!")
-        
-        # Subscribe to response and data topics
-        topics_to_subscribe = [
-            (response_topic, 0),
-            (data_topic, 0),
-            (status_topic, 0),
-            (f"iot/devices/{test_device_id}/+", 0)  # Wildcard for all device topics
-        ]
-        
-        for topic, qos in topics_to_subscribe:
-            client.subscribe(topic, qos)
-            print(f"📡 Subscribed to: {topic}")
-            
-    else:
-        print(f"❌ Gagal terhubung, kode balasan: {rc}")
-
-def on_message(client, userdata, msg):
-    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-    topic = msg.topic
-    payload = msg.payload.decode('utf-8')
-    
-    print(f"\n📨 [{timestamp}] Message received:")
-    print(f"   Topic: {topic}")
-    print(f"   Payload: {payload}")
-    
-    # Try to parse JSON
-    try:
-        json_data = json.loads(payload)
-        print(f"   Parsed JSON:")
-        for key, value in json_data.items():
-            print(f"     {key}: {value}")
-    except json.JSONDecodeError:
-        print(f"   Raw data (not JSON): {payload}")
-    
-    # Store message
-    received_messages.append({
-        'timestamp': timestamp,
-        'topic': topic,
-        'payload': payload
-    })
-    
-    print("-" * 50)
-
-def on_publish(client, userdata, mid):
-    print(f"✅ Command published successfully (mid: {mid})")
-
-def send_command(client, command):
-    print(f"\n📤 Sending command: '{command}' to topic: {command_topic}")
-    result = client.publish(command_topic, command)
-    
-    if result.rc == mqtt.MQTT_ERR_SUCCESS:
-        print(f"✅ Command '{command}' sent successfully")
-        return True
-    else:
-        print(f"❌ Failed to send command '{command}'. Error code: {result.rc}")
-        return False
+# Commands after which the device reboots (or sleeps) and reconnects
+REBOOT_COMMANDS = {"restart", "reset_wifi", "deep_sleep", "factory_reset"}
+# Topic the firmware answers a bare-string command on
+REPLY_TOPIC = {"read_sensors": "data", "status": "status"}
+
+
+class DeviceQueue:
+    """Commands still to send to one device; at most one is in flight"""
+
+    def __init__(self, device_id, commands):
+        self.device_id = device_id
+        self.commands = deque(commands)
+        self.in_flight = None      # (command id, command, sent at)
+        self.rebooting_since = None
+
+
+class CommandTester:
+    def __init__(self, device_ids, commands, rounds=1, concurrency=10, timeout=10.0,
+                 reboot_timeout=60.0, plain=False, verbose=False, transport=transport_protocol):
+        self.devices = {device_id: DeviceQueue(device_id, commands * rounds) for device_id in device_ids}
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.reboot_timeout = reboot_timeout
+        self.plain = plain
+        self.verbose = verbose
+
+        self.lock = threading.Condition()
+        self.pending = {}          # command id -> DeviceQueue
+        self.ready = deque(self.devices.values())
+        self.rtt = {command: HdrHistogram() for command in commands}
+        self.reboot = HdrHistogram()
+        self.counts = {command: {"sent": 0, "ok": 0, "timeout": 0, "failed": 0} for command in commands}
+        self.reboot_timeouts = 0
+        self.unmatched = 0
+        self.connected = threading.Event()
+
+        self.client = mqtt.Client(client_id=client_id, transport=transport)
+        self.client.on_connect = self.on_connect
+        self.client.on_message = self.on_message
+
+    def on_connect(self, client, userdata, flags, rc):
+        if rc == 0:
+            print("✅ Berhasil terhubung ke Broker MQTT (Command Tester)!")
+            for kind in ("response", "status", "data"):
+                client.subscribe(f"iot/devices/+/{kind}", 0)
+            self.connected.set()
+        else:
+            print(f"❌ Gagal terhubung, kode balasan: {rc}")
+
+    def on_message(self, client, userdata, msg):
+        received = time.monotonic()
+        parts = msg.topic.split("/")
+        if len(parts) != 4:
+            return
+        device_id, kind = parts[2], parts[3]
+        payload = msg.payload.decode("utf-8", errors="replace")
+        if self.verbose:
+            print(f"📨 {msg.topic}: {payload[:120]}")
+
+        with self.lock:
+            device = self.devices.get(device_id)
+            if device is None:
+                return
+            if kind == "status" and device.rebooting_since is not None:
+                if '"online"' in payload:
+                    self.reboot.record(int((received - device.rebooting_since) * 1e6))
+                    device.rebooting_since = None
+                    self.ready.append(device)
+                    self.lock.notify()
+                return
+            if device.in_flight is None:
+                return
+
+            command_id, command, sent_at = device.in_flight
+            if self.plain:
+                matched = kind == REPLY_TOPIC.get(command, "response")
+            elif kind == "response":
+                try:
+                    matched = self.pending.get(json.loads(payload).get("id")) is device
+                except (ValueError, AttributeError):
+                    matched = False
+                self.unmatched += not matched
+            else:
+                matched = False
+            if matched:
+                self.complete(device, received - sent_at)
+
+    def complete(self, device, rtt):
+        """Record the in-flight command's answer and free the device (lock held)"""
+        command_id, command, _ = device.in_flight
+        self.pending.pop(command_id, None)
+        device.in_flight = None
+        self.counts[command]["ok"] += 1
+        self.rtt[command].record(int(rtt * 1e6))
+        if self.verbose:
+            print(f"✅ {device.device_id} {command}: {rtt * 1000:.1f} ms")
+        if command in REBOOT_COMMANDS:
+            device.rebooting_since = time.monotonic()
+        else:
+            self.ready.append(device)
+        self.lock.notify()
+
+    def send_next(self, device):
+        """Publish the device's next command (lock held)"""
+        command = device.commands.popleft()
+        command_id = uuid.uuid4().hex[:12]
+        payload = command if self.plain else json.dumps({"id": command_id, "command": command})
+        topic = f"iot/devices/{device.device_id}/commands"
+        self.counts[command]["sent"] += 1
+        device.in_flight = (command_id, command, time.monotonic())
+        self.pending[command_id] = device
+        result = self.client.publish(topic, payload)
+        if result.rc != mqtt.MQTT_ERR_SUCCESS:
+            print(f"❌ Failed to send command '{command}' to {device.device_id}. Error code: {result.rc}")
+            self.counts[command]["failed"] += 1
+            self.pending.pop(command_id, None)
+            device.in_flight = None
+            self.ready.append(device)
+
+    def expire(self, now):
+        """Time out stuck commands and reboots (lock held)"""
+        for device in self.devices.values():
+            if device.in_flight is not None and now - device.in_flight[2] > self.timeout:
+                command_id, command, _ = device.in_flight
+                print(f"⏰ {device.device_id} '{command}': no answer after {self.timeout:g}s")
+                self.counts[command]["timeout"] += 1
+                self.pending.pop(command_id, None)
+                device.in_flight = None
+                self.ready.append(device)
+            elif device.rebooting_since is not None and now - device.rebooting_since > self.reboot_timeout:
+                print(f"⏰ {device.device_id} did not come back online within {self.reboot_timeout:g}s")
+                self.reboot_timeouts += 1
+                device.rebooting_since = None
+                self.ready.append(device)
+
+    def busy(self):
+        return any(
+            device.commands or device.in_flight is not None or device.rebooting_since is not None
+            for device in self.devices.values()
+        )
+
+    def run(self):
+        start = time.monotonic()
+        last_check = start
+        with self.lock:
+            while self.busy():
+                now = time.monotonic()
+                if now - last_check >= 0.1:
+                    self.expire(now)
+                    last_check = now
+                in_flight = len(self.pending)
+                while self.ready and in_flight < self.concurrency:
+                    device = self.ready.popleft()
+                    if device.commands:
+                        self.send_next(device)
+                        in_flight = len(self.pending)
+                self.lock.wait(0.1)
+        return time.monotonic() - start
+
+    def print_results(self, elapsed):
+        print("\n📊 Test Results Summary:")
+        print("=" * 78)
+        print(f"{'command':<15}{'sent':>6}{'ok':>6}{'timeout':>9}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        total_sent = total_ok = 0
+        overall = HdrHistogram()
+        for command, counts in self.counts.items():
+            histogram = self.rtt[command]
+            overall.merge(histogram)
+            total_sent += counts["sent"]
+            total_ok += counts["ok"]
+            print(f"{command:<15}{counts['sent']:>6}{counts['ok']:>6}{counts['timeout']:>9}"
+                  f"{histogram.percentile(50) / 1000:>10.1f}{histogram.percentile(90) / 1000:>10.1f}"
+                  f"{histogram.percentile(99) / 1000:>10.1f}{histogram.max / 1000:>10.1f}")
+        print("-" * 78)
+        print(f"{'all':<15}{total_sent:>6}{total_ok:>6}{total_sent - total_ok:>9}"
+              f"{overall.percentile(50) / 1000:>10.1f}{overall.percentile(90) / 1000:>10.1f}"
+              f"{overall.percentile(99) / 1000:>10.1f}{overall.max / 1000:>10.1f}")
+        if self.reboot.total or self.reboot_timeouts:
+            print(f"\n🔄 Back online after reboot/sleep: {self.reboot.total} | p50 {self.reboot.percentile(50) / 1e6:.1f}s | "
+                  f"max {self.reboot.max / 1e6:.1f}s | never came back {self.reboot_timeouts}")
+        if self.unmatched:
+            print(f"⚠️  {self.unmatched} /response messages did not match a pending command id")
+        rate = total_ok / elapsed if elapsed > 0 else 0
+        print(f"\n⏱️  {len(self.devices)} devices, {total_ok}/{total_sent} answered in {elapsed:.1f}s ({rate:.1f} commands/s)")
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Concurrent MQTT command round-trip tester")
+    parser.add_argument("--devices", type=int, default=1,
+                        help=f"test esp32-weather-01 .. esp32-weather-NN (default 1: {test_device_id})")
+    parser.add_argument("--device-id", action="append", default=[], help="test this device id instead; repeatable")
+    parser.add_argument("--commands", default=",".join(commands_to_test), help="comma-separated commands to send")
+    parser.add_argument("--rounds", type=int, default=1, help="send the command list this many times per device (default 1)")
+    parser.add_argument("--concurrency", type=int, default=10, help="commands in flight at once (default 10)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for an answer (default 10)")
+    parser.add_argument("--reboot-timeout", type=float, default=60.0,
+                        help="seconds to wait for a device to come back after restart/deep_sleep (default 60)")
+    parser.add_argument("--plain", action="store_true", help="send bare-string commands like the current firmware expects")
+    parser.add_argument("--verbose", "-v", action="store_true", help="print every message and answer")
+    parser.add_argument("--broker", default=broker_address, help=f"MQTT broker host (default {broker_address})")
+    parser.add_argument("--port", type=int, default=port, help=f"MQTT broker port (default {port})")
+    parser.add_argument("--transport", default=transport_protocol, choices=("tcp", "websockets"),
+                        help=f"MQTT transport (default {transport_protocol})")
+    args = parser.parse_args()
+
+    if args.device_id:
+        device_ids = args.device_id
+    else:
+        device_ids = [f"esp32-weather-{index:02d}" for index in range(1, args.devices + 1)]
+    commands = [command.strip() for command in args.commands.split(",") if command.strip()]
+    if args.plain and len(device_ids) > 1 and args.concurrency > 1:
+        print("ℹ️  --plain: answers are matched by device and topic (one command in flight per device)")
+
+    tester = CommandTester(device_ids, commands, rounds=args.rounds, concurrency=args.concurrency,
+                           timeout=args.timeout, reboot_timeout=args.reboot_timeout,
+                           plain=args.plain, verbose=args.verbose, transport=args.transport)
+
     print("🧪 MQTT Command Tester for ESP32 Weather Station")
     print("=" * 60)
-    
-    # Create MQTT client
-    client = mqtt.Client(client_id=client_id, transport=transport_protocol)
-    
-    # Set credentials
-    client.username_pw_set(username, password)
-    
-    # Configure TLS/SSL
-    client.tls_set(tls_version=ssl.PROTOCOL_TLS)
-    
-    # Set callbacks
-    client.on_connect = on_connect
-    client.on_message = on_message
-    client.on_publish = on_publish
-    
-    # Connect to broker
-    print(f"🔄 Connecting to MQTT broker: {broker_address}:{port}")
+    client = tester.client
+    if username:
+        client.username_pw_set(username, password)
+    if args.port in (443, 8883):
+        client.tls_set(tls_version=ssl.PROTOCOL_TLS)
+
+    print(f"🔄 Connecting to MQTT broker: {args.broker}:{args.port}")
     try:
-        client.connect(broker_address, port)
+        client.connect(args.broker, args.port)
     except Exception as e:
         print(f"❌ Connection failed: {e}")
         return
-    
-    # Start network loop
     client.loop_start()
-    
-    # Wait for connection
-    time.sleep(3)
-    
-    print(f"\n🎯 Testing {len(commands_to_test)} commands...")
+    if not tester.connected.wait(10):
+        print("❌ No CONNACK from broker")
+        client.loop_stop()
+        return
+
+    total = len(device_ids) * len(commands) * args.rounds
+    print(f"\n🎯 Testing {len(commands)} commands × {args.rounds} rounds on {len(device_ids)} devices "
+          f"({total} commands, {args.concurrency} in flight)...")
     print("=" * 60)
-    
+    elapsed = 0.0
     try:
-        # Test each command
-        for i, command in enumerate(commands_to_test, 1):
-            print(f"\n🔍 Test {i}/{len(commands_to_test)}: Testing command '{command}'")
-            
-            if send_command(client, command):
-                print(f"⏳ Waiting for response (5 seconds)...")
-                time.sleep(5)
-            else:
-                print(f"❌ Skipping command '{command}' due to send failure")
-            
-            # Special handling for restart command
-            if command == "restart":
-                print("⚠️  Device is restarting, waiting 15 seconds...")
-                time.sleep(15)
-            
-            # Special handling for deep_sleep command
-            elif command == "deep_sleep":
-                print("😴 Device entering deep sleep, waiting 35 seconds...")
-                time.sleep(35)
-            
-            # Special handling for factory_reset command
-            elif command == "factory_reset":
-                print("🔄 Device performing factory reset, waiting 20 seconds...")
-                time.sleep(20)
-        
-        # Final listening period
-        print(f"\n👂 Final listening period (30 seconds)...")
-        time.sleep(30)
-        
-        # Test results
-        print(f"\n📊 Test Results Summary:")
-        print("=" * 60)
-        print(f"Total commands sent: {len(commands_to_test)}")
-        print(f"Total messages received: {len(received_messages)}")
-        
-        # Group messages by topic
-        topic_counts = {}
-        for msg in received_messages:
-            topic = msg['topic']
-            topic_counts[topic] = topic_counts.get(topic, 0) + 1
-        
-        print(f"\n📈 Messages received by topic:")
-        for topic, count in topic_counts.items():
-            print(f"   {topic}: {count} messages")
-        
-        # Show recent messages
-        print(f"\n📝 All received messages:")
-        for msg in received_messages:
-            print(f"   [{msg['timestamp']}] {msg['topic']}: {msg['payload'][:80]}...")
-        
+        elapsed = tester.run()
     except KeyboardInterrupt:
         print("\n⏹️  Test interrupted by user")
-    except Exception as e:
-        print(f"\n❌ Test error: {e}")
     finally:
         client.loop_stop()
         client.disconnect()
+        tester.print_results(elapsed)
         print("\n✅ Command testing completed!")
 
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,80 @@
+import base64
+import gzip
+import json
+import threading
+import time
+
+
+def _open(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class CaptureWriter:
+    """Appends received MQTT messages to an NDJSON capture file.
+
+    One record per line: {"t": <epoch seconds>, "topic": ..., "payload": ...}.
+    Payloads that are not valid UTF-8 are stored base64-encoded under
+    "payload_b64" instead. Files ending in .gz are gzip-compressed.
+
+    write() runs on paho's network thread while flush() / close() run on
+    the main thread, so every file access holds one lock; a message that
+    arrives after close() is dropped.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = _open(path, 'a')
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def write(self, topic, payload, timestamp=None, extra=None):
+        record = {"t": round(time.time() if timestamp is None else timestamp, 6), "topic": topic}
+        try:
+            record["payload"] = payload.decode('utf-8')
+        except UnicodeDecodeError:
+            record["payload_b64"] = base64.b64encode(payload).decode('ascii')
+        if extra:
+            record.update(extra)
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.write(line)
+            self.count += 1
+
+    def flush(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def read_capture(path, since=None, until=None):
+    """Yield (timestamp, topic, payload_bytes) records from a capture file"""
+    with _open(path, 'r') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                print(f"⚠️ Skipping malformed capture line {line_number}")
+                continue
+
+            timestamp = record["t"]
+            if since is not None and timestamp < since:
+                continue
+            if until is not None and timestamp > until:
+                continue
+
+            if "payload_b64" in record:
+                payload = base64.b64decode(record["payload_b64"])
+            else:
+                payload = record["payload"].encode('utf-8')
+            yield timestamp, record["topic"], payload
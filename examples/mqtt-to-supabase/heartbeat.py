@@ -0,0 +1,107 @@
+import threading
+import time
+
+
+class HeartbeatTracker:
+    """Hashed timing wheel of last-seen deadlines, one entry per device.
+
+    Every heartbeat moves the device to the slot of its new deadline (O(1)),
+    and every tick only looks at the devices stored in the current slot, so
+    the cost does not depend on the fleet size.
+    """
+
+    def __init__(self, on_expire, default_timeout=300, tick_seconds=1.0, wheel_size=512, timeouts=None):
+        self.on_expire = on_expire
+        self.default_timeout = default_timeout
+        self.tick_seconds = tick_seconds
+        self.wheel_size = wheel_size
+        self.timeouts = dict(timeouts or {})
+
+        self.slots = [set() for _ in range(wheel_size)]
+        self.deadlines = {}  # device_id -> (deadline_tick, last_seen)
+        self.current_tick = self._tick_for(time.time())
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+
+    def _tick_for(self, timestamp):
+        return int(timestamp // self.tick_seconds)
+
+    def _unlink(self, device_id):
+        entry = self.deadlines.pop(device_id, None)
+        if entry is not None:
+            self.slots[entry[0] % self.wheel_size].discard(device_id)
+        return entry
+
+    def touch(self, device_id, now=None):
+        """Record a heartbeat and push the device's deadline forward"""
+        now = time.time() if now is None else now
+        timeout = self.timeouts.get(device_id, self.default_timeout)
+        # Round up so a device never expires before its full silence window
+        deadline_tick = max(self._tick_for(now + timeout) + 1, self.current_tick + 1)
+
+        with self.lock:
+            self._unlink(device_id)
+            self.deadlines[device_id] = (deadline_tick, now)
+            self.slots[deadline_tick % self.wheel_size].add(device_id)
+
+    def forget(self, device_id):
+        """Stop tracking a device (e.g. it reported itself offline)"""
+        with self.lock:
+            self._unlink(device_id)
+
+    def set_timeout(self, device_id, timeout):
+        """Configure a per-device silence window, applied from the next heartbeat"""
+        self.timeouts[device_id] = timeout
+
+    def advance(self, now=None):
+        """Advance the wheel up to `now` and fire callbacks for expired devices"""
+        now = time.time() if now is None else now
+        target_tick = self._tick_for(now)
+        expired = []
+
+        with self.lock:
+            while self.current_tick < target_tick:
+                self.current_tick += 1
+                slot = self.slots[self.current_tick % self.wheel_size]
+                if not slot:
+                    continue
+                # Devices further than one wheel turn away share the slot; keep them
+                due = [device_id for device_id in slot if self.deadlines[device_id][0] <= self.current_tick]
+                for device_id in due:
+                    expired.append((device_id, self._unlink(device_id)[1]))
+
+        for device_id, last_seen in expired:
+            try:
+                self.on_expire(device_id, last_seen)
+            except Exception as e:
+                print(f"❌ Error handling heartbeat timeout for {device_id}: {e}")
+        return len(expired)
+
+    def devices(self):
+        """Snapshot of the device ids currently being tracked"""
+        with self.lock:
+            return list(self.deadlines)
+
+    def __len__(self):
+        return len(self.deadlines)
+
+    def _run(self):
+        while self.running:
+            self.advance()
+            time.sleep(self.tick_seconds)
+
+    def start(self):
+        """Start the background ticker thread"""
+        if self.thread is not None:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="heartbeat-tracker", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the background ticker thread"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=self.tick_seconds * 2)
+            self.thread = None
@@ -0,0 +1,180 @@
+import bisect
+import fcntl
+import hashlib
+import json
+import os
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes.
+
+    Adding or removing one instance only moves the devices that hashed to
+    that instance's points, roughly 1/N of the fleet.
+    """
+
+    def __init__(self, members, vnodes=128):
+        self.members = sorted(set(members))
+        self.vnodes = vnodes
+        points = []
+        for member in self.members:
+            for i in range(vnodes):
+                points.append((_hash(f"{member}#{i}"), member))
+        points.sort()
+        self.keys = [point for point, _ in points]
+        self.owners = [member for _, member in points]
+
+    def owner(self, key):
+        if not self.keys:
+            return None
+        index = bisect.bisect(self.keys, _hash(key)) % len(self.keys)
+        return self.owners[index]
+
+
+class FileMembership:
+    """Ring members listed in a JSON file: {"instances": ["bridge-a", "bridge-b"]}"""
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = None
+
+    def changed(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self.mtime:
+            return False
+        self.mtime = mtime
+        return True
+
+    def members(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f).get("instances", [])
+        except FileNotFoundError:
+            return []
+
+    def join(self, instance_id):
+        pass
+
+    def leave(self, instance_id):
+        pass
+
+
+class LockDirMembership:
+    """Ring members are the instances currently holding a lock file in a directory.
+
+    Each instance keeps an exclusive flock on <dir>/<instance>.lock while it
+    runs; the kernel drops the lock if the process dies, so crashed instances
+    leave the ring without any cleanup.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock_file = None
+        self.last_members = None
+        os.makedirs(path, exist_ok=True)
+
+    def join(self, instance_id):
+        self.lock_file = open(os.path.join(self.path, f"{instance_id}.lock"), "w")
+        fcntl.flock(self.lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def leave(self, instance_id):
+        if self.lock_file is not None:
+            fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+            self.lock_file.close()
+            self.lock_file = None
+            os.remove(os.path.join(self.path, f"{instance_id}.lock"))
+
+    def _is_held(self, name):
+        if self.lock_file is not None and os.path.basename(self.lock_file.name) == name:
+            return True
+        try:
+            with open(os.path.join(self.path, name), "r") as f:
+                fcntl.flock(f, fcntl.LOCK_SH | fcntl.LOCK_NB)
+                fcntl.flock(f, fcntl.LOCK_UN)
+                return False
+        except BlockingIOError:
+            return True
+        except FileNotFoundError:
+            return False
+
+    def members(self):
+        names = [name for name in os.listdir(self.path) if name.endswith(".lock")]
+        return [name[:-len(".lock")] for name in names if self._is_held(name)]
+
+    def changed(self):
+        members = sorted(self.members())
+        if members == self.last_members:
+            return False
+        self.last_members = members
+        return True
+
+
+class DevicePartition:
+    """Decides which devices this bridge instance processes.
+
+    With no instance id configured every device is local, so a single bridge
+    behaves exactly as before.
+    """
+
+    def __init__(self, instance_id=None, membership=None, vnodes=128, on_change=None):
+        self.instance_id = instance_id
+        self.membership = membership
+        self.vnodes = vnodes
+        self.on_change = on_change
+        # (HashRing, {device_id: owned}) swapped as one object: owns() runs on
+        # paho's thread while refresh() runs on the main thread, so a lookup
+        # against the old ring must never land in the new ring's cache
+        self.routing = None
+
+    @property
+    def ring(self):
+        return None if self.routing is None else self.routing[0]
+
+    @property
+    def enabled(self):
+        return self.instance_id is not None and self.membership is not None
+
+    def start(self):
+        if not self.enabled:
+            return
+        self.membership.join(self.instance_id)
+        self.refresh()
+
+    def stop(self):
+        if self.enabled:
+            self.membership.leave(self.instance_id)
+
+    def refresh(self):
+        """Reload ring membership if it changed; returns True when it did"""
+        if not self.enabled:
+            return False
+        if not self.membership.changed() and self.ring is not None:
+            return False
+
+        members = set(self.membership.members())
+        # Always count ourselves in, so a missing entry never drops all traffic
+        members.add(self.instance_id)
+        if self.ring is not None and set(self.ring.members) == members:
+            return False
+
+        self.routing = (HashRing(members, self.vnodes), {})
+        print(f"🔁 Partition ring updated: {', '.join(self.ring.members)} (this instance: {self.instance_id})")
+        if self.on_change is not None:
+            self.on_change()
+        return True
+
+    def owns(self, device_id):
+        if not self.enabled:
+            return True
+        ring, cache = self.routing
+        owned = cache.get(device_id)
+        if owned is None:
+            owned = ring.owner(device_id) == self.instance_id
+            cache[device_id] = owned
+        return owned
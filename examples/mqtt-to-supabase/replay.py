@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Replay an MQTT capture file through the bridge pipeline.
+
+Examples:
+    python replay.py capture.ndjson                  # original pace
+    python replay.py capture.ndjson --speed 10       # 10x faster
+    python replay.py capture.ndjson --speed 0        # as fast as possible
+    python replay.py capture.ndjson.gz --since 2025-06-17T08:00:00+07:00 --until 2025-06-17T09:30:00+07:00
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+import paho.mqtt.client as mqtt
+
+from capture import read_capture
+from mqtt_bridge import MQTTToSupabaseBridge
+
+
+def parse_time(value):
+    """Accept epoch seconds or an ISO 8601 timestamp"""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def replay(bridge, path, speed=1.0, since=None, until=None):
+    """Feed captured messages to bridge.on_message, paced against the capture clock"""
+    count = 0
+    first_timestamp = None
+    start = time.monotonic()
+
+    for timestamp, topic, payload in read_capture(path, since, until):
+        if first_timestamp is None:
+            first_timestamp = timestamp
+
+        if speed > 0:
+            # Schedule against the start time so per-message overhead never accumulates as drift
+            delay = start + (timestamp - first_timestamp) / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+        msg = mqtt.MQTTMessage(topic=topic.encode('utf-8'))
+        msg.payload = payload
+        bridge.on_message(None, None, msg)
+        count += 1
+
+    elapsed = time.monotonic() - start
+    rate = count / elapsed if elapsed > 0 else 0
+    print(f"📼 Replayed {count} messages in {elapsed:.1f}s ({rate:.1f} msg/s)")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a bridge capture through the MQTT to Supabase pipeline")
+    parser.add_argument("capture", help="capture file written by the bridge (.ndjson or .ndjson.gz)")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed multiplier, 0 = as fast as possible (default 1)")
+    parser.add_argument("--since", type=parse_time, help="only replay messages at or after this time (epoch or ISO 8601)")
+    parser.add_argument("--until", type=parse_time, help="only replay messages at or before this time (epoch or ISO 8601)")
+    args = parser.parse_args()
+
+    print("📼 MQTT Capture Replay")
+    print("======================")
+    print(f"📁 Capture: {args.capture}")
+    print(f"⏩ Speed: {'max' if args.speed <= 0 else f'{args.speed}x'}")
+    print()
+
+    # The bridge is not connected to the broker: messages go straight into its
+    # message handler and on to Supabase. Heartbeat timeouts are not replayed.
+    bridge = MQTTToSupabaseBridge()
+    bridge.partition.start()
+    try:
+        replay(bridge, args.capture, args.speed, args.since, args.until)
+    except KeyboardInterrupt:
+        print("\n🛑 Replay stopped by user")
+    finally:
+        bridge.partition.stop()
+        bridge.dead_letters.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import json
+import os
+import re
+
+from validation import DATA_KEYS, PayloadValidator
+
+HANDLER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "supabase", "functions",
+                       "mqtt-data-handler", "index.ts")
+
+# One ordinary reading per measurementKeys entry
+SAMPLES = {
+    "temperature": -5.5,
+    "humidity": 65.2,
+    "pressure": 1035.7,
+    "battery": 85,
+    "ketinggian_air": 120.5,
+    "curah_hujan": 12.3,
+    "light": 850,
+    "o2": 20.9,
+    "co2": 420,
+    "ph": 7.1,
+    "arah_angin": 90,
+    "kecepatan_angin": 3.2,
+}
+
+
+def handler_keys():
+    with open(HANDLER, encoding="utf-8") as f:
+        block = re.search(r"measurementKeys = \[(.*?)\]", f.read(), re.S).group(1)
+    return re.findall(r"'(\w+)'", block)
+
+
+def test_data_keys_match_handler():
+    assert set(DATA_KEYS) == set(handler_keys())
+
+
+def test_every_handler_key_is_accepted():
+    validator = PayloadValidator()
+    for key in handler_keys():
+        data, reason = validator.validate("iot/devices/abc/data", json.dumps({key: SAMPLES[key]}).encode())
+        assert reason is None, f"{key}: {reason}"
+
+
+def test_out_of_range_is_rejected():
+    validator = PayloadValidator()
+    data, reason = validator.validate("iot/devices/abc/data", b'{"pressure": 20}')
+    assert data is None and "out of range" in reason
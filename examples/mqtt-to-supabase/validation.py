@@ -0,0 +1,154 @@
+import json
+import math
+import time
+
+from capture import CaptureWriter
+
+# Physical bounds per payload key: a value outside them is a broken sensor or
+# payload, not an unusual reading (thresholds and alerts are the Edge
+# Function's job). Units: °C, %RH, hPa, ppm (co2), % (o2), lux, mm, m/s, °, cm.
+MEASUREMENT_RANGES = {
+    "temperature": (-40, 85),
+    "humidity": (0, 100),
+    "pressure": (300, 1100),
+    "co2": (0, 10000),
+    "o2": (0, 100),
+    "light": (0, 200000),
+    "curah_hujan": (0, 500),
+    "kecepatan_angin": (0, 75),
+    "arah_angin": (0, 360),
+    "ph": (0, 14),
+    "ketinggian_air": (0, 500),
+}
+
+STATUS_RANGES = {
+    "battery": (0, 100),
+    "wifi_rssi": (-130, 0),
+    "uptime": (0, None),
+    "free_heap": (0, None),
+}
+
+# measurementKeys of mqtt-data-handler; a data message without any of them (or a
+# status field) is a wasted invocation
+DATA_KEYS = (
+    "temperature", "humidity", "pressure", "battery", "ketinggian_air", "curah_hujan",
+    "light", "o2", "co2", "ph", "arah_angin", "kecepatan_angin",
+)
+STATUS_VALUES = ("online", "offline")
+
+
+def _to_number(value):
+    """Mirror toNumber() in mqtt-data-handler: numbers and numeric strings, never bools"""
+    if isinstance(value, bool):
+        raise ValueError("boolean is not a number")
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError("not a finite number")
+    return number
+
+
+def _compile_ranges(ranges):
+    return tuple((key, low, high) for key, (low, high) in ranges.items())
+
+
+class PayloadValidator:
+    """Validates MQTT messages against per-topic schemas compiled once at startup.
+
+    validate() returns (data, None) for a good message, or (None, reason)
+    for a message that must not be forwarded.
+    """
+
+    def __init__(self, measurement_ranges=None, status_ranges=None):
+        measurement_ranges = MEASUREMENT_RANGES if measurement_ranges is None else measurement_ranges
+        status_ranges = STATUS_RANGES if status_ranges is None else status_ranges
+
+        status_checks = _compile_ranges(status_ranges)
+        # Data messages may carry status fields too (the handler stores both)
+        self.schemas = {
+            "data": (
+                _compile_ranges(measurement_ranges) + status_checks,
+                tuple(dict.fromkeys(DATA_KEYS + tuple(measurement_ranges) + tuple(status_ranges))),
+            ),
+            "status": (status_checks, ("status",) + tuple(status_ranges)),
+        }
+
+    def validate(self, topic, payload):
+        parts = topic.split('/')
+        if len(parts) != 4 or parts[0] != 'iot' or parts[1] != 'devices' or not parts[2]:
+            return None, f"invalid topic format: {topic}"
+
+        schema = self.schemas.get(parts[3])
+        if schema is None:
+            return None, f"unknown message type: {parts[3]}"
+        checks, any_of = schema
+
+        try:
+            data = json.loads(payload)
+        except (ValueError, UnicodeDecodeError) as e:
+            return None, f"invalid JSON: {e}"
+        if not isinstance(data, dict):
+            return None, "payload is not a JSON object"
+
+        if not any(key in data for key in any_of):
+            return None, f"no known fields, expected one of: {', '.join(any_of)}"
+
+        for key, low, high in checks:
+            value = data.get(key)
+            if value is None:
+                continue
+            try:
+                number = _to_number(value)
+            except (TypeError, ValueError):
+                return None, f"{key} is not numeric: {value!r}"
+            if (low is not None and number < low) or (high is not None and number > high):
+                return None, f"{key}={value} out of range [{low}, {high}]"
+
+        status = data.get("status")
+        if status is not None and status not in STATUS_VALUES:
+            return None, f"unknown status: {status!r}"
+
+        timestamp = data.get("timestamp")
+        if timestamp is not None and not isinstance(timestamp, str):
+            return None, f"timestamp is not a string: {timestamp!r}"
+
+        return data, None
+
+
+class DeadLetterSink:
+    """Keeps rejected messages, with the reason, in a local file and/or an MQTT topic.
+
+    The file uses the capture format plus a "reason" field, so fixed-up
+    dead letters can be fed back with replay.py.
+    """
+
+    def __init__(self, path=None, topic=None, client=None):
+        self.path = path
+        self.writer = None  # opened on the first dead letter
+        self.topic = topic
+        self.client = client
+        self.count = 0
+
+    def put(self, topic, payload, reason):
+        self.count += 1
+        print(f"🗑️ Dead letter ({reason}): {topic}")
+        if self.path:
+            if self.writer is None:
+                self.writer = CaptureWriter(self.path)
+            self.writer.write(topic, payload, extra={"reason": reason})
+        if self.topic and self.client is not None:
+            record = {
+                "t": round(time.time(), 6),
+                "topic": topic,
+                "payload": payload.decode('utf-8', errors='replace'),
+                "reason": reason
+            }
+            self.client.publish(self.topic, json.dumps(record))
+
+    def flush(self):
+        if self.writer is not None:
+            self.writer.flush()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
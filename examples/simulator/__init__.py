@@ -0,0 +1,7 @@
+"""
+Shared building blocks for the MQTT device simulators.
+
+Run from the examples/ directory, e.g.:
+    python -m simulator --help
+    python -m simulator engine --devices 10000 --interval 60 --dry-run
+"""
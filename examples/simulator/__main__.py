@@ -0,0 +1,61 @@
+"""
+One CLI for every simulator: python -m simulator <command> [options]
+
+Only the module of the chosen command is imported, so numpy, pyarrow and
+paho-mqtt load for the commands that use them and `--help` stays instant.
+
+    python -m simulator run --devices monitoring --monitor --excel device_data_log.xlsx
+    python -m simulator engine --devices 10000 --interval 60 --dry-run
+    python -m simulator run --help
+"""
+
+import importlib
+import sys
+
+# command -> (module, summary); grouped as device sets, fleets, scenarios, data and tools
+COMMANDS = {
+    "run": ("status_sim", "status/sensor simulator for a device set, with alerts, recording and Excel export"),
+    "engine": ("engine", "async fleet of template devices (call_at or timing wheel)"),
+    "sharded": ("sharded", "fleet split over worker processes"),
+    "sessions": ("sessions", "one MQTT session per device, with last wills"),
+    "loadgen": ("loadgen", "open-loop load at a fixed message rate"),
+    "responder": ("responder", "ESP32 command responder emulator"),
+    "scenario": ("scenario", "seeded AWLR scenario timelines"),
+    "trace": ("trace", "replay a recorded Excel log or capture"),
+    "backfill": ("backfill", "historical data as CSV / COPY / Postgres"),
+    "sensor-models": ("sensor_models", "physically shaped sensor series"),
+    "fleet-state": ("fleet_state", "vectorised fleet state benchmark"),
+    "events": ("events", "edge-triggered alert benchmark"),
+    "device-state": ("device_state", "bytes per device benchmark"),
+    "timing-wheel": ("timing_wheel", "timing wheel scheduler benchmark"),
+    "latency": ("latency_bench", "end-to-end latency benchmark"),
+}
+
+
+def print_usage():
+    print("usage: python -m simulator <command> [options]")
+    print("\ncommands:")
+    for command, (_, summary) in COMMANDS.items():
+        print(f"  {command:<15} {summary}")
+    print("\n`python -m simulator <command> --help` lists the options of a command.")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print_usage()
+        return 0
+    command = argv[0]
+    if command not in COMMANDS:
+        print(f"❌ Unknown command '{command}'\n")
+        print_usage()
+        return 2
+    module = importlib.import_module(f"{__package__}.{COMMANDS[command][0]}")
+    # The command's own argparse parser reads sys.argv
+    sys.argv = [f"python -m simulator {command}"] + argv[1:]
+    module.main()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+AWLR (water level + rain) scenario definitions and payload shapes.
+
+Kept free of heavy imports so python-mqtt-dummy/mqtt-dummy.py can use them
+without numpy; the compiled timelines live in scenario.py.
+"""
+
+from .payload_template import PayloadTemplate
+
+SCENARIOS = {
+    "NORMAL": {
+        "desc": "[OK] AMAN (Air Rendah, Cerah)",
+        "water_range": (5.0, 19.0),
+        "rain_range": (0.0, 0.0),
+        "batt_range": (80, 100)
+    },
+    "WASPADA": {
+        "desc": "[!] WASPADA (Air Sedang, Hujan Ringan)",
+        "water_range": (20.5, 39.5),
+        "rain_range": (1.0, 5.0),
+        "batt_range": (60, 80)
+    },
+    "BAHAYA": {
+        "desc": "[!!] BAHAYA (Banjir, Hujan Deras)",
+        "water_range": (41.0, 65.0),
+        "rain_range": (10.0, 20.0),
+        "batt_range": (40, 60)
+    },
+    "EXTREME_WEATHER": {
+        "desc": "[!!!] CUACA EKSTREM (Air Normal, Hujan Badai)",
+        "water_range": (10.0, 18.0),
+        "rain_range": (25.0, 50.0),
+        "batt_range": (10, 15)
+    }
+}
+SCENARIO_NAMES = list(SCENARIOS)
+
+# AWLR payload shapes; status and ota_update are constant for these devices
+SENSOR_TEMPLATE = PayloadTemplate([
+    ("ketinggian_air", "float"),
+    ("curah_hujan", "float"),
+    ("timestamp", "str"),
+])
+STATUS_TEMPLATE = PayloadTemplate([
+    ("status", "str"),
+    ("battery", "int"),
+    ("wifi_rssi", "int"),
+    ("uptime", "int"),
+    ("free_heap", "int"),
+    ("ota_update", "str"),
+    ("timestamp", "str"),
+], constants={"status": "online", "ota_update": "idle"})
+
+# Phases are (scenario, minutes, transition): "hold" draws from the scenario's
+# ranges, "ramp" moves the ranges linearly from the previous phase's scenario
+TIMELINES = {
+    "flood_event": [
+        ("NORMAL", 120, "hold"),
+        ("BAHAYA", 30, "ramp"),
+        ("BAHAYA", 60, "hold"),
+        ("WASPADA", 60, "ramp"),
+        ("NORMAL", 90, "ramp"),
+    ],
+    "storm": [
+        ("NORMAL", 60, "hold"),
+        ("EXTREME_WEATHER", 15, "ramp"),
+        ("EXTREME_WEATHER", 45, "hold"),
+        ("NORMAL", 30, "ramp"),
+    ],
+    "rising_alert": [
+        ("NORMAL", 60, "hold"),
+        ("WASPADA", 60, "ramp"),
+        ("WASPADA", 60, "hold"),
+        ("BAHAYA", 30, "ramp"),
+        ("BAHAYA", 60, "hold"),
+    ],
+}
+
+
+def parse_timeline(spec):
+    """A preset name, or phases like "NORMAL:120,BAHAYA~30" (":" hold, "~" ramp), in minutes"""
+    if spec in TIMELINES:
+        return list(TIMELINES[spec])
+    phases = []
+    for part in spec.split(","):
+        part = part.strip()
+        separator = "~" if "~" in part else ":"
+        scenario, _, minutes = part.partition(separator)
+        scenario = scenario.strip().upper()
+        if scenario not in SCENARIOS or not minutes:
+            raise ValueError(f"Invalid phase '{part}' (expected SCENARIO:minutes or SCENARIO~minutes)")
+        phases.append((scenario, float(minutes), "ramp" if separator == "~" else "hold"))
+    return phases
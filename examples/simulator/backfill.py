@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Historical backfill: months of synthetic sensor_readings rows per device.
+
+Rows have the same columns and `sensor_data` JSON shape that
+mqtt-data-handler inserts ({raw, calibrated, original}, default calibration
+a=1, b=0), so dashboards, alerts and exports can be tested against a
+realistic history without publishing it through MQTT first.
+
+    weather  SENSORS keys and value rules of telegram-testing/test-dummy-esp32garut.py
+    awlr     ketinggian_air + curah_hujan following AWLR scenario timelines
+             (NORMAL stretches with random flood_event / storm / rising_alert)
+    physical temperature, humidity, pressure, curah_hujan and ketinggian_air
+             from sensor_models.WeatherModel (diurnal cycle, storm cells
+             shared by every device, river hydrograph)
+    mixed    devices alternate between weather and awlr
+
+Each device is generated in chunks of `--chunk` readings and every chunk is
+rendered through one row format string compiled per device, so memory stays
+bounded no matter how long the history is. Devices are spread over
+`--workers` processes.
+
+    python -m simulator.backfill --devices 20 --days 90 --output backfill/
+    python -m simulator.backfill --format copy --days 180 --workers 4
+    python -m simulator.backfill --format postgres --dsn postgresql://postgres:...@db:5432/postgres
+"""
+
+import argparse
+import gzip
+import os
+import random
+import time
+from datetime import datetime, timezone
+from multiprocessing import Pool
+
+import numpy as np
+
+from .awlr import TIMELINES
+from .fleet import DEVICE_ID_PREFIX
+from .scenario import phase_ranges
+
+# measurementKeys of mqtt-data-handler, in the same order
+MEASUREMENT_KEYS = [
+    "temperature", "humidity", "pressure", "battery", "ketinggian_air", "curah_hujan",
+    "light", "o2", "co2", "ph", "arah_angin", "kecepatan_angin",
+]
+# Dedicated sensor_readings columns the handler fills besides sensor_data
+COLUMNS = [
+    "device_id", "temperature", "humidity", "pressure", "battery",
+    "ketinggian_air", "curah_hujan", "timestamp", "sensor_data",
+]
+
+# test-dummy-esp32garut.py: ph and kecepatan_angin are floats with one
+# decimal, everything else is an integer in the range
+SENSORS = {
+    "temperature": (0, 100),
+    "humidity": (0, 100),
+    "pressure": (0, 1023),
+    "co2": (0, 100),
+    "o2": (0, 100),
+    "light": (0, 100),
+    "curah_hujan": (0, 100),
+    "kecepatan_angin": (0, 10),
+    "arah_angin": (0, 360),
+    "ph": (0, 14),
+}
+FLOAT_SENSORS = {"ph", "kecepatan_angin"}
+
+PROFILES = {
+    "weather": [(key, "float" if key in FLOAT_SENSORS else "int") for key in SENSORS],
+    "awlr": [("ketinggian_air", "float"), ("curah_hujan", "float")],
+    "physical": [(key, "float") for key in ("temperature", "humidity", "pressure", "ketinggian_air", "curah_hujan")],
+}
+# Decimals per field for the physical profile
+PHYSICAL_DECIMALS = {"temperature": 1, "humidity": 1, "pressure": 1, "ketinggian_air": 2, "curah_hujan": 1}
+
+FORMATS = {
+    # (null token, file suffix, COPY options)
+    "csv": ("", ".csv", "FORMAT csv, HEADER true"),
+    "copy": ("\\N", ".tsv", "FORMAT text"),
+    "postgres": ("\\N", None, "FORMAT text"),
+}
+
+
+def row_format(device_id, fields, output):
+    """One %-format string per device producing a complete CSV / COPY text line.
+
+    Returns (format, order) where `order` lists the field names (or
+    "timestamp") in the positional order the format expects.
+    """
+    null = FORMATS[output][0]
+    slot = {key: "%d" if kind == "int" else "%r" for key, kind in fields}
+    # COPY text needs no quoting: values and JSON contain no tabs, newlines or backslashes
+    separator = "," if output == "csv" else "\t"
+
+    order = []
+    cells = [device_id]
+    for column in COLUMNS[1:-2]:
+        if column in slot:
+            cells.append(slot[column])
+            order.append(column)
+        else:
+            cells.append(null)
+    cells.append("%s+00:00")
+    order.append("timestamp")
+
+    def measurements():
+        parts = []
+        for key in MEASUREMENT_KEYS:
+            parts.append(f'"{key}": {slot.get(key, "null")}')
+            if key in slot:
+                order.append(key)
+        return "{" + ", ".join(parts) + "}"
+
+    raw = measurements()
+    calibrated = measurements()
+    original = ", ".join(f'"{key}": {slot[key]}' for key, _ in fields)
+    order.extend(key for key, _ in fields)
+    order.append("timestamp")
+    sensor_data = f'{{"raw": {raw}, "calibrated": {calibrated}, "original": {{{original}, "timestamp": "%s+00:00"}}}}'
+    if output == "csv":
+        sensor_data = '"' + sensor_data.replace('"', '""') + '"'
+    cells.append(sensor_data)
+    return separator.join(cells) + "\n", order
+
+
+def awlr_phases(total_minutes, rng):
+    """NORMAL stretches of 6-72 h broken up by random preset events, covering `total_minutes`"""
+    events = list(TIMELINES)
+    phases = []
+    covered = 0
+    while covered < total_minutes:
+        quiet = rng.uniform(6, 72) * 60
+        phases.append(("NORMAL", quiet, "hold"))
+        covered += quiet
+        # Presets open with their own NORMAL hold; keep the rest of the event
+        for phase in TIMELINES[rng.choice(events)][1:]:
+            phases.append(phase)
+            covered += phase[1]
+        if phases[-1][0] != "NORMAL":
+            phases.append(("NORMAL", 90, "ramp"))
+            covered += 90
+    return phases
+
+
+class DeviceHistory:
+    """Readings of one device, drawn chunk by chunk from a per-device stream"""
+
+    def __init__(self, device_id, profile, steps, step_seconds, seed, start_epoch=0, storm_seed=0):
+        self.device_id = device_id
+        self.profile = profile
+        self.fields = PROFILES[profile]
+        self.steps = steps
+        self.rng = np.random.default_rng(seed)
+        if profile == "awlr":
+            phase_rng = random.Random(int(self.rng.integers(2 ** 32)))
+            phases = awlr_phases(steps * step_seconds / 60, phase_rng)
+            bounds, _ = phase_ranges(phases, step_seconds)
+            self.water = tuple(bound[:steps] for bound in bounds["water_range"])
+            self.rain = tuple(bound[:steps] for bound in bounds["rain_range"])
+        elif profile == "physical":
+            from .sensor_models import StormCells, WeatherModel
+
+            # Same storm catalogue in every worker, so neighbouring devices share storms
+            storms = StormCells(start_epoch, steps * step_seconds, seed=storm_seed)
+            model = WeatherModel(1, start_epoch, steps, step_seconds, seed=self.rng.integers(2 ** 63), storms=storms)
+            self.series = {key: np.round(values[0], PHYSICAL_DECIMALS[key]) for key, values in model.generate().items()}
+
+    def chunk(self, start, stop):
+        """{field: list of values} for steps [start, stop)"""
+        count = stop - start
+        rng = self.rng
+        if self.profile == "physical":
+            return {key: values[start:stop].tolist() for key, values in self.series.items()}
+        if self.profile == "awlr":
+            (water_low, water_high), (rain_low, rain_high) = self.water, self.rain
+            water = water_low[start:stop] + rng.random(count) * (water_high[start:stop] - water_low[start:stop])
+            rain = rain_low[start:stop] + rng.random(count) * (rain_high[start:stop] - rain_low[start:stop])
+            return {"ketinggian_air": np.round(water, 2).tolist(), "curah_hujan": np.round(rain, 1).tolist()}
+        values = {}
+        for key, kind in self.fields:
+            low, high = SENSORS[key]
+            if kind == "float":
+                values[key] = np.round(rng.uniform(low, high, count), 1).tolist()
+            else:
+                values[key] = rng.integers(low, high, count, endpoint=True).tolist()
+        return values
+
+
+def timestamps(start_epoch, step_seconds, first, stop):
+    seconds = start_epoch + np.arange(first, stop, dtype="i8") * step_seconds
+    return np.datetime_as_string(seconds.astype("datetime64[s]"), unit="s").tolist()
+
+
+def render_chunks(task):
+    """Yield (rows, text) chunks for one device"""
+    history = DeviceHistory(
+        task["device_id"], task["profile"], task["steps"], task["step_seconds"], task["seed"],
+        start_epoch=task["start_epoch"], storm_seed=task["storm_seed"],
+    )
+    line, order = row_format(task["device_id"], history.fields, task["format"])
+    for start in range(0, task["steps"], task["chunk"]):
+        stop = min(start + task["chunk"], task["steps"])
+        values = history.chunk(start, stop)
+        values["timestamp"] = timestamps(task["start_epoch"], task["step_seconds"], start, stop)
+        # The same list appears several times in `columns`; zip walks each independently
+        columns = [values[name] for name in order]
+        yield stop - start, "".join([line % row for row in zip(*columns)])
+
+
+def write_device(task):
+    """Worker: write one device's history to its own file (or COPY it into Postgres)"""
+    rows = written = 0
+    if task["format"] == "postgres":
+        import io
+
+        import psycopg2  # only needed for direct inserts
+
+        copy = f"COPY sensor_readings ({', '.join(COLUMNS)}) FROM STDIN WITH ({FORMATS['postgres'][2]})"
+        with psycopg2.connect(task["dsn"]) as connection, connection.cursor() as cursor:
+            for count, text in render_chunks(task):
+                cursor.copy_expert(copy, io.StringIO(text))
+                rows += count
+                written += len(text)
+        return task["device_id"], rows, written
+
+    path = os.path.join(task["output"], task["device_id"] + FORMATS[task["format"]][1])
+    if task["gzip"]:
+        path += ".gz"
+    opener = gzip.open if task["gzip"] else open
+    with opener(path, "wt", encoding="utf-8", newline="") as handle:
+        if task["format"] == "csv":
+            handle.write(",".join(COLUMNS) + "\n")
+        for count, text in render_chunks(task):
+            handle.write(text)
+            rows += count
+            written += len(text)
+    return task["device_id"], rows, written
+
+
+def build_tasks(args):
+    device_ids = args.device_id or [
+        f"{DEVICE_ID_PREFIX}{index:012d}" for index in range(1, args.devices + 1)
+    ]
+    start = datetime.fromisoformat(args.start).replace(tzinfo=timezone.utc)
+    start_epoch = int(start.timestamp())
+    steps = int(args.days * 86400 // args.interval)
+    # Device i's history depends only on (seed, i), whatever the worker count
+    seeds = np.random.SeedSequence(args.seed).spawn(len(device_ids))
+    tasks = []
+    for index, device_id in enumerate(device_ids):
+        profile = args.profile if args.profile != "mixed" else ("weather", "awlr")[index % 2]
+        tasks.append({
+            "device_id": device_id, "profile": profile, "steps": steps, "step_seconds": args.interval,
+            "start_epoch": start_epoch, "seed": seeds[index], "storm_seed": args.seed, "chunk": args.chunk,
+            "format": args.format, "output": args.output, "gzip": args.gzip, "dsn": args.dsn,
+        })
+    return tasks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate historical sensor_readings rows for backfilling")
+    parser.add_argument("--devices", type=int, default=10, help="number of virtual devices (default 10)")
+    parser.add_argument("--device-id", action="append", default=[],
+                        help="use this device id instead of generated ones; repeatable (ids must exist in devices)")
+    parser.add_argument("--profile", choices=["weather", "awlr", "physical", "mixed"], default="mixed",
+                        help="device kind (default mixed: alternate weather and awlr)")
+    parser.add_argument("--days", type=float, default=90, help="history length in days (default 90)")
+    parser.add_argument("--start", default="2025-01-01T00:00:00", help="first reading, UTC (default 2025-01-01T00:00:00)")
+    parser.add_argument("--interval", type=int, default=60, help="seconds between readings (default 60)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default 0)")
+    parser.add_argument("--format", choices=list(FORMATS), default="csv",
+                        help="csv / copy (PostgreSQL COPY text files) / postgres (COPY straight into --dsn)")
+    parser.add_argument("--output", default="backfill", help="output folder for csv/copy files (default backfill/)")
+    parser.add_argument("--gzip", action="store_true", help="gzip the output files")
+    parser.add_argument("--dsn", default=os.getenv("DATABASE_URL"), help="PostgreSQL DSN for --format postgres (default $DATABASE_URL)")
+    parser.add_argument("--chunk", type=int, default=20000, help="readings rendered per chunk (default 20000)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    if args.format == "postgres":
+        if not args.dsn:
+            parser.error("--format postgres needs --dsn or DATABASE_URL")
+        try:
+            import psycopg2  # noqa: F401
+        except ImportError:
+            parser.error("--format postgres needs psycopg2 (pip install psycopg2-binary)")
+    else:
+        os.makedirs(args.output, exist_ok=True)
+
+    tasks = build_tasks(args)
+    total_rows = len(tasks) * tasks[0]["steps"] if tasks else 0
+    print(f"🗄️  Backfill: {len(tasks)} devices × {args.days:g} days every {args.interval}s "
+          f"= {total_rows:,} rows ({args.format}, {args.workers} workers)")
+
+    rows = written = 0
+    start = time.perf_counter()
+    with Pool(args.workers) as pool:
+        for done, (device_id, device_rows, device_bytes) in enumerate(pool.imap_unordered(write_device, tasks), 1):
+            rows += device_rows
+            written += device_bytes
+            elapsed = time.perf_counter() - start
+            print(f"   [{done}/{len(tasks)}] {device_id}: {device_rows:,} rows | "
+                  f"total {rows:,} | {rows / elapsed * 60 / 1e6:.2f} M rows/min")
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {rows:,} rows, {written / 1e6:.1f} MB in {elapsed:.1f}s ({rows / elapsed * 60 / 1e6:.2f} M rows/min)")
+    if args.format != "postgres":
+        suffix = FORMATS[args.format][1]
+        source = f"PROGRAM 'gunzip -c file{suffix}.gz'" if args.gzip else f"'file{suffix}'"
+        print(f"📥 Load with psql, per file in {args.output}/:")
+        print(f"   \\copy sensor_readings ({', '.join(COLUMNS)}) FROM {source} WITH ({FORMATS[args.format][2]})")
+
+
+if __name__ == "__main__":
+    main()
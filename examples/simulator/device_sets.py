@@ -0,0 +1,228 @@
+"""
+Named device sets for DeviceStatusSimulator.
+
+The hand-written DEVICES lists of the simulator scripts live here, so the
+scripts and `python -m simulator run --devices <set>` share them. Every
+call returns fresh DeviceRecords; "fleet:<N>" generates N devices from
+fleet.DEVICE_TEMPLATE instead.
+"""
+
+from .device_state import device_records
+from .fleet import make_fleet
+
+DEVICE_SETS = {
+    # device-status-dummy/mqtt_device_status.py
+    "status": [
+        {
+            "id": "086e7e43-9a40-437e-8ffd-fc029aa86d9a",
+            "name": "AWLR",
+            "status": "online",
+            "battery": 85,
+            "wifi_rssi": -65,
+            "uptime": 3600,
+            "free_heap": 123456
+        },
+        {
+            "id": "2d6ea74e-3235-435e-8e4f-e6965f1ce2e1",
+            "name": "ESP32-Weather",
+            "status": "online",
+            "battery": 72,
+            "wifi_rssi": -58,
+            "uptime": 7200,
+            "free_heap": 98765
+        },
+        {
+            "id": "34168ffc-17fe-4a79-bec9-7b3386700cf9",
+            "name": "ESP32",
+            "status": "online",
+            "battery": 90,
+            "wifi_rssi": -45,
+            "uptime": 14400,
+            "free_heap": 145000
+        },
+        {
+            "id": "65cef40a-5e73-4602-8d46-e93e694db47f",
+            "name": "Weather Station 2",
+            "status": "offline",
+            "battery": 45,
+            "wifi_rssi": -78,
+            "uptime": 1800,
+            "free_heap": 87654
+        },
+        {
+            "id": "ab74435f-1ff7-45b3-a2bf-67b8a8bcc87e",
+            "name": "ESP32-LoRa",
+            "status": "online",
+            "battery": 68,
+            "wifi_rssi": -62,
+            "uptime": 5400,
+            "free_heap": 112000
+        },
+        {
+            "id": "f2b0150e-9e05-4ec1-b95f-82126b16e158",
+            "name": "Weather Station",
+            "status": "online",
+            "battery": 78,
+            "wifi_rssi": -55,
+            "uptime": 9000,
+            "free_heap": 134000
+        }
+    ],
+    # telegram-testing/test-dummy-all-sensor.py: low batteries, weak WiFi and a device without sensors to trip every alert
+    "monitoring": [
+        {
+            "id": "ff0920f2-95ee-42e6-a2a3-64df3f804942",
+            "name": "ESP32-Firebase Test",
+            "status": "online",
+            "battery": 100,
+            "wifi_rssi": -70,
+            "uptime": 0,
+            "free_heap": 120000,
+            "ota_update": None
+        },
+        {
+            "id": "086e7e43-9a40-437e-8ffd-fc029aa86d9a",
+            "name": "AWLR",
+            "status": "online",
+            "battery": 85,
+            "wifi_rssi": -86,
+            "uptime": 5280,
+            "free_heap": 94000,
+            "ota_update": "updating"
+        },
+        {
+            "id": "5cef40a-5e73-4602-8d46-e93e694db47f",
+            "name": "Weather Station 2",
+            "status": "online",
+            "battery": 5,
+            "wifi_rssi": -95,
+            "uptime": 2040,
+            "free_heap": 79000,
+            "ota_update": "updating"
+        },
+        {
+            "id": "f2b0150e-9e05-4ec1-b95f-82126b16e158",
+            "name": "Weather Station",
+            "status": "online",
+            "battery": 5,
+            "wifi_rssi": -100,
+            "uptime": 9420,
+            "free_heap": 125000,
+            "ota_update": None
+        },
+        {
+            "id": "2d6ea74e-3235-435e-8e4f-e6965f1ce2e1",
+            "name": "ESP32-Weather",
+            "status": "online",
+            "battery": 5,
+            "wifi_rssi": -100,
+            "uptime": 7440,
+            "free_heap": 90000,
+            "ota_update": "available"
+        },
+        {
+            "id": "ab74435f-1ff7-45b3-a2bf-67b8a8bcc87e",
+            "name": "ESP32-LoRa",
+            "status": "online",
+            "battery": 5,
+            "wifi_rssi": -95,
+            "uptime": 5580,
+            "free_heap": 98000,
+            "ota_update": "updating"
+        },
+        {
+            "id": "34168ffc-17fe-4a79-bec9-7b3386700cf9",
+            "name": "ESP32",
+            "status": "online",
+            "battery": 5,
+            "wifi_rssi": -99,
+            "uptime": 14760,
+            "free_heap": 133000,
+            "ota_update": "up_to_date"
+        },
+        {
+            "id": "00000000-0000-4000-a000-000000000001",
+            "name": "Test Device 0001",
+            "status": "online",
+            "battery": 100,
+            "wifi_rssi": None,
+            "uptime": 0,
+            "free_heap": None,
+            "ota_update": None
+        },
+        {
+            "id": "00000000-0000-4000-a000-000000000002",
+            "name": "Test Device 0002",
+            "status": "online",
+            "battery": 5,
+            "wifi_rssi": -85,
+            "uptime": 3600,
+            "free_heap": 8000,
+            "ota_update": None
+        }
+    ],
+    # telegram-testing/test-dummy-all-sensor-edit.py
+    "low-battery": [
+        {
+            "id": "2d6ea74e-3235-435e-8e4f-e6965f1ce2e1",
+            "name": "ESP32-Weather",
+            "status": "online",
+            "battery": 8,
+            "wifi_rssi": -91,
+            "uptime": 7200,
+            "free_heap": 98765
+        },
+        {
+            "id": "34168ffc-17fe-4a79-bec9-7b3386700cf9",
+            "name": "ESP32",
+            "status": "online",
+            "battery": 90,
+            "wifi_rssi": -45,
+            "uptime": 14400,
+            "free_heap": 145000
+        },
+        {
+            "id": "65cef40a-5e73-4602-8d46-e93e694db47f",
+            "name": "Weather Station 2",
+            "status": "offline",
+            "battery": 5,
+            "wifi_rssi": -78,
+            "uptime": 1800,
+            "free_heap": 87654
+        },
+        {
+            "id": "ab74435f-1ff7-45b3-a2bf-67b8a8bcc87e",
+            "name": "ESP32-LoRa",
+            "status": "online",
+            "battery": 6,
+            "wifi_rssi": -62,
+            "uptime": 5400,
+            "free_heap": 112000
+        },
+        {
+            "id": "f2b0150e-9e05-4ec1-b95f-82126b16e158",
+            "name": "Weather Station",
+            "status": "online",
+            "battery": 78,
+            "wifi_rssi": -100,
+            "uptime": 9000,
+            "free_heap": 134000
+        }
+    ],
+}
+
+# Status walk each set was written for (status_sim.STATUS_WALKS)
+DEFAULT_WALKS = {
+    "status": "steady",
+    "monitoring": "drain",
+    "low-battery": "low-battery",
+}
+
+
+def device_set(name, seed=None):
+    """DeviceRecords for a named set, or `fleet:<N>` template-generated devices"""
+    if name.startswith("fleet:"):
+        return device_records(make_fleet(int(name.split(":", 1)[1]), seed=seed))
+    if name not in DEVICE_SETS:
+        raise ValueError(f"Unknown device set '{name}' (use {', '.join(DEVICE_SETS)} or fleet:<N>)")
+    return device_records(DEVICE_SETS[name])
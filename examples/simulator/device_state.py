@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Compact device state shared by the simulators.
+
+DeviceRecord replaces the per-device dicts of the hand-written DEVICES
+lists: a fixed set of __slots__ fields, coerced to their types on
+construction, with wifi_rssi / free_heap / ota_update / scenario nullable.
+It still answers device["battery"] so code that indexes by key keeps
+working, but hot loops read and write attributes.
+
+DeviceTable is the same state for large fleets, kept in a
+fleet_state.FleetState (one 15-byte structured row per device: uint8
+battery, int16 RSSI, uint32 uptime and heap, validity masks for the
+nullable ones) and stepped for the whole fleet at once. Generated fleets
+derive ids and names from the index instead of storing them. NumPy is
+imported by DeviceTable only, so DeviceRecord users start without it.
+
+    python -m simulator.device_state --bench --count 1000000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from .fleet import DEVICE_TEMPLATE, make_fleet
+
+def optional_int(value):
+    return None if value is None else int(value)
+
+
+def optional_str(value):
+    return None if value is None else str(value)
+
+
+class DeviceRecord:
+    """One device's state: typed fields, nullable sensors, dict-style access for old code"""
+    __slots__ = ("id", "name", "status", "battery", "wifi_rssi", "uptime", "free_heap", "ota_update", "scenario")
+
+    def __init__(self, id, name="", status="online", battery=100, wifi_rssi=None, uptime=0,
+                 free_heap=None, ota_update=None, scenario=None):
+        self.id = str(id)
+        self.name = str(name)
+        self.status = str(status)
+        self.battery = int(battery)
+        self.wifi_rssi = optional_int(wifi_rssi)
+        self.uptime = int(uptime)
+        self.free_heap = optional_int(free_heap)
+        self.ota_update = optional_str(ota_update)
+        self.scenario = optional_str(scenario)
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __repr__(self):
+        return f"DeviceRecord({self.id!r}, {self.name!r}, status={self.status!r}, battery={self.battery})"
+
+
+def device_records(devices):
+    """DeviceRecords from the dict literals of a DEVICES list"""
+    return [DeviceRecord(**device) for device in devices]
+
+
+class DeviceTable:
+    """DeviceRecord view of a fleet_state.FleetState: row i is device i.
+
+    The status arrays, ids and random walk are FleetState's; the table adds
+    names, DeviceRecord snapshots and event columns.
+    """
+
+    # Event field -> FleetState validity mask
+    MASKS = {"wifi_rssi": "has_wifi", "free_heap": "has_heap"}
+
+    def __init__(self, state, names=None):
+        self.state = state
+        # Explicit names; None means derived from the index
+        self.names = names
+
+    def __len__(self):
+        return len(self.state)
+
+    @property
+    def status(self):
+        return self.state.status
+
+    @property
+    def nbytes(self):
+        return self.state.nbytes
+
+    @classmethod
+    def generate(cls, count, template=None, seed=None, start_index=1):
+        """Fleet drawn from a make_fleet template ((min, max) ranges per field), vectorised"""
+        from .fleet_state import FleetState
+
+        return cls(FleetState.from_template(count, template, seed=seed, start_index=start_index))
+
+    @classmethod
+    def from_records(cls, records):
+        """Table holding the state of DeviceRecords (or DEVICES dicts)"""
+        from .fleet_state import FleetState
+
+        records = [record if isinstance(record, DeviceRecord) else DeviceRecord(**record) for record in records]
+        return cls(FleetState.from_devices(records), names=[record.name for record in records])
+
+    def device_id(self, index):
+        return self.state.device_id(index)
+
+    def device_name(self, index):
+        if self.names is not None:
+            return self.names[index]
+        return DEVICE_TEMPLATE["name"].format(index=self.state.start_index + index)
+
+    def record(self, index):
+        """DeviceRecord snapshot of row `index`"""
+        from .fleet_state import OTA_VALUES
+
+        row = self.status[index]
+        return DeviceRecord(
+            self.device_id(index), self.device_name(index),
+            status="online" if row["online"] else "offline",
+            battery=row["battery"],
+            wifi_rssi=row["wifi_rssi"] if row["has_wifi"] else None,
+            uptime=row["uptime"],
+            free_heap=row["free_heap"] if row["has_heap"] else None,
+            ota_update=OTA_VALUES[row["ota_update"]],
+        )
+
+    def step_status(self, rng=None, offline_chance=0.05):
+        """fleet.simulate_device_offline + generate_device_status for every device at once"""
+        self.state.step(offline_chance, sensors=False, rng=rng)
+
+    def event_columns(self, fields):
+        """{field: float64 array} for EventEngine.evaluate, NaN where a sensor is missing"""
+        import numpy as np
+
+        columns = {}
+        for field in fields:
+            values = self.status[field].astype(np.float64)
+            mask = self.MASKS.get(field)
+            columns[field] = values if mask is None else np.where(self.status[mask], values, np.nan)
+        return columns
+
+
+def measure(build):
+    """(object, bytes allocated while building it)"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, size
+
+
+def benchmark(count, seed=0):
+    import numpy as np
+
+    print(f"📦 Device state for {count:,} devices (tracemalloc)")
+    print(f"   {'layout':<44} {'total MB':>10} {'bytes/device':>13}")
+    results = []
+
+    dicts, size = measure(lambda: make_fleet(count, seed=seed))
+    results.append(("dict (make_fleet, ids/names stored)", size))
+    del dicts
+
+    records, size = measure(lambda: [DeviceRecord(**device) for device in make_fleet(count, seed=seed)])
+    results.append(("DeviceRecord (ids/names stored)", size))
+    del records
+
+    table, size = measure(lambda: DeviceTable.from_records(make_fleet(count, seed=seed)))
+    results.append(("DeviceTable.from_records (ids/names stored)", size))
+    del table
+
+    table, size = measure(lambda: DeviceTable.generate(count, seed=seed))
+    results.append(("DeviceTable.generate (ids/names derived)", size))
+    for name, size in results:
+        print(f"   {name:<44} {size / 1e6:>10.1f} {size / count:>13.1f}")
+
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    table.step_status(rng)
+    print(f"   DeviceTable.step_status: {(time.perf_counter() - start) * 1000:.1f} ms for the whole fleet")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory per device of the simulator device layouts")
+    parser.add_argument("--bench", action="store_true", help="measure bytes per device for dicts, records and arrays")
+    parser.add_argument("--count", type=int, default=1000000, help="fleet size to measure (default 1000000)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default 0)")
+    args = parser.parse_args()
+    if not args.bench:
+        parser.print_help()
+        return
+    benchmark(args.count, args.seed)
+
+
+if __name__ == "__main__":
+    main()
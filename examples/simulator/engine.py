@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Async fleet simulation engine.
+
+Every virtual device fires on its own period and phase, scheduled with
+loop.call_at() on a single asyncio event loop, so thousands of devices cost
+one timer entry each instead of a thread or a sleep per device.
+
+    python -m simulator.engine --devices 10000 --interval 60 --dry-run
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from . import fleet
+from .faults import FaultInjector, add_fault_arguments
+from .transport import NullTransport, PahoTransport, add_broker_arguments, broker_options
+
+
+class EngineStats:
+    """Counters for one reporting window (and the whole run)"""
+
+    def __init__(self):
+        self.ticks = 0
+        self.published = 0
+        self.failed = 0
+        self.bytes = 0
+        self.max_lag = 0.0
+        self.missed = 0  # device ticks due before the deadline that never fired
+
+    def add(self, other):
+        self.ticks += other.ticks
+        self.published += other.published
+        self.failed += other.failed
+        self.bytes += other.bytes
+        self.max_lag = max(self.max_lag, other.max_lag)
+        self.missed += other.missed
+
+
+def missed_ticks(due_times, periods, end_time):
+    """Device ticks scheduled before `end_time` from each device's next due time on"""
+    return sum(
+        int((end_time - due) // period) + 1
+        for due, period in zip(due_times, periods) if due < end_time
+    )
+
+
+class AsyncFleetEngine:
+    """Schedules every device on its own period and phase from one event loop.
+
+    step(device) returns the (topic, payload) messages for one device cycle;
+    publish(topic, payload) sends one and returns True on success. A device
+    may carry its own "period" in seconds, otherwise `period` is used.
+    """
+
+    def __init__(self, devices, step, publish, period=60, report_interval=10, seed=None):
+        self.devices = devices
+        self.step = step
+        self.publish = publish
+        self.period = period
+        self.report_interval = report_interval
+        self.rng = random.Random(seed)
+
+        self.periods = [device.get("period", period) for device in devices]
+        # Random phases spread each device's first fire over its period
+        self.phases = [self.rng.uniform(0, p) for p in self.periods]
+        self.handles = [None] * len(devices)
+        self.next_due = [0.0] * len(devices)
+        self.window = EngineStats()
+        self.total = EngineStats()
+        self.running = False
+        self.loop = None
+        self.start_time = None
+        self.end_time = None
+
+    @property
+    def target_rate(self):
+        """Target device ticks per second across the fleet"""
+        return sum(1.0 / p for p in self.periods)
+
+    def _fire(self, index, cycle):
+        if not self.running:
+            return
+        now = self.loop.time()
+        if self.end_time is not None and now >= self.end_time:
+            # Overloaded past the deadline: the tick and its successors count as missed
+            return
+        scheduled = self.start_time + self.phases[index] + cycle * self.periods[index]
+        lag = now - scheduled
+        window = self.window
+        if lag > window.max_lag:
+            window.max_lag = lag
+
+        window.ticks += 1
+        for topic, payload in self.step(self.devices[index]):
+            if self.publish(topic, payload):
+                window.published += 1
+                window.bytes += len(payload)
+            else:
+                window.failed += 1
+
+        # Anchor to the start time so the schedule never drifts, whatever the lag
+        self.next_due[index] = scheduled + self.periods[index]
+        self.handles[index] = self.loop.call_at(self.next_due[index], self._fire, index, cycle + 1)
+
+    def report(self, elapsed):
+        window = self.window
+        self.total.add(window)
+        self.window = EngineStats()
+        print(
+            f"⏱️  {time.strftime('%H:%M:%S')} | devices {len(self.devices)} | "
+            f"target {self.target_rate:.1f} ticks/s | achieved {window.ticks / elapsed:.1f} ticks/s | "
+            f"{window.published / elapsed:.1f} msg/s | failed {window.failed} | "
+            f"max lag {window.max_lag * 1000:.1f} ms"
+        )
+
+    async def run(self, duration=None):
+        """Run until `duration` seconds have passed (or forever when None)"""
+        self.loop = asyncio.get_running_loop()
+        self.start_time = self.loop.time()
+        self.running = True
+
+        end_time = self.end_time = None if duration is None else self.start_time + duration
+        for index in range(len(self.devices)):
+            self.next_due[index] = self.start_time + self.phases[index]
+            self.handles[index] = self.loop.call_at(self.next_due[index], self._fire, index, 0)
+
+        last_report = self.start_time
+        try:
+            while end_time is None or self.loop.time() < end_time:
+                timeout = self.report_interval
+                if end_time is not None:
+                    timeout = min(timeout, end_time - self.loop.time())
+                await asyncio.sleep(max(timeout, 0))
+                now = self.loop.time()
+                if now - last_report >= self.report_interval or (end_time is not None and now >= end_time):
+                    self.report(now - last_report)
+                    last_report = now
+        finally:
+            self.running = False
+            for handle in self.handles:
+                if handle is not None:
+                    handle.cancel()
+            if end_time is not None:
+                self.window.missed = missed_ticks(self.next_due, self.periods, end_time)
+            self.total.add(self.window)
+            self.window = EngineStats()
+
+        elapsed = self.loop.time() - self.start_time
+        self.print_summary(elapsed)
+        return self.total
+
+    def print_summary(self, elapsed):
+        total = self.total
+        achieved = total.ticks / elapsed if elapsed > 0 else 0
+        print("=" * 60)
+        print(f"📊 {len(self.devices)} devices over {elapsed:.1f}s")
+        print(f"   Target rate:   {self.target_rate:.1f} ticks/s")
+        print(f"   Achieved rate: {achieved:.1f} ticks/s ({total.published / elapsed if elapsed > 0 else 0:.1f} msg/s)")
+        print(f"   Published: {total.published} | Failed: {total.failed} | Bytes: {total.bytes}")
+        print(f"   Max schedule lag: {total.max_lag * 1000:.1f} ms")
+        if total.missed:
+            print(f"   Missed ticks: {total.missed} (due before the deadline, engine could not keep up)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a fleet of virtual devices from one asyncio event loop")
+    parser.add_argument("--devices", type=int, default=10000, help="number of virtual devices (default 10000)")
+    parser.add_argument("--interval", type=float, default=60, help="publish period per device in seconds (default 60)")
+    parser.add_argument("--duration", type=float, default=None, help="run time in minutes (default: until Ctrl+C)")
+    parser.add_argument("--report", type=float, default=10, help="stats report interval in seconds (default 10)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for the fleet and phases")
+    parser.add_argument("--dry-run", action="store_true", help="generate messages without publishing to a broker")
+    parser.add_argument("--scheduler", choices=("call_at", "wheel"), default="call_at",
+                        help="per-device loop.call_at timers, or one hashed timing wheel (default call_at)")
+    parser.add_argument("--mix", default=None,
+                        help="per-device periods from profiles, e.g. weather:0.2,awlr:0.5,lora:0.2,sleepy:0.1 (implies --scheduler wheel)")
+    add_fault_arguments(parser)
+    add_broker_arguments(parser)
+    args = parser.parse_args()
+
+    devices = fleet.make_fleet(args.devices, seed=args.seed)
+    if args.mix:
+        from .timing_wheel import assign_profiles, parse_mix
+
+        args.scheduler = "wheel"
+        assign_profiles(devices, parse_mix(args.mix), seed=args.seed)
+    transport = NullTransport() if args.dry_run else PahoTransport(**broker_options(args))
+    rng = random.Random(args.seed)
+    step = lambda device: fleet.device_step(device, rng)
+    injector = None
+    if args.fault:
+        injector = FaultInjector(args.fault, devices, step, transport.publish, seed=args.seed)
+        step = injector.wrap_step(step)
+
+    if args.scheduler == "wheel":
+        from .timing_wheel import WheelFleetEngine
+
+        engine_class = WheelFleetEngine
+    else:
+        engine_class = AsyncFleetEngine
+    engine = engine_class(
+        devices,
+        step=step,
+        publish=transport.publish,
+        period=args.interval,
+        report_interval=args.report,
+        seed=args.seed
+    )
+
+    if args.mix:
+        print(f"🚀 Simulating {args.devices} devices with profile mix {args.mix}")
+    else:
+        print(f"🚀 Simulating {args.devices} devices, one cycle every {args.interval}s each")
+    print("Press Ctrl+C to stop")
+    print("=" * 60)
+    duration = None if args.duration is None else args.duration * 60
+
+    async def run():
+        if injector is not None:
+            injector.start()
+        try:
+            await engine.run(duration)
+        finally:
+            if injector is not None:
+                injector.stop()
+                injector.print_summary()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("\n🛑 Simulation stopped by user")
+    finally:
+        transport.close()
+
+
+if __name__ == "__main__":
+    main()
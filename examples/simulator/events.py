@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Edge-triggered device events with hysteresis, evaluated for a whole fleet per tick.
+
+A condition (battery low, weak WiFi, ...) is a state per device: it enters
+when the value crosses the threshold and exits only once the value is back
+beyond the threshold plus a hysteresis band, so a reading hovering around
+the line does not flap. Each tick compares one array per field against every
+condition in a handful of NumPy operations and reports only the devices
+whose state changed; a condition that keeps holding stays silent.
+
+    engine = EventEngine(conditions_from_thresholds(THRESHOLDS, HYSTERESIS), len(DEVICES))
+    for transition in engine.evaluate(device_columns(DEVICES, engine.fields)):
+        ...
+
+    python -m simulator.events --devices 100000 --ticks 60
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+# THRESHOLDS key -> (device field, direction); "below" enters when value < threshold
+THRESHOLD_FIELDS = {
+    "battery_critical": ("battery", "below"),
+    "battery_low": ("battery", "below"),
+    "wifi_weak": ("wifi_rssi", "below"),
+    "memory_low": ("free_heap", "below"),
+}
+# Messages per field; exits append " (recovered)"
+MESSAGES = {
+    "battery": "Battery level {value}%",
+    "wifi_rssi": "WiFi RSSI {value} dBm",
+    "free_heap": "Free memory {value} bytes",
+}
+
+
+class Condition:
+    """Enters when `field` crosses `enter`, exits when it crosses back past `exit`"""
+    __slots__ = ("key", "field", "below", "enter", "exit")
+
+    def __init__(self, key, field, below, enter, exit):
+        self.key = key
+        self.field = field
+        self.below = below
+        self.enter = enter
+        self.exit = exit
+
+
+class Transition:
+    """A condition entering or exiting for one device.
+
+    `escalated` marks an exit that is a hand-off to a more severe tier of
+    the same level (low -> critical): the value got worse, not better.
+    """
+    __slots__ = ("index", "condition", "entered", "value", "escalated")
+
+    def __init__(self, index, condition, entered, value, escalated=False):
+        self.index = index
+        self.condition = condition
+        self.entered = entered
+        self.value = value
+        self.escalated = escalated
+
+    @property
+    def key(self):
+        return self.condition.key
+
+    def message(self):
+        if self.condition.field == "online":
+            return "Device is online" if self.entered else "Device is offline"
+        value = self.value
+        if value == value and float(value).is_integer():
+            value = int(value)
+        text = MESSAGES.get(self.condition.field, self.condition.field + " {value}").format(value=value)
+        if self.escalated:
+            return text + " (escalated)"
+        return text if self.entered else text + " (recovered)"
+
+
+def conditions_from_thresholds(thresholds, hysteresis=None, connected_key="device_connected"):
+    """Conditions for a THRESHOLDS dict, plus the online/offline edge under `connected_key`.
+
+    `hysteresis` maps a THRESHOLDS key to the band the value must clear
+    before the condition exits (default 0: exit as soon as it is back).
+    """
+    hysteresis = hysteresis or {}
+    conditions = []
+    for key, threshold in thresholds.items():
+        field, direction = THRESHOLD_FIELDS[key]
+        band = hysteresis.get(key, 0)
+        below = direction == "below"
+        conditions.append(Condition(key, field, below, threshold, threshold + band if below else threshold - band))
+    if connected_key:
+        # online is 1.0 / 0.0: enters above 0.5, exits at or below it
+        conditions.append(Condition(connected_key, "online", False, 0.5, 0.5))
+    return conditions
+
+
+def device_columns(devices, fields):
+    """{field: float64 array} from device dicts or DeviceRecords; None becomes NaN, "online" is 1.0 / 0.0"""
+    count = len(devices)
+    columns = {}
+    for field in fields:
+        if field == "online":
+            columns[field] = np.fromiter((device["status"] == "online" for device in devices), np.float64, count)
+        else:
+            columns[field] = np.fromiter(
+                (np.nan if device[field] is None else device[field] for device in devices), np.float64, count
+            )
+    return columns
+
+
+class EventEngine:
+    """Per-device condition state; evaluate() returns only enter / exit transitions.
+
+    Unknown values (NaN, e.g. a device without WiFi RSSI) neither enter nor
+    exit a condition. Conditions on the same field and direction are tiers
+    of one level (battery_low / battery_critical): only the most severe tier
+    that holds is active, so a device at 8% raises "critical" alone and
+    moves back to "low" once critical clears. A milder tier that is handed
+    off to a severer one exits with `escalated` set.
+    """
+
+    def __init__(self, conditions, count):
+        self.conditions = list(conditions)
+        self.fields = sorted({condition.field for condition in self.conditions})
+        # Hysteresis state of each condition on its own, and the reported (tiered) state
+        self.holding = np.zeros((len(self.conditions), count), dtype=bool)
+        self.active = np.zeros((len(self.conditions), count), dtype=bool)
+        # Rows of the more severe tiers of each condition
+        self.severer = [
+            [
+                other for other, tier in enumerate(self.conditions)
+                if tier.field == condition.field and tier.below == condition.below
+                and (tier.enter < condition.enter if condition.below else tier.enter > condition.enter)
+            ]
+            for condition in self.conditions
+        ]
+        self.evaluations = 0
+
+    def evaluate(self, columns):
+        """Compare every condition against the fleet's `columns`; returns [Transition, ...]"""
+        self.evaluations += 1
+        for row, condition in enumerate(self.conditions):
+            values = columns[condition.field]
+            holding = self.holding[row]
+            # NaN compares False both ways, so unknown readings leave the state alone
+            if condition.below:
+                holding |= values < condition.enter
+                holding &= ~(values >= condition.exit)
+            else:
+                holding |= values > condition.enter
+                holding &= ~(values <= condition.exit)
+
+        transitions = []
+        for row, condition in enumerate(self.conditions):
+            active = self.holding[row]
+            if self.severer[row]:
+                active = active & ~self.holding[self.severer[row]].any(axis=0)
+            changed = active ^ self.active[row]
+            if not changed.any():
+                continue
+            self.active[row] = active
+            values = columns[condition.field]
+            holding = self.holding[row]
+            for index in np.flatnonzero(changed):
+                entered = bool(active[index])
+                # Still holding on its own but no longer active: a severer tier took over
+                escalated = not entered and bool(holding[index])
+                transitions.append(Transition(int(index), condition, entered, values[index], escalated))
+        return transitions
+
+    def active_count(self, key):
+        for row, condition in enumerate(self.conditions):
+            if condition.key == key:
+                return int(self.active[row].sum())
+        raise KeyError(key)
+
+
+def benchmark(devices, ticks, seed=0):
+    """Alerts and evaluation time: per-cycle level checks vs edge-triggered transitions"""
+    thresholds = {"battery_critical": 10, "battery_low": 20, "wifi_weak": -80, "memory_low": 10000}
+    hysteresis = {"battery_critical": 3, "battery_low": 3, "wifi_weak": 3, "memory_low": 2000}
+    rng = np.random.default_rng(seed)
+    columns = {
+        "battery": rng.integers(5, 100, devices).astype(np.float64),
+        "wifi_rssi": rng.integers(-100, -45, devices).astype(np.float64),
+        "free_heap": rng.integers(5000, 150000, devices).astype(np.float64),
+        "online": (rng.random(devices) < 0.95).astype(np.float64),
+    }
+    engine = EventEngine(conditions_from_thresholds(thresholds, hysteresis), devices)
+    level_alerts = transitions = 0
+    elapsed = 0.0
+    for _ in range(ticks):
+        # Random walks like generate_device_status, plus 5% online/offline flips
+        columns["battery"] = np.clip(columns["battery"] + rng.integers(-3, 1, devices), 0, 100)
+        columns["wifi_rssi"] = np.clip(columns["wifi_rssi"] + rng.integers(-5, 6, devices), -100, -30)
+        columns["free_heap"] = np.maximum(columns["free_heap"] + rng.integers(-5000, 3001, devices), 0)
+        flips = rng.random(devices) < 0.05
+        columns["online"] = np.where(flips, 1.0 - columns["online"], columns["online"])
+        # What check_events used to append every cycle
+        level_alerts += int(
+            (columns["battery"] < 20).sum() + (columns["wifi_rssi"] < -80).sum()
+            + (columns["free_heap"] < 10000).sum() + (columns["online"] > 0.5).sum()
+        )
+        start = time.perf_counter()
+        transitions += len(engine.evaluate(columns))
+        elapsed += time.perf_counter() - start
+    print(f"🔔 {devices} devices × {ticks} ticks")
+    print(f"   level-triggered alerts: {level_alerts:,} ({level_alerts / ticks:,.0f} per tick)")
+    print(f"   edge-triggered:         {transitions:,} ({transitions / ticks:,.0f} per tick, "
+          f"{level_alerts / max(transitions, 1):.1f}x fewer)")
+    print(f"   evaluation: {elapsed / ticks * 1000:.2f} ms per tick ({elapsed / ticks / devices * 1e9:.0f} ns per device)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare level-triggered alerts with the edge-triggered event engine")
+    parser.add_argument("--devices", type=int, default=100000, help="fleet size (default 100000)")
+    parser.add_argument("--ticks", type=int, default=60, help="status cycles to simulate (default 60)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default 0)")
+    args = parser.parse_args()
+    benchmark(args.devices, args.ticks, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+Scripted fault scenarios for fleet-scale events.
+
+Each fault has a start offset, a duration and a rate, and is written on the
+command line as  name:start=SECONDS,duration=SECONDS,rate=FRACTION[,param=value]
+
+    region_drop  a `rate` share of the fleet drops at once; when the fault ends
+                 every affected device reconnects within `reconnect` seconds
+    backlog      a `rate` share of the fleet is offline and buffers its
+                 readings; afterwards the backlog is replayed at `replay_rate`
+                 messages/s (0 = as fast as possible), original timestamps kept
+    clock_skew   a `rate` share of the fleet stamps payloads `skew` seconds off
+    duplicates   each message is re-sent `copies` extra times with probability `rate`
+
+    python -m simulator.engine --devices 10000 --interval 30 --dry-run \\
+        --fault region_drop:start=60,duration=30,rate=0.25,reconnect=5 \\
+        --fault duplicates:start=120,duration=20,rate=0.1,copies=3
+"""
+
+import asyncio
+import json
+import random
+import re
+from collections import deque
+from datetime import datetime, timedelta
+
+from .payload_template import json_value
+
+LWT_PAYLOAD = json.dumps({"status": "offline"})
+_TIMESTAMP = re.compile(r'"timestamp": "([^"]+)"')
+
+
+def shift_timestamp(payload, seconds):
+    """Move the payload's "timestamp" by `seconds`, keeping its ISO style"""
+    def shift(match):
+        text = match.group(1)
+        zulu = text.endswith("Z")
+        moved = datetime.fromisoformat(text[:-1] if zulu else text) + timedelta(seconds=seconds)
+        return '"timestamp": ' + json_value(moved.isoformat() + ("Z" if zulu else ""))
+    return _TIMESTAMP.sub(shift, payload, count=1)
+
+
+class Fault:
+    """A fault active from `start` to `start + duration` seconds into the run"""
+
+    name = None
+    params = {}
+
+    def __init__(self, start, duration, rate, **params):
+        self.start = float(start)
+        self.duration = float(duration)
+        self.rate = float(rate)
+        for key, default in self.params.items():
+            setattr(self, key, type(default)(params.pop(key, default)))
+        if params:
+            raise ValueError(f"Unknown parameters for {self.name}: {', '.join(params)}")
+        self.started = False
+        self.ended = False
+        self.devices = []
+
+    @property
+    def end(self):
+        return self.start + self.duration
+
+    def describe(self):
+        extra = "".join(f", {key}={getattr(self, key)}" for key in self.params)
+        return f"{self.name} at {self.start:g}s for {self.duration:g}s (rate {self.rate:g}{extra})"
+
+    def pick_devices(self, injector):
+        # Devices already down because of another fault are left to that fault
+        candidates = [device for device in injector.devices if device["id"] not in injector.offline]
+        count = min(round(self.rate * len(injector.devices)), len(candidates))
+        self.devices = injector.rng.sample(candidates, count)
+        return self.devices
+
+    def begin(self, injector):
+        pass
+
+    def finish(self, injector):
+        pass
+
+
+class RegionDrop(Fault):
+    name = "region_drop"
+    params = {"reconnect": 5.0}
+
+    def begin(self, injector):
+        devices = self.pick_devices(injector)
+        injector.take_offline(devices)
+        print(f"💥 region_drop: {len(devices)} devices dropped")
+
+    def finish(self, injector):
+        injector.bring_online(self.devices, self.reconnect)
+        print(f"🔁 region_drop: {len(self.devices)} devices reconnecting within {self.reconnect:g}s")
+
+
+class BacklogOutage(Fault):
+    name = "backlog"
+    params = {"replay_rate": 0.0, "reconnect": 2.0, "max_backlog": 1000}
+
+    def begin(self, injector):
+        devices = self.pick_devices(injector)
+        for device in devices:
+            injector.backlog[device["id"]] = deque(maxlen=self.max_backlog)
+        injector.take_offline(devices)
+        print(f"💥 backlog: {len(devices)} devices offline, buffering readings")
+
+    def finish(self, injector):
+        injector.bring_online(self.devices, self.reconnect)
+        messages = []
+        for device in self.devices:
+            messages.extend(injector.backlog.pop(device["id"], ()))
+        print(f"🔁 backlog: replaying {len(messages)} buffered readings after {self.reconnect:g}s")
+        injector.spawn(injector.replay(messages, self.replay_rate, delay=self.reconnect))
+
+
+class ClockSkew(Fault):
+    name = "clock_skew"
+    params = {"skew": 3600.0}
+
+    def begin(self, injector):
+        devices = self.pick_devices(injector)
+        for device in devices:
+            injector.skew[device["id"]] = self.skew
+        print(f"💥 clock_skew: {len(devices)} devices {self.skew:+g}s off")
+
+    def finish(self, injector):
+        for device in self.devices:
+            injector.skew.pop(device["id"], None)
+        print(f"✅ clock_skew: {len(self.devices)} devices back on time")
+
+
+class BurstDuplicates(Fault):
+    name = "duplicates"
+    params = {"copies": 1}
+
+    def begin(self, injector):
+        injector.duplicates.append(self)
+        print(f"💥 duplicates: {self.rate:.0%} of messages re-sent {self.copies}x")
+
+    def finish(self, injector):
+        injector.duplicates.remove(self)
+        print("✅ duplicates: stopped")
+
+
+FAULT_TYPES = {fault.name: fault for fault in (RegionDrop, BacklogOutage, ClockSkew, BurstDuplicates)}
+
+
+def parse_fault(spec):
+    """"region_drop:start=60,duration=30,rate=0.2,reconnect=5" -> RegionDrop"""
+    name, _, options = spec.partition(":")
+    if name not in FAULT_TYPES:
+        raise ValueError(f"Unknown fault '{name}' (choose from {', '.join(FAULT_TYPES)})")
+    params = {}
+    for option in filter(None, options.split(",")):
+        key, separator, value = option.partition("=")
+        if not separator:
+            raise ValueError(f"Invalid fault option '{option}' (expected key=value)")
+        params[key.strip()] = value.strip()
+    missing = [key for key in ("start", "duration", "rate") if key not in params]
+    if missing:
+        raise ValueError(f"Fault '{name}' needs {', '.join(missing)}")
+    return FAULT_TYPES[name](**params)
+
+
+class FaultInjector:
+    """Applies faults to a fleet's step function and publishes the side effects.
+
+    wrap_step() filters what devices send while a fault is active; messages
+    a fault creates on its own (LWT, reconnect bursts, backlog replays) go
+    through `publish`. With a SessionMultiplexer the drops are real: sessions
+    are cut without DISCONNECT, so the broker fires their last will.
+    """
+
+    def __init__(self, faults, devices, step, publish, mux=None, seed=None):
+        self.faults = sorted(faults, key=lambda fault: fault.start)
+        self.devices = devices
+        self.step = step
+        self.publish = publish
+        self.mux = mux
+        if mux is not None:
+            mux.on_session_connect = self._session_connected
+        self.rng = random.Random(seed)
+
+        self.offline = set()
+        self.reconnecting = set()
+        self.backlog = {}
+        self.skew = {}
+        self.duplicates = []
+        self.tasks = set()
+        self.counts = {"dropped": 0, "buffered": 0, "replayed": 0, "skewed": 0, "duplicated": 0, "emitted": 0, "failed": 0}
+        self.loop = None
+        self.task = None
+
+    def wrap_step(self, step):
+        def faulty_step(device):
+            messages = step(device)
+            device_id = device["id"]
+            if device_id in self.offline:
+                buffer = self.backlog.get(device_id)
+                if buffer is not None:
+                    readings = [message for message in messages if message[0].endswith("/data")]
+                    buffer.extend(readings)
+                    self.counts["buffered"] += len(readings)
+                return []
+            skew = self.skew.get(device_id)
+            if skew is not None:
+                messages = [(topic, shift_timestamp(payload, skew)) for topic, payload in messages]
+                self.counts["skewed"] += len(messages)
+            for fault in self.duplicates:
+                copies = [message for message in messages if self.rng.random() < fault.rate]
+                messages.extend(copies * fault.copies)
+                self.counts["duplicated"] += len(copies) * fault.copies
+            return messages
+        return faulty_step
+
+    def _emit(self, topic, payload):
+        if self.publish(topic, payload):
+            self.counts["emitted"] += 1
+        else:
+            self.counts["failed"] += 1
+
+    def take_offline(self, devices):
+        ids = [device["id"] for device in devices]
+        self.offline.update(ids)
+        self.counts["dropped"] += len(ids)
+        if self.mux is not None:
+            self.mux.drop(ids)
+        else:
+            # What the broker would publish for each cut session
+            for device_id in ids:
+                self._emit(f"iot/devices/{device_id}/status", LWT_PAYLOAD)
+
+    def bring_online(self, devices, within):
+        if self.mux is not None:
+            # Status and reading go out once each session's CONNACK arrives
+            self.reconnecting.update(device["id"] for device in devices)
+            self.mux.restore([device["id"] for device in devices], within)
+            return
+        for device in devices:
+            self.loop.call_later(self.rng.uniform(0, within), self._reconnected, device)
+
+    def _session_connected(self, device):
+        if device["id"] in self.reconnecting:
+            self.reconnecting.discard(device["id"])
+            self._reconnected(device)
+
+    def _reconnected(self, device):
+        self.offline.discard(device["id"])
+        # Devices send status and a fresh reading right after reconnecting
+        for topic, payload in self.step(device):
+            self._emit(topic, payload)
+
+    async def replay(self, messages, rate, delay=0):
+        await asyncio.sleep(delay)
+        start = self.loop.time()
+        for index, (topic, payload) in enumerate(messages):
+            if rate > 0:
+                wait = start + index / rate - self.loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            elif index % 1000 == 999:
+                await asyncio.sleep(0)  # let the rest of the fleet run
+            if self.publish(topic, payload):
+                self.counts["replayed"] += 1
+            else:
+                self.counts["failed"] += 1
+
+    def spawn(self, coroutine):
+        task = asyncio.ensure_future(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+        for fault in self.faults:
+            print(f"🧪 Fault scheduled: {fault.describe()}")
+        self.task = asyncio.ensure_future(self._run(self.loop.time()))
+
+    async def _run(self, start_time):
+        while not all(fault.ended for fault in self.faults):
+            elapsed = self.loop.time() - start_time
+            for fault in self.faults:
+                if not fault.started and elapsed >= fault.start:
+                    fault.started = True
+                    fault.begin(self)
+                if fault.started and not fault.ended and elapsed >= fault.end:
+                    fault.ended = True
+                    fault.finish(self)
+            await asyncio.sleep(0.1)
+
+    def stop(self):
+        for task in [self.task, *self.tasks]:
+            if task is not None:
+                task.cancel()
+
+    def print_summary(self):
+        counts = self.counts
+        print(
+            f"🧪 Faults: dropped {counts['dropped']} devices | buffered {counts['buffered']} | "
+            f"replayed {counts['replayed']} | skewed {counts['skewed']} | duplicated {counts['duplicated']} | "
+            f"emitted {counts['emitted']} | failed {counts['failed']}"
+        )
+
+
+def add_fault_arguments(parser):
+    parser.add_argument(
+        "--fault", action="append", default=[], type=parse_fault, metavar="NAME:start=S,duration=S,rate=R",
+        help=f"inject a fault ({', '.join(FAULT_TYPES)}); repeatable"
+    )
@@ -0,0 +1,85 @@
+import random
+from datetime import datetime, timezone
+
+from .payload_template import SENSOR_TEMPLATE, STATUS_TEMPLATE
+
+# Template for generated virtual devices. Tuples are (min, max) ranges drawn
+# per device, strings are formatted with the device index, anything else is
+# copied as-is. Keys mirror the hand-written DEVICES lists.
+DEVICE_TEMPLATE = {
+    "name": "Virtual Device {index:05d}",
+    "status": "online",
+    "battery": (60, 100),
+    "wifi_rssi": (-90, -45),
+    "uptime": (0, 86400),
+    "free_heap": (80000, 150000),
+    "ota_update": None,
+}
+
+# Same id layout as the "Test Device 0001" entries in test-dummy-all-sensor.py
+DEVICE_ID_PREFIX = "00000000-0000-4000-a000-"
+
+
+def make_fleet(count, template=None, seed=None, start_index=1):
+    """Generate `count` device dicts from a template"""
+    template = DEVICE_TEMPLATE if template is None else template
+    rng = random.Random(seed)
+    devices = []
+    for index in range(start_index, start_index + count):
+        device = {"id": f"{DEVICE_ID_PREFIX}{index:012d}"}
+        for key, value in template.items():
+            if isinstance(value, tuple):
+                device[key] = rng.randint(*value)
+            elif isinstance(value, str):
+                device[key] = value.format(index=index)
+            else:
+                device[key] = value
+        devices.append(device)
+    return devices
+
+
+def generate_sensor_data(device, rng=random):
+    """Random weather readings, same shape as DeviceStatusSimulator.generate_sensor_data"""
+    return {
+        "temperature": round(rng.uniform(20, 35), 1),
+        "humidity": round(rng.uniform(40, 80), 1),
+        "pressure": round(rng.uniform(1000, 1020), 1),
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
+
+def generate_device_status(device, rng=random):
+    """Step the device's random walks and return its status payload"""
+    device["battery"] = max(10, min(100, device["battery"] + rng.randint(-2, 1)))
+    if device["wifi_rssi"] is not None:
+        device["wifi_rssi"] = max(-100, min(-30, device["wifi_rssi"] + rng.randint(-10, 10)))
+    device["uptime"] += rng.randint(60, 300)
+    if device["free_heap"] is not None:
+        device["free_heap"] = max(50000, device["free_heap"] + rng.randint(-10000, 5000))
+
+    return {
+        "status": device["status"],
+        "battery": device["battery"],
+        "wifi_rssi": device["wifi_rssi"],
+        "uptime": device["uptime"],
+        "free_heap": device["free_heap"],
+        "ota_update": rng.choice(["available", "up_to_date", "updating", None]),
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
+
+def simulate_device_offline(device, rng=random, chance=0.05):
+    """Flip online/offline with a small probability; returns True when it flipped"""
+    if rng.random() < chance:
+        device["status"] = "offline" if device["status"] == "online" else "online"
+        return True
+    return False
+
+
+def device_step(device, rng=random):
+    """One device cycle: maybe flip status, then status (+ sensor data when online)"""
+    simulate_device_offline(device, rng)
+    messages = [(f"iot/devices/{device['id']}/status", STATUS_TEMPLATE.render_mapping(generate_device_status(device, rng)))]
+    if device["status"] == "online":
+        messages.append((f"iot/devices/{device['id']}/data", SENSOR_TEMPLATE.render_mapping(generate_sensor_data(device, rng))))
+    return messages
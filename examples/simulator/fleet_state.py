@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Vectorized fleet state for large simulations.
+
+Status fields and sensor values of the whole fleet live in NumPy structured
+arrays, and one step() call advances every device's random walks and
+clamps at once, instead of one dict and a handful of random.randint() calls
+per device.
+
+This is a benchmark and the storage behind device_state.DeviceTable, not
+the state the publishing simulators run on: engine, sharded and loadgen
+fire devices one at a time on their own schedules and still step
+per-device dicts (fleet.device_step).
+
+    python -m simulator.fleet_state --devices 100000 --ticks 5
+"""
+
+import argparse
+import itertools
+import json
+import random
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from . import fleet
+from .payload_template import STATUS_FIELDS, PayloadTemplate, json_value
+
+OTA_VALUES = [None, "available", "up_to_date", "updating", "idle"]
+# step() draws from the first four, like fleet.generate_device_status
+STEP_OTA_VALUES = 4
+
+# 15 bytes per device
+STATUS_DTYPE = np.dtype([
+    ("battery", "u1"),
+    ("wifi_rssi", "i2"),
+    ("uptime", "u4"),
+    ("free_heap", "u4"),
+    ("online", "?"),
+    ("ota_update", "u1"),   # index into OTA_VALUES
+    ("has_wifi", "?"),      # False where the device reports wifi_rssi = None
+    ("has_heap", "?"),      # False where the device reports free_heap = None
+])
+
+# (min, max, decimals), same ranges as fleet.generate_sensor_data
+SENSOR_RANGES = {
+    "temperature": (20, 35, 1),
+    "humidity": (40, 80, 1),
+    "pressure": (1000, 1020, 1),
+}
+
+
+class FleetState:
+    """Status and sensor state for a whole fleet, one array row per device.
+
+    `ids` is a list of device id strings, or None for a generated fleet
+    whose ids are derived from the row (same format as fleet.make_fleet).
+    Sensor values and topic strings are only allocated once something
+    steps sensors or renders messages.
+    """
+
+    def __init__(self, ids, status, sensor_ranges=None, seed=None, start_index=1):
+        self.ids = None if ids is None else list(ids)
+        self.status = status
+        self.start_index = start_index
+        self.sensor_ranges = SENSOR_RANGES if sensor_ranges is None else sensor_ranges
+        self.sensors = None
+        self.rng = np.random.default_rng(seed)
+        self.topics = {}
+
+        # One status template per payload shape: devices without wifi_rssi or
+        # free_heap get a literal null baked in instead of a slot
+        fields = [(key, "int" if key in ("wifi_rssi", "free_heap") else kind) for key, kind in STATUS_FIELDS]
+        self.status_templates = {}
+        for has_wifi in (True, False):
+            for has_heap in (True, False):
+                constants = {}
+                if not has_wifi:
+                    constants["wifi_rssi"] = None
+                if not has_heap:
+                    constants["free_heap"] = None
+                self.status_templates[has_wifi, has_heap] = PayloadTemplate(fields, constants)
+        self.sensor_template = PayloadTemplate([(key, "float") for key in self.sensor_ranges] + [("timestamp", "str")])
+
+    def __len__(self):
+        return len(self.status)
+
+    @property
+    def nbytes(self):
+        return self.status.nbytes + (0 if self.sensors is None else self.sensors.nbytes)
+
+    def device_id(self, index):
+        if self.ids is not None:
+            return self.ids[index]
+        return f"{fleet.DEVICE_ID_PREFIX}{self.start_index + index:012d}"
+
+    def topic_list(self, kind):
+        """["iot/devices/<id>/<kind>", ...] for every row, built on first use"""
+        topics = self.topics.get(kind)
+        if topics is None:
+            topics = self.topics[kind] = [f"iot/devices/{self.device_id(i)}/{kind}" for i in range(len(self))]
+        return topics
+
+    def sensor_array(self):
+        if self.sensors is None:
+            self.sensors = np.zeros(len(self), dtype=[(key, "f8") for key in self.sensor_ranges])
+        return self.sensors
+
+    @classmethod
+    def from_devices(cls, devices, **kwargs):
+        """Pack DEVICES dicts or DeviceRecords (None wifi_rssi/free_heap allowed), one column at a time"""
+        status = np.zeros(len(devices), dtype=STATUS_DTYPE)
+        status["battery"] = [device["battery"] for device in devices]
+        status["uptime"] = [device["uptime"] for device in devices]
+        status["online"] = [device["status"] == "online" for device in devices]
+        status["ota_update"] = [OTA_VALUES.index(device.get("ota_update")) for device in devices]
+        for key, mask in (("wifi_rssi", "has_wifi"), ("free_heap", "has_heap")):
+            values = [device.get(key) for device in devices]
+            status[key] = [0 if value is None else value for value in values]
+            status[mask] = [value is not None for value in values]
+        return cls([str(device["id"]) for device in devices], status, **kwargs)
+
+    @classmethod
+    def from_template(cls, count, template=None, seed=None, start_index=1, **kwargs):
+        """Vectorized counterpart of fleet.make_fleet"""
+        template = fleet.DEVICE_TEMPLATE if template is None else template
+        rng = np.random.default_rng(seed)
+        status = np.zeros(count, dtype=STATUS_DTYPE)
+        for key in ("battery", "wifi_rssi", "uptime", "free_heap"):
+            value = template[key]
+            if isinstance(value, tuple):
+                status[key] = rng.integers(value[0], value[1], count, endpoint=True)
+            elif value is not None:
+                status[key] = value
+        status["has_wifi"] = template["wifi_rssi"] is not None
+        status["has_heap"] = template["free_heap"] is not None
+        status["online"] = template["status"] == "online"
+        status["ota_update"] = OTA_VALUES.index(template["ota_update"])
+        return cls(None, status, seed=seed, start_index=start_index, **kwargs)
+
+    def step(self, offline_chance=0.05, sensors=True, rng=None):
+        """Advance every device by one cycle, mirroring fleet.generate_device_status.
+
+        `sensors=False` steps the status walk only; `rng` overrides the state's generator.
+        """
+        n = len(self)
+        rng = self.rng if rng is None else rng
+        status = self.status
+
+        flip = rng.random(n) < offline_chance
+        status["online"] ^= flip
+
+        status["battery"] = np.clip(status["battery"] + rng.integers(-2, 2, n), 10, 100)
+        wifi = np.clip(status["wifi_rssi"] + rng.integers(-10, 11, n), -100, -30)
+        status["wifi_rssi"] = np.where(status["has_wifi"], wifi, 0)
+        status["uptime"] += rng.integers(60, 301, n, dtype=np.uint32)
+        heap = np.maximum(status["free_heap"] + rng.integers(-10000, 5001, n), 50000)
+        status["free_heap"] = np.where(status["has_heap"], heap, 0)
+        status["ota_update"] = rng.integers(0, STEP_OTA_VALUES, n)
+
+        if sensors:
+            values = self.sensor_array()
+            for key, (low, high, decimals) in self.sensor_ranges.items():
+                values[key] = np.round(rng.uniform(low, high, n), decimals)
+        return flip
+
+    def messages(self, timestamp=None):
+        """(topic, payload) pairs for one tick: status for all, data for online devices"""
+        timestamp = datetime.now(timezone.utc).isoformat() if timestamp is None else timestamp
+        status = self.status
+        ota_text = np.array([json_value(value) for value in OTA_VALUES], dtype=object)
+        messages = []
+
+        for (has_wifi, has_heap), template in self.status_templates.items():
+            rows = np.nonzero((status["has_wifi"] == has_wifi) & (status["has_heap"] == has_heap))[0]
+            if len(rows) == 0:
+                continue
+            selected = status[rows]
+            # Whole columns become Python lists once; per-element numpy access is slow
+            columns = {
+                "status": np.where(selected["online"], "online", "offline").tolist(),
+                "battery": selected["battery"].tolist(),
+                "wifi_rssi": selected["wifi_rssi"].tolist(),
+                "uptime": selected["uptime"].tolist(),
+                "free_heap": selected["free_heap"].tolist(),
+                "ota_update": ota_text[selected["ota_update"]].tolist(),
+                "timestamp": itertools.repeat(timestamp),
+            }
+            payloads = template.render_many([columns[key] for key in template.keys])
+            status_topics = self.topic_list("status")
+            messages.extend(zip([status_topics[i] for i in rows.tolist()], payloads))
+
+        rows = np.nonzero(status["online"])[0]
+        sensors = self.sensor_array()[rows]
+        columns = [sensors[key].tolist() for key in self.sensor_ranges] + [itertools.repeat(timestamp)]
+        payloads = self.sensor_template.render_many(columns)
+        data_topics = self.topic_list("data")
+        messages.extend(zip([data_topics[i] for i in rows.tolist()], payloads))
+        return messages
+
+    def publish_tick(self, publish):
+        """Step the fleet and publish one tick; returns (published, failed)"""
+        self.step()
+        published = failed = 0
+        for topic, payload in self.messages():
+            if publish(topic, payload):
+                published += 1
+            else:
+                failed += 1
+        return published, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vectorized fleet state against per-device dicts")
+    parser.add_argument("--devices", type=int, default=100000, help="fleet size (default 100000)")
+    parser.add_argument("--ticks", type=int, default=5, help="ticks to time (default 5)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    args = parser.parse_args()
+
+    print(f"🧮 Fleet state benchmark: {args.devices} devices, {args.ticks} ticks")
+    print("=" * 60)
+
+    devices = fleet.make_fleet(args.devices, seed=args.seed)
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        for device in devices:
+            fleet.simulate_device_offline(device, rng)
+            fleet.generate_device_status(device, rng)
+            if device["status"] == "online":
+                fleet.generate_sensor_data(device, rng)
+    per_tick_dicts = (time.perf_counter() - start) / args.ticks
+    print(f"🐢 Per-device dicts:   {per_tick_dicts * 1000:9.1f} ms/tick (state + values)")
+
+    state = FleetState.from_devices(devices, seed=args.seed)
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        state.step()
+    per_tick_step = (time.perf_counter() - start) / args.ticks
+    print(f"🚀 Vectorized step:    {per_tick_step * 1000:9.1f} ms/tick (state + values)")
+
+    start = time.perf_counter()
+    messages = state.messages()
+    serialize = time.perf_counter() - start
+
+    # json.dumps of the same payloads; dict construction is left out of the timing
+    dicts = [json.loads(payload) for _, payload in messages]
+    start = time.perf_counter()
+    dumped = [json.dumps(data) for data in dicts]
+    serialize_json = time.perf_counter() - start
+    assert dumped == [payload for _, payload in messages], "template output differs from json.dumps"
+    print(f"📦 json.dumps:         {serialize_json * 1000:9.1f} ms/tick ({len(messages)} messages)")
+    print(f"📦 Payload templates:  {serialize * 1000:9.1f} ms/tick (byte-identical)")
+    print(f"   Speed-up on state + values: {per_tick_dicts / per_tick_step:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
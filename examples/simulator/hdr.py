@@ -0,0 +1,138 @@
+import math
+
+
+class HdrHistogram:
+    """Log-linear latency histogram in the style of HdrHistogram.
+
+    Values are integers (microseconds here) recorded with `significant_digits`
+    of precision over the whole range: every power-of-two band is split into
+    the same number of linear sub-buckets, so 1 ms and 10 s are both resolved
+    to about 0.1% with 3 digits.
+
+    With `highest_value` the bucket list has a fixed length (larger values
+    are recorded as `highest_value`), so histograms can live in fixed-size
+    rows such as shared memory and be rebuilt with add_counts().
+    """
+
+    def __init__(self, significant_digits=3, highest_value=None):
+        self.significant_digits = significant_digits
+        self.sub_bucket_bits = math.ceil(math.log2(2 * 10 ** significant_digits))
+        self.sub_bucket_count = 1 << self.sub_bucket_bits
+        self.half_count = self.sub_bucket_count >> 1
+        self.highest_value = highest_value
+        size = self.sub_bucket_count if highest_value is None else self.bucket(int(highest_value)) + 1
+        self.counts = [0] * size
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self.sum = 0
+
+    def bucket(self, value):
+        """Index of the bucket holding integer `value`"""
+        if value < self.sub_bucket_count:
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits
+        return self.sub_bucket_count + (shift - 1) * self.half_count + (value >> shift) - self.half_count
+
+    def _highest_equivalent(self, index):
+        if index < self.sub_bucket_count:
+            return index
+        offset = index - self.sub_bucket_count
+        shift = offset // self.half_count + 1
+        sub_bucket = offset % self.half_count + self.half_count
+        return ((sub_bucket + 1) << shift) - 1
+
+    def record(self, value, count=1):
+        value = max(int(value), 0)
+        if self.highest_value is not None:
+            value = min(value, self.highest_value)
+        index = self.bucket(value)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += count
+        self.total += count
+        self.sum += value * count
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+    def add_counts(self, counts):
+        """Add raw bucket counts (a list, or {index: count}) from a histogram with the same layout.
+
+        Exact values are gone, so sum, min and max use each bucket's highest value.
+        """
+        items = counts.items() if isinstance(counts, dict) else enumerate(counts)
+        for index, count in items:
+            index = int(index)
+            if not count:
+                continue
+            if index >= len(self.counts):
+                self.counts.extend([0] * (index + 1 - len(self.counts)))
+            value = self._highest_equivalent(index)
+            self.counts[index] += count
+            self.total += count
+            self.sum += value * count
+            self.max = max(self.max, value)
+            self.min = value if self.min is None else min(self.min, value)
+
+    def bucket_counts(self):
+        """{index: count} of the non-empty buckets, cheap to pickle"""
+        return {index: count for index, count in enumerate(self.counts) if count}
+
+    def merge(self, other):
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    @property
+    def mean(self):
+        return self.sum / self.total if self.total else 0.0
+
+    @property
+    def stddev(self):
+        if not self.total:
+            return 0.0
+        mean = self.mean
+        variance = sum(
+            count * (self._highest_equivalent(index) - mean) ** 2
+            for index, count in enumerate(self.counts) if count
+        ) / self.total
+        return math.sqrt(variance)
+
+    def percentile(self, percent):
+        if self.total == 0:
+            return 0
+        rank = max(1, math.ceil(percent / 100 * self.total))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._highest_equivalent(index), self.max)
+        return self.max
+
+    def percentile_distribution(self, scale=1000.0, ticks_per_half=5):
+        """Text in HdrHistogram's .hgrm layout (values divided by `scale`, i.e. us -> ms)"""
+        lines = [f"{'Value':>12} {'Percentile':>14} {'TotalCount':>10} {'1/(1-Percentile)':>14}", ""]
+        if self.total:
+            percent = 0.0
+            while True:
+                value = self.percentile(percent)
+                rank = max(1, math.ceil(percent / 100 * self.total))
+                inverse = "inf" if percent >= 100 else f"{1 / (1 - percent / 100):14.2f}"
+                lines.append(f"{value / scale:12.3f} {percent / 100:14.12f} {rank:10d} {inverse:>14}")
+                if percent >= 100:
+                    break
+                # Halve the remaining distance to 100% in `ticks_per_half` steps, like HdrHistogram
+                remaining = 100 - percent
+                half_step = 2 ** math.floor(math.log2(100 / remaining)) if remaining > 0 else 1
+                percent = min(100.0, percent + 50 / half_step / ticks_per_half)
+                if 100 - percent < 100 / self.total:
+                    percent = 100.0
+        lines.append(f"#[Mean    = {self.mean / scale:12.3f}, StdDeviation   = {self.stddev / scale:12.3f}]")
+        lines.append(f"#[Max     = {self.max / scale:12.3f}, Total count    = {self.total:12d}]")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+End-to-end latency benchmark: publish -> broker -> mqtt_bridge.py -> HTTP sink.
+
+Messages are published on a fixed open-loop schedule and every payload's
+"timestamp" is its intended send time. A local stand-in for the
+mqtt-data-handler Edge Function records when each message arrives, so
+latency is measured from when the message *should* have been sent: a
+publisher or bridge that stalls cannot hide the messages queued behind the
+stall (coordinated omission). Latency from the actual send time is reported
+next to it for comparison.
+
+Each offered load writes an HdrHistogram-style .hgrm file; the summary shows
+where throughput stops keeping up or the tail explodes (the knee).
+
+    python -m simulator.latency_bench --rates 50,100,200,400,800 --duration 30
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import fleet
+from .hdr import HdrHistogram
+from .payload_template import SENSOR_TEMPLATE
+from .transport import PahoTransport, add_broker_arguments, broker_options
+
+BRIDGE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mqtt-to-supabase", "mqtt_bridge.py")
+SINK_PATH = "/functions/v1/mqtt-data-handler"
+KNEE_THROUGHPUT = 0.95   # achieved / offered below this means the pipeline fell behind
+KNEE_TAIL_FACTOR = 10    # or p99 this many times the lightest load's p99
+
+
+class SinkHandler(BaseHTTPRequestHandler):
+    """Answers like mqtt-data-handler: {topic, payload} in, 200 {"success": true} out"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        arrived = time.time()
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            request = json.loads(body)
+            topic = request["topic"]
+            parts = topic.split("/")
+            if len(parts) != 4 or parts[0] != "iot" or parts[1] != "devices":
+                raise ValueError("Invalid topic format")
+            payload = json.loads(request["payload"])
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(400, {"error": str(e)})
+            return
+
+        self.server.arrivals.append((topic, payload.get("timestamp"), arrived))
+        if self.server.delay > 0:
+            time.sleep(self.server.delay)
+        self._reply(200, {"success": True, "message": "Data processed successfully"})
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_sink(port, delay_ms):
+    server = ThreadingHTTPServer(("127.0.0.1", port), SinkHandler)
+    server.daemon_threads = True
+    server.arrivals = []
+    server.delay = delay_ms / 1000
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_bridge(args, sink_url, log_path):
+    """Run the real bridge against the local broker, forwarding to the sink"""
+    env = dict(os.environ)
+    env.update({
+        "MQTT_BROKER": args.broker,
+        "MQTT_PORT": str(args.port),
+        "MQTT_USERNAME": args.username or "",
+        "MQTT_PASSWORD": args.password or "",
+        "MQTT_TRANSPORT": args.transport,
+        "EDGE_FUNCTION_URL": sink_url,
+        "BRIDGE_DEADLETTER_FILE": os.path.join(tempfile.gettempdir(), "latency_bench_deadletter.ndjson"),
+    })
+    env.pop("BRIDGE_CAPTURE_FILE", None)
+    env.pop("BRIDGE_INSTANCE_ID", None)
+    log = open(log_path, "w")
+    return subprocess.Popen(
+        [sys.executable, "-u", os.path.basename(BRIDGE_SCRIPT)],
+        cwd=os.path.dirname(BRIDGE_SCRIPT), env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+
+
+def iso_time(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+def wait_until_ready(transport, sink, timeout=30):
+    """Publish probes until one comes out of the sink: broker, bridge and sink are up"""
+    topic = f"iot/devices/{fleet.DEVICE_ID_PREFIX}{0:012d}/data"
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        transport.publish(topic, SENSOR_TEMPLATE.render(25.0, 50.0, 1010.0, iso_time(time.time())))
+        time.sleep(0.5)
+        if sink.arrivals:
+            return True
+    return False
+
+
+class LevelResult:
+    def __init__(self, rate):
+        self.rate = rate
+        self.sent = 0
+        self.failed = 0
+        self.received = 0
+        self.elapsed = 0.0
+        self.intended = HdrHistogram()
+        self.service = HdrHistogram()
+
+    @property
+    def lost(self):
+        return self.sent - self.received
+
+    @property
+    def throughput(self):
+        return self.received / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def run_level(rate, args, transport, sink, topics, rng):
+    """Offer `rate` msg/s for args.duration seconds, then wait for the pipeline to drain"""
+    result = LevelResult(rate)
+    sink.arrivals = []
+    sent_at = {}  # (topic, intended timestamp) -> (intended, actual) send time
+    total = int(rate * args.duration)
+
+    start = time.time() + 0.5
+    for index in range(total):
+        due = start + index / rate
+        delay = due - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        topic = topics[index % len(topics)]
+        timestamp = iso_time(due)
+        payload = SENSOR_TEMPLATE.render(
+            round(rng.uniform(20, 35), 1), round(rng.uniform(40, 80), 1), round(rng.uniform(1000, 1020), 1), timestamp
+        )
+        actual = time.time()
+        if transport.publish(topic, payload):
+            sent_at[topic, timestamp] = (due, actual)
+            result.sent += 1
+        else:
+            result.failed += 1
+
+    # Drain: stop once everything arrived or nothing new came in for args.drain seconds
+    last_count, last_change = -1, time.time()
+    while len(sink.arrivals) < result.sent and time.time() - last_change < args.drain:
+        time.sleep(0.2)
+        if len(sink.arrivals) != last_count:
+            last_count, last_change = len(sink.arrivals), time.time()
+
+    last_arrival = start
+    for topic, timestamp, arrived in sink.arrivals:
+        times = sent_at.pop((topic, timestamp), None)
+        if times is None:
+            continue  # a probe or a late straggler from an earlier level
+        intended, actual = times
+        result.received += 1
+        result.intended.record((arrived - intended) * 1e6)
+        result.service.record((arrived - actual) * 1e6)
+        last_arrival = max(last_arrival, arrived)
+    result.elapsed = last_arrival - start
+    return result
+
+
+def find_knee(results):
+    baseline = results[0].intended.percentile(99) if results else 0
+    previous = None
+    for result in results:
+        behind = result.throughput < KNEE_THROUGHPUT * result.rate or result.lost > 0
+        tail = baseline > 0 and result.intended.percentile(99) > KNEE_TAIL_FACTOR * baseline
+        if behind or tail:
+            return previous, result
+        previous = result
+    return previous, None
+
+
+def print_summary(results):
+    print("=" * 100)
+    print(f"{'offered':>8} {'sent':>7} {'recv':>7} {'lost':>5} {'msg/s':>8} | "
+          f"{'p50':>8} {'p90':>8} {'p99':>8} {'p99.9':>8} {'max':>8} | {'svc p50':>8} {'svc p99':>8}  (ms)")
+    for r in results:
+        h, s = r.intended, r.service
+        print(
+            f"{r.rate:8.0f} {r.sent:7d} {r.received:7d} {r.lost:5d} {r.throughput:8.1f} | "
+            f"{h.percentile(50) / 1000:8.2f} {h.percentile(90) / 1000:8.2f} {h.percentile(99) / 1000:8.2f} "
+            f"{h.percentile(99.9) / 1000:8.2f} {h.max / 1000:8.2f} | "
+            f"{s.percentile(50) / 1000:8.2f} {s.percentile(99) / 1000:8.2f}"
+        )
+    print("   Latency from intended send time (coordinated-omission safe); svc = from actual send time")
+    last_good, knee = find_knee(results)
+    if knee is None:
+        print(f"📈 No knee up to {results[-1].rate:.0f} msg/s")
+    elif last_good is None:
+        print(f"📈 Already past the knee at {knee.rate:.0f} msg/s; try lower rates")
+    else:
+        print(f"📈 Knee between {last_good.rate:.0f} and {knee.rate:.0f} msg/s")
+
+
+def write_results(results, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "summary.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["offered_rate", "sent", "received", "lost", "throughput",
+                         "p50_ms", "p90_ms", "p99_ms", "p999_ms", "max_ms", "service_p50_ms", "service_p99_ms"])
+        for r in results:
+            h, s = r.intended, r.service
+            writer.writerow([
+                r.rate, r.sent, r.received, r.lost, round(r.throughput, 1),
+                *(round(h.percentile(p) / 1000, 3) for p in (50, 90, 99, 99.9)), round(h.max / 1000, 3),
+                round(s.percentile(50) / 1000, 3), round(s.percentile(99) / 1000, 3),
+            ])
+    for r in results:
+        with open(os.path.join(output_dir, f"rate_{r.rate:g}.hgrm"), "w") as f:
+            f.write(r.intended.percentile_distribution())
+        with open(os.path.join(output_dir, f"rate_{r.rate:g}_service.hgrm"), "w") as f:
+            f.write(r.service.percentile_distribution())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coordinated-omission-safe latency benchmark through mqtt_bridge.py")
+    parser.add_argument("--rates", default="50,100,200,400",
+                        help="comma separated offered loads in msg/s (default 50,100,200,400)")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per load level (default 30)")
+    parser.add_argument("--drain", type=float, default=10,
+                        help="stop waiting for stragglers after this many quiet seconds (default 10)")
+    parser.add_argument("--devices", type=int, default=100, help="device ids to rotate through (default 100)")
+    parser.add_argument("--sink-port", type=int, default=54321, help="port of the stand-in HTTP sink (default 54321)")
+    parser.add_argument("--sink-delay", type=float, default=0,
+                        help="ms the sink spends per request, to mimic the Edge Function + insert (default 0)")
+    parser.add_argument("--no-bridge", action="store_true",
+                        help="do not start mqtt_bridge.py; point your own bridge's EDGE_FUNCTION_URL at the sink")
+    parser.add_argument("--output", default="latency_bench", help="directory for summary.csv and .hgrm files")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    add_broker_arguments(parser)
+    # Benchmark traffic belongs on a local broker, not the shared one
+    parser.set_defaults(broker="127.0.0.1", port=1883, transport="tcp", username="", password="")
+    args = parser.parse_args()
+
+    rates = [float(rate) for rate in args.rates.split(",")]
+    sink = start_sink(args.sink_port, args.sink_delay)
+    sink_url = f"http://127.0.0.1:{args.sink_port}{SINK_PATH}"
+    print(f"🎯 Stand-in mqtt-data-handler at {sink_url}")
+
+    bridge = None
+    if not args.no_bridge:
+        log_path = os.path.join(tempfile.gettempdir(), "latency_bench_bridge.log")
+        bridge = start_bridge(args, sink_url, log_path)
+        print(f"🌉 Started mqtt_bridge.py (log: {log_path})")
+
+    transport = PahoTransport(client_id=f"latency-bench-{os.getpid()}", **broker_options(args))
+    results = []
+    try:
+        if not wait_until_ready(transport, sink):
+            print("❌ No message reached the sink; is the broker running and the bridge connected?")
+            return
+        print("✅ Pipeline ready")
+        print("=" * 100)
+
+        topics = [f"iot/devices/{device['id']}/data" for device in fleet.make_fleet(args.devices, seed=args.seed)]
+        rng = random.Random(args.seed)
+        for rate in rates:
+            print(f"🚀 Offering {rate:.0f} msg/s for {args.duration:g}s ...")
+            result = run_level(rate, args, transport, sink, topics, rng)
+            results.append(result)
+            print(
+                f"   received {result.received}/{result.sent} | {result.throughput:.1f} msg/s | "
+                f"p50 {result.intended.percentile(50) / 1000:.2f} ms | p99 {result.intended.percentile(99) / 1000:.2f} ms | "
+                f"max {result.intended.max / 1000:.2f} ms"
+            )
+    except KeyboardInterrupt:
+        print("\n🛑 Benchmark stopped by user")
+    finally:
+        transport.close()
+        if bridge is not None:
+            bridge.terminate()
+            bridge.wait(timeout=10)
+        sink.shutdown()
+
+    if results:
+        print_summary(results)
+        write_results(results, args.output)
+        print(f"📥 summary.csv and .hgrm files written to {args.output}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Open-loop load generator: publish exactly --rate messages/s for --duration.
+
+Message i of the run is due at start + i / rate. Worker processes claim
+batches of sequence numbers from one shared counter (a token bucket shared
+across processes) and publish each message at its due time. A slow broker
+therefore never lowers the offered load: late messages are sent immediately
+and their lateness shows up as latency.
+
+    python -m simulator.loadgen --rate 5000 --duration 600 --workers 4 --csv loadgen.csv
+"""
+
+import argparse
+import csv
+import math
+import multiprocessing as mp
+import queue
+import random
+import threading
+import time
+
+from . import fleet
+from .hdr import HdrHistogram
+from .payload_template import SENSOR_TEMPLATE
+from .transport import add_broker_arguments, broker_options
+
+# Latency histograms hold microseconds at 2 significant digits; workers ship
+# {bucket: count} per second so the parent sums them without raw samples
+LATENCY_DIGITS = 2
+CLAIM_BATCH = 16
+
+
+def latency_histogram(highest_value=None):
+    return HdrHistogram(LATENCY_DIGITS, highest_value)
+
+
+def percentile_ms(histogram, percent):
+    return histogram.percentile(percent) / 1000
+
+
+class SecondStats:
+    def __init__(self):
+        self.sent = 0
+        self.acked = 0
+        self.failed = 0
+        self.histogram = latency_histogram()
+
+    def merge(self, record):
+        self.sent += record["sent"]
+        self.acked += record["acked"]
+        self.failed += record["failed"]
+        self.histogram.add_counts(record["histogram"])
+
+
+class WorkerStats:
+    """Per-second counters inside one worker; ack callbacks arrive on paho's thread"""
+
+    def __init__(self, worker_id, results, start_time):
+        self.worker_id = worker_id
+        self.results = results
+        self.start_time = start_time
+        self.lock = threading.Lock()
+        self.seconds = {}
+        self.next_second = 0
+
+    def _bucket(self, now):
+        second = int(now - self.start_time)
+        stats = self.seconds.get(second)
+        if stats is None:
+            stats = self.seconds[second] = {"sent": 0, "acked": 0, "failed": 0, "histogram": latency_histogram()}
+        return stats
+
+    def sent(self, now, ok):
+        with self.lock:
+            stats = self._bucket(now)
+            if ok:
+                stats["sent"] += 1
+            else:
+                stats["failed"] += 1
+
+    def acked(self, now, due):
+        with self.lock:
+            stats = self._bucket(now)
+            stats["acked"] += 1
+            stats["histogram"].record((now - due) * 1e6)
+
+    def flush(self, before_second=None):
+        """Send finished seconds to the parent, including idle ones"""
+        with self.lock:
+            if before_second is None:
+                before_second = max(self.seconds, default=self.next_second - 1) + 1
+            done = set(range(self.next_second, before_second))
+            # Late acks can land in a second that was already reported
+            done.update(s for s in self.seconds if s < before_second)
+            for second in sorted(done):
+                record = self.seconds.pop(second, None) or {"sent": 0, "acked": 0, "failed": 0, "histogram": latency_histogram()}
+                record["histogram"] = record["histogram"].bucket_counts()
+                self.results.put(("second", self.worker_id, second, record))
+            self.next_second = max(self.next_second, before_second)
+
+
+def worker_main(worker_id, args, sequence, sequence_lock, start_value, go, results):
+    rng = random.Random(None if args.seed is None else args.seed + worker_id)
+    devices = fleet.make_fleet(args.devices, seed=args.seed)
+    total = int(args.rate * args.duration)
+
+    pending = {}  # mid -> due time of a message waiting for its ack
+    early_acks = {}  # mid -> ack time, when the ack beat the bookkeeping
+    pending_lock = threading.Lock()
+    client = None
+    if not args.dry_run:
+        from .transport import PahoTransport
+        transport = PahoTransport(client_id=f"loadgen-{worker_id}-{rng.randrange(1 << 30)}", **broker_options(args))
+        client = transport.client
+
+    results.put(("ready", worker_id))
+    go.wait()
+    start_time = start_value.value
+    stats = WorkerStats(worker_id, results, start_time)
+
+    if client is not None:
+        def on_publish(client, userdata, mid):
+            now = time.time()
+            with pending_lock:
+                due = pending.pop(mid, None)
+                if due is None:
+                    early_acks[mid] = now
+            if due is not None:
+                stats.acked(now, due)
+        client.on_publish = on_publish
+
+    next_flush = start_time + 1
+    while True:
+        with sequence_lock:
+            first = sequence.value
+            sequence.value = first + CLAIM_BATCH
+        if first >= total:
+            break
+
+        for index in range(first, min(first + CLAIM_BATCH, total)):
+            due = start_time + index / args.rate
+            delay = due - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+            device = devices[index % len(devices)]
+            payload = SENSOR_TEMPLATE.render_mapping(fleet.generate_sensor_data(device, rng))
+            topic = f"iot/devices/{device['id']}/data"
+
+            if client is None:
+                now = time.time()
+                stats.sent(now, True)
+                stats.acked(now, due)
+                continue
+
+            # Never hold pending_lock inside publish(): paho runs on_publish under its own locks
+            info = client.publish(topic, payload, qos=args.qos)
+            ok = info.rc == 0
+            stats.sent(time.time(), ok)
+            if ok:
+                with pending_lock:
+                    acked_at = early_acks.pop(info.mid, None)
+                    if acked_at is None:
+                        pending[info.mid] = due
+                if acked_at is not None:
+                    stats.acked(acked_at, due)
+
+        now = time.time()
+        if now >= next_flush:
+            stats.flush(int(now - start_time))
+            next_flush = now + 1
+
+    # Give outstanding acks a moment, then report everything
+    deadline = time.time() + 5
+    while client is not None and pending and time.time() < deadline:
+        time.sleep(0.05)
+    stats.flush()
+    if client is not None:
+        transport.close()
+    results.put(("done", worker_id))
+
+
+def write_csv(path, seconds, target_rate):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["second", "target_rate", "sent", "acked", "failed", "p50_ms", "p90_ms", "p99_ms", "max_ms"])
+        for second in sorted(seconds):
+            stats = seconds[second]
+            writer.writerow([
+                second, target_rate, stats.sent, stats.acked, stats.failed,
+                round(percentile_ms(stats.histogram, 50), 3),
+                round(percentile_ms(stats.histogram, 90), 3),
+                round(percentile_ms(stats.histogram, 99), 3),
+                round(percentile_ms(stats.histogram, 100), 3),
+            ])
+
+
+def run(args):
+    sequence = mp.Value('q', 0, lock=False)
+    sequence_lock = mp.Lock()
+    start_value = mp.Value('d', 0.0, lock=False)
+    go = mp.Event()
+    results = mp.Queue()
+
+    workers = [
+        mp.Process(target=worker_main, args=(w, args, sequence, sequence_lock, start_value, go, results), daemon=True)
+        for w in range(args.workers)
+    ]
+    for process in workers:
+        process.start()
+
+    ready = 0
+    while ready < args.workers:
+        if results.get()[0] == "ready":
+            ready += 1
+
+    # Everyone connected: start on the next whole second
+    start_value.value = math.floor(time.time()) + 1
+    go.set()
+    print(f"🚀 Offering {args.rate:.0f} msg/s for {args.duration}s across {args.workers} workers (QoS {args.qos})")
+    print("=" * 60)
+
+    seconds = {}
+    reported = {}
+    done = 0
+    try:
+        while done < args.workers:
+            try:
+                message = results.get(timeout=1)
+            except queue.Empty:
+                if not any(process.is_alive() for process in workers):
+                    break
+                continue
+            if message[0] == "done":
+                done += 1
+                continue
+            if message[0] != "second":
+                continue
+
+            _, worker_id, second, record = message
+            stats = seconds.setdefault(second, SecondStats())
+            stats.merge(record)
+            reported.setdefault(second, set()).add(worker_id)
+            if len(reported[second]) == args.workers:
+                print(
+                    f"⏱️  t={second:4d}s | sent {stats.sent:6d}/s (target {args.rate:.0f}) | "
+                    f"acked {stats.acked:6d} | failed {stats.failed} | "
+                    f"p50 {percentile_ms(stats.histogram, 50):.2f} ms | "
+                    f"p99 {percentile_ms(stats.histogram, 99):.2f} ms"
+                )
+    except KeyboardInterrupt:
+        print("\n🛑 Load test stopped by user")
+    finally:
+        for process in workers:
+            process.join(timeout=10)
+
+    total = SecondStats()
+    for stats in seconds.values():
+        total.sent += stats.sent
+        total.acked += stats.acked
+        total.failed += stats.failed
+        total.histogram.merge(stats.histogram)
+
+    print("=" * 60)
+    print(f"📊 Sent {total.sent} (target {int(args.rate * args.duration)}) | acked {total.acked} | failed {total.failed}")
+    print(
+        f"   Latency p50 {percentile_ms(total.histogram, 50):.2f} ms | "
+        f"p90 {percentile_ms(total.histogram, 90):.2f} ms | "
+        f"p99 {percentile_ms(total.histogram, 99):.2f} ms | "
+        f"max {percentile_ms(total.histogram, 100):.2f} ms"
+    )
+    if args.csv:
+        write_csv(args.csv, seconds, args.rate)
+        print(f"📥 Per-second stats written to {args.csv}")
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish a fixed message rate with open-loop scheduling")
+    parser.add_argument("--rate", type=float, required=True, help="target messages per second")
+    parser.add_argument("--duration", type=float, default=60, help="test length in seconds (default 60)")
+    parser.add_argument("--workers", type=int, default=max(1, mp.cpu_count() // 2), help="worker processes")
+    parser.add_argument("--devices", type=int, default=1000, help="virtual device ids to rotate through (default 1000)")
+    parser.add_argument("--qos", type=int, default=0, choices=(0, 1), help="MQTT QoS; latency is measured to PUBACK at QoS 1")
+    parser.add_argument("--csv", default="loadgen.csv", help="per-second stats CSV (default loadgen.csv)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--dry-run", action="store_true", help="run the schedule without a broker")
+    add_broker_arguments(parser)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import json
+
+# Slot kinds and their printf conversions. "float" uses %r, which is what
+# json.dumps emits for a float, so rendered payloads match json.dumps output.
+SLOT_FORMATS = {
+    "int": "%d",
+    "float": "%r",
+    "str": '"%s"',   # value must not need JSON escaping (timestamps, enum strings)
+    "json": "%s",    # value is already JSON text, see json_value()
+}
+
+_JSON_VALUE_CACHE = {}
+
+
+def json_value(value):
+    """JSON text for one "json" slot value; enum strings are cached"""
+    if value is None:
+        return "null"
+    if type(value) is int:
+        return str(value)
+    if isinstance(value, str):
+        text = _JSON_VALUE_CACHE.get(value)
+        if text is None:
+            text = _JSON_VALUE_CACHE[value] = json.dumps(value)
+        return text
+    return json.dumps(value)
+
+
+class PayloadTemplate:
+    """A JSON object shape compiled once into a printf-style format string.
+
+    Fields are (key, kind) pairs; `constants` are baked into the template
+    text, so e.g. a device that never reports wifi_rssi has a literal null
+    there instead of a slot. Rendering is a single `%` call with the slot
+    values in field order, instead of building a dict and running json.dumps.
+    """
+
+    def __init__(self, fields, constants=None):
+        constants = constants or {}
+        self.fields = [(key, kind) for key, kind in fields if key not in constants]
+        self.keys = [key for key, _ in self.fields]
+        self.kinds = [kind for _, kind in self.fields]
+
+        parts = []
+        for key, kind in fields:
+            if key in constants:
+                value = json.dumps(constants[key]).replace("%", "%%")
+            else:
+                value = SLOT_FORMATS[kind]
+            parts.append(f"{json.dumps(key)}: {value}")
+        self.format = "{" + ", ".join(parts) + "}"
+
+    def render(self, *values):
+        return self.format % values
+
+    def render_mapping(self, data):
+        """Render from a payload dict (None allowed in "json" slots)"""
+        values = []
+        for key, kind in self.fields:
+            value = data[key]
+            values.append(json_value(value) if kind == "json" else value)
+        return self.format % tuple(values)
+
+    def render_many(self, columns):
+        """Render one payload per row from equally long value columns (slot order)"""
+        fmt = self.format
+        return [fmt % row for row in zip(*columns)]
+
+
+# Payload shapes published by the simulators
+STATUS_FIELDS = [
+    ("status", "str"),
+    ("battery", "int"),
+    ("wifi_rssi", "json"),
+    ("uptime", "int"),
+    ("free_heap", "json"),
+    ("ota_update", "json"),
+    ("timestamp", "str"),
+]
+
+SENSOR_FIELDS = [
+    ("temperature", "float"),
+    ("humidity", "float"),
+    ("pressure", "float"),
+    ("timestamp", "str"),
+]
+
+STATUS_TEMPLATE = PayloadTemplate(STATUS_FIELDS)
+SENSOR_TEMPLATE = PayloadTemplate(SENSOR_FIELDS)
@@ -0,0 +1,183 @@
+"""
+Streaming columnar recorder for simulator logs.
+
+Rows are appended into one fixed-size chunk of typed NumPy columns (float64
+/ int64 with a validity mask, object for strings). When the chunk is full
+it is written as one part file, Parquet or Arrow IPC, and the same arrays
+are reused, so memory stays at one chunk however long the run is. Readers
+load only the columns they ask for, part by part.
+
+    recorder = ColumnarRecorder("recordings/run1", "device_data", DATA_COLUMNS)
+    recorder.append({"device_id": "...", "type": "sensor", "temperature": 24.1, ...})
+    for batch in recorder.batches(["device_id", "temperature"]):
+        ...
+"""
+
+import glob
+import os
+
+import numpy as np
+
+# Rows of DeviceStatusSimulator's device log: who/what/when, then the payload
+# keys of SENSOR_FIELDS and STATUS_FIELDS (payload_template.py)
+DATA_COLUMNS = [
+    ("device_id", "str"),
+    ("device_name", "str"),
+    ("type", "str"),
+    ("timestamp", "str"),
+    ("temperature", "float"),
+    ("humidity", "float"),
+    ("pressure", "float"),
+    ("status", "str"),
+    ("battery", "int"),
+    ("wifi_rssi", "int"),
+    ("uptime", "int"),
+    ("free_heap", "int"),
+    ("ota_update", "str"),
+]
+ALERT_COLUMNS = [
+    ("device_id", "str"),
+    ("event", "str"),
+    ("transition", "str"),
+    ("message", "str"),
+    ("timestamp", "str"),
+]
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+DTYPES = {"float": np.float64, "int": np.int64, "str": object}
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise RuntimeError("The columnar recorder needs pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+class ColumnarRecorder:
+    """Appends rows into a fixed-size typed chunk; full chunks become part files.
+
+    `columns` is a list of (name, kind) with kind "float", "int" or "str";
+    every column is nullable. Parts are `<directory>/<name>-00000.parquet`
+    (or `.arrow`), numbered in write order.
+    """
+
+    def __init__(self, directory, name, columns, chunk_rows=65536, format="parquet"):
+        if format not in FORMATS:
+            raise ValueError(f"Unknown format '{format}' (use {', '.join(FORMATS)})")
+        self.pa = import_pyarrow()
+        self.directory = directory
+        self.name = name
+        self.columns = list(columns)
+        self.names = [column for column, _ in self.columns]
+        self.chunk_rows = chunk_rows
+        self.format = format
+        self.schema = self.pa.schema([
+            (column, {"float": self.pa.float64(), "int": self.pa.int64(), "str": self.pa.string()}[kind])
+            for column, kind in self.columns
+        ])
+        # The chunk: one preallocated array per column, plus a validity mask for numbers
+        self.values = [np.empty(chunk_rows, dtype=DTYPES[kind]) for _, kind in self.columns]
+        self.valid = [np.zeros(chunk_rows, dtype=bool) if kind != "str" else None for _, kind in self.columns]
+        self.size = 0
+        self.parts = []
+        self.flushed_rows = 0
+
+    def __len__(self):
+        return self.flushed_rows + self.size
+
+    def append(self, row):
+        """Add one row from a mapping; missing keys are null"""
+        index = self.size
+        for name, values, valid in zip(self.names, self.values, self.valid):
+            value = row.get(name)
+            if valid is None:
+                values[index] = value
+            elif value is None:
+                valid[index] = False
+            else:
+                values[index] = value
+                valid[index] = True
+        self.size = index + 1
+        if self.size == self.chunk_rows:
+            self.flush()
+
+    def chunk_batch(self, names=None):
+        """The unflushed rows as a RecordBatch (copies them out of the chunk)"""
+        names = self.names if names is None else names
+        arrays = []
+        for name in names:
+            position = self.names.index(name)
+            values = self.values[position][:self.size]
+            valid = self.valid[position]
+            if valid is None:
+                arrays.append(self.pa.array(values, type=self.schema.field(name).type))
+            else:
+                arrays.append(self.pa.array(values, mask=~valid[:self.size], type=self.schema.field(name).type))
+        return self.pa.RecordBatch.from_arrays(arrays, schema=self.pa.schema([self.schema.field(name) for name in names]))
+
+    def flush(self):
+        """Write the current chunk as the next part file and start over"""
+        if not self.size:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{self.name}-{len(self.parts):05d}{FORMATS[self.format]}")
+        table = self.pa.Table.from_batches([self.chunk_batch()])
+        if self.format == "parquet":
+            import pyarrow.parquet as pq
+
+            pq.write_table(table, path)
+        else:
+            with self.pa.OSFile(path, "wb") as sink, self.pa.ipc.new_file(sink, self.schema) as writer:
+                writer.write_table(table)
+        self.parts.append(path)
+        self.flushed_rows += self.size
+        self.size = 0
+        # Drop string references so the strings of the written chunk can be freed
+        for values, (_, kind) in zip(self.values, self.columns):
+            if kind == "str":
+                values.fill(None)
+
+    def batches(self, columns=None):
+        """RecordBatches of the requested columns: every part file, then the unflushed chunk"""
+        for path in self.parts:
+            if self.format == "parquet":
+                import pyarrow.parquet as pq
+
+                for batch in pq.ParquetFile(path).iter_batches(columns=columns):
+                    yield batch
+            else:
+                with self.pa.OSFile(path, "rb") as source:
+                    reader = self.pa.ipc.open_file(source)
+                    for index in range(reader.num_record_batches):
+                        batch = reader.get_batch(index)
+                        yield batch if columns is None else batch.select(columns)
+        if self.size:
+            yield self.chunk_batch(columns)
+
+    def table(self, columns=None):
+        """Everything recorded so far as one pyarrow Table"""
+        batches = list(self.batches(columns))
+        if not batches:
+            names = self.names if columns is None else columns
+            return self.pa.schema([self.schema.field(name) for name in names]).empty_table()
+        return self.pa.Table.from_batches(batches)
+
+
+def read_recording(directory, name, columns=None):
+    """Load the part files of one recorder from disk (e.g. after the run) as a pyarrow Table"""
+    pa = import_pyarrow()
+    paths = sorted(glob.glob(os.path.join(directory, f"{name}-*.parquet")))
+    if paths:
+        import pyarrow.parquet as pq
+
+        return pa.concat_tables(pq.read_table(path, columns=columns) for path in paths)
+    tables = []
+    for path in sorted(glob.glob(os.path.join(directory, f"{name}-*.arrow"))):
+        with pa.OSFile(path, "rb") as source:
+            table = pa.ipc.open_file(source).read_all()
+        tables.append(table if columns is None else table.select(columns))
+    if not tables:
+        raise FileNotFoundError(f"No {name}-*.parquet / .arrow parts in {directory}")
+    return pa.concat_tables(tables)
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Emulated ESP32 command responders for round-trip benchmarks.
+
+N virtual devices listen on iot/devices/{id}/commands and answer the way
+esp32-weather-station.ino does, with processing delays taken from the
+firmware (sensor reads, LED blinks, the 1 s pause before a reboot) plus
+WiFi latency. Each device handles one command at a time, like the
+firmware's single loop. Reboot-type commands take the device offline: an
+offline status (what the broker's LWT would send), then an online status
+once it has booted again; commands arriving meanwhile are lost.
+
+Plain-string commands get the firmware's answers (read_sensors -> /data,
+status -> /status, the rest -> /response). JSON commands carrying an id,
+{"id": "...", "command": "read_sensors"}, are answered on /response with
+that id so a harness can correlate them, e.g. mqtt-testing/mqtt_command_test.py.
+
+    python -m simulator.responder --devices 50 --broker 127.0.0.1 --port 1883 --transport tcp
+    python -m simulator.responder --devices 500 --time-scale 0.1   # reboots and deep sleep 10x shorter
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from .transport import PahoTransport, add_broker_arguments, broker_options
+
+DEVICE_PREFIX = "esp32-weather-"
+COMMAND_TOPIC = "iot/devices/+/commands"
+
+# Processing time on the device in seconds (min, max), from the firmware's handlers
+PROCESSING = {
+    "read_sensors": (0.25, 0.40),  # DHT22 read (~250 ms) + BMP280, then a 100 ms LED blink
+    "status": (0.005, 0.02),
+    "led_on": (0.002, 0.01),
+    "led_off": (0.002, 0.01),
+    "calibrate": (0.65, 0.80),     # dht.begin + bmp.begin + 3 blinks of 2 x 100 ms
+    "restart": (0.002, 0.01),
+    "reset_wifi": (0.002, 0.01),
+    "deep_sleep": (0.002, 0.01),
+    "factory_reset": (0.002, 0.01),
+}
+# Seconds offline after answering (min, max): 1 s delay + boot + WiFi/MQTT reconnect
+OFFLINE = {
+    "restart": (4.0, 6.0),
+    "reset_wifi": (6.0, 9.0),
+    "factory_reset": (7.0, 10.0),  # plus 10 fast blinks before the delay
+    "deep_sleep": (32.0, 34.0),    # esp_sleep_enable_timer_wakeup(30 s)
+}
+MESSAGES = {
+    "restart": "Restarting device...",
+    "led_on": "LED turned ON",
+    "led_off": "LED turned OFF",
+    "calibrate": "Sensors calibrated",
+    "reset_wifi": "Resetting WiFi...",
+    "deep_sleep": "Entering deep sleep for 30 seconds...",
+    "factory_reset": "Performing factory reset...",
+}
+# One-way WiFi + broker hop, lognormal around 15 ms
+NETWORK_MEDIAN = 0.015
+NETWORK_SIGMA = 0.5
+
+
+class EmulatedDevice:
+    __slots__ = ("id", "booted_at", "busy_until", "offline_until", "battery", "handled", "dropped")
+
+    def __init__(self, device_id, rng):
+        self.id = device_id
+        self.booted_at = time.monotonic() - rng.uniform(60, 86400)
+        self.busy_until = 0.0
+        self.offline_until = 0.0
+        self.battery = rng.randint(60, 100)
+        self.handled = 0
+        self.dropped = 0
+
+    def millis(self):
+        return int((time.monotonic() - self.booted_at) * 1000)
+
+
+class CommandResponderFleet:
+    """Answers commands for many virtual devices over one MQTT connection"""
+
+    def __init__(self, device_ids, publish, time_scale=1.0, seed=None):
+        self.rng = random.Random(seed)
+        self.devices = {device_id: EmulatedDevice(device_id, self.rng) for device_id in device_ids}
+        self.publish = publish
+        self.time_scale = time_scale
+        self.loop = None
+        self.unknown = 0
+
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+
+    def on_message(self, client, userdata, msg):
+        # paho network thread -> event loop
+        self.loop.call_soon_threadsafe(self.receive, msg.topic, msg.payload)
+
+    def network_delay(self):
+        return self.rng.lognormvariate(0, NETWORK_SIGMA) * NETWORK_MEDIAN
+
+    def receive(self, topic, payload):
+        device = self.devices.get(topic.split("/")[2])
+        if device is None:
+            return
+        now = time.monotonic()
+        if now < device.offline_until:
+            device.dropped += 1  # rebooting or asleep: QoS 0 command is lost
+            return
+
+        text = payload.decode("utf-8", errors="replace").strip()
+        command, command_id = text, None
+        if text.startswith("{"):
+            try:
+                request = json.loads(text)
+                command, command_id = request.get("command", ""), request.get("id")
+            except ValueError:
+                pass
+        if command not in PROCESSING:
+            self.unknown += 1
+            return  # the firmware silently ignores unknown commands
+
+        # Commands queue behind the one the device is still working on
+        start = max(now + self.network_delay(), device.busy_until)
+        done = start + self.rng.uniform(*PROCESSING[command])
+        device.busy_until = done
+        device.handled += 1
+        self.loop.call_later(done + self.network_delay() - now, self.respond, device, command, command_id)
+
+    def respond(self, device, command, command_id):
+        base = f"iot/devices/{device.id}"
+        if command == "read_sensors":
+            data = {
+                "temperature": round(self.rng.uniform(20, 35), 1),
+                "humidity": round(self.rng.uniform(40, 80), 1),
+                "pressure": round(self.rng.uniform(1000, 1020), 1),
+                "battery": device.battery,
+            }
+            self.publish(f"{base}/data", json.dumps(data))
+            body = {"data": data}
+        elif command == "status":
+            status = self.status(device)
+            self.publish(f"{base}/status", json.dumps(status), True)
+            body = {"data": status}
+        else:
+            body = {"message": MESSAGES[command]}
+
+        if command_id is not None:
+            self.publish(f"{base}/response", json.dumps({"id": command_id, "command": command, **body, "timestamp": device.millis()}))
+        elif "message" in body:
+            self.publish(f"{base}/response", json.dumps({"message": body["message"], "timestamp": device.millis()}))
+
+        if command in OFFLINE:
+            offline = self.rng.uniform(*OFFLINE[command]) * self.time_scale
+            device.offline_until = time.monotonic() + offline
+            self.loop.call_later(1.0 * self.time_scale, self.go_offline, device)
+            self.loop.call_later(offline, self.come_back, device)
+
+    def status(self, device):
+        return {
+            "status": "online",
+            "battery": device.battery,
+            "wifi_rssi": self.rng.randint(-90, -45),
+            "uptime": device.millis() // 1000,
+            "free_heap": self.rng.randint(80000, 150000),
+        }
+
+    def go_offline(self, device):
+        # What the broker publishes from the device's Last Will
+        self.publish(f"iot/devices/{device.id}/status", json.dumps({"status": "offline"}), True)
+
+    def come_back(self, device):
+        device.booted_at = time.monotonic()
+        device.busy_until = 0.0
+        # reconnect() in the firmware publishes the status right after subscribing
+        self.publish(f"iot/devices/{device.id}/status", json.dumps(self.status(device)), True)
+
+    def print_summary(self):
+        handled = sum(device.handled for device in self.devices.values())
+        dropped = sum(device.dropped for device in self.devices.values())
+        offline = sum(device.offline_until > time.monotonic() for device in self.devices.values())
+        print(f"🤖 {len(self.devices)} devices | handled {handled} | dropped while offline {dropped} | "
+              f"unknown {self.unknown} | offline now {offline}")
+
+
+async def serve(fleet, client, report_every):
+    fleet.start()
+    client.on_message = fleet.on_message
+    client.on_connect = lambda client, userdata, flags, rc: client.subscribe(COMMAND_TOPIC)
+    client.subscribe(COMMAND_TOPIC)
+    while True:
+        await asyncio.sleep(report_every)
+        fleet.print_summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emulate ESP32 devices answering MQTT commands")
+    parser.add_argument("--devices", type=int, default=10, help="number of emulated devices (default 10)")
+    parser.add_argument("--prefix", default=DEVICE_PREFIX,
+                        help=f"device ids are <prefix>01, <prefix>02, ... (default {DEVICE_PREFIX})")
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="scale reboot and deep sleep durations, e.g. 0.1 for quick runs (default 1)")
+    parser.add_argument("--report", type=float, default=10, help="seconds between summaries (default 10)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    add_broker_arguments(parser)
+    args = parser.parse_args()
+    device_ids = [f"{args.prefix}{index:02d}" for index in range(1, args.devices + 1)]
+    transport = PahoTransport(**broker_options(args), client_id=f"command-responder-{random.getrandbits(32):08x}")
+    fleet = CommandResponderFleet(device_ids, transport.publish, time_scale=args.time_scale, seed=args.seed)
+    print(f"🤖 Emulating {len(device_ids)} devices ({device_ids[0]} .. {device_ids[-1]}) on {COMMAND_TOPIC}")
+
+    try:
+        asyncio.run(serve(fleet, transport.client, args.report))
+    except KeyboardInterrupt:
+        print("\n🛑 Responder stopped by user")
+    finally:
+        fleet.print_summary()
+        transport.close()
+
+
+if __name__ == "__main__":
+    main()
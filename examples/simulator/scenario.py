@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Deterministic scenario timelines for AWLR (water level + rain) devices.
+
+A timeline is a list of phases, e.g. NORMAL for 2 h, rising to BAHAYA over
+30 min, BAHAYA for 1 h, then receding to NORMAL. It is compiled ahead of
+time into one array per field and device, so a seeded run produces exactly
+the same readings every time, and can be played back compressed.
+
+    python -m simulator.scenario --timeline flood_event --seed 42 --speed 60 --dry-run
+    python -m simulator.scenario --timeline "NORMAL:60,BAHAYA~30,BAHAYA:30,NORMAL~60" --digest
+"""
+
+import argparse
+import hashlib
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from .awlr import SCENARIO_NAMES, SCENARIOS, SENSOR_TEMPLATE, STATUS_TEMPLATE, TIMELINES, parse_timeline
+from .fleet import DEVICE_ID_PREFIX
+from .transport import NullTransport, PahoTransport, add_broker_arguments, broker_options
+
+
+def phase_ranges(phases, step_seconds):
+    """Per-step (low, high) bounds for every field plus the scenario index of each step"""
+    bounds = {key: ([], []) for key in ("water_range", "rain_range", "batt_range")}
+    labels = []
+    previous = None
+    for scenario, minutes, transition in phases:
+        if scenario not in SCENARIOS:
+            raise ValueError(f"Unknown scenario: {scenario}")
+        if transition == "ramp" and previous is None:
+            raise ValueError("The first phase of a timeline cannot be a ramp")
+        steps = max(1, int(round(minutes * 60 / step_seconds)))
+        # Fraction of the way from the previous scenario, reaching 1.0 on the last step
+        fraction = np.arange(1, steps + 1) / steps if transition == "ramp" else np.ones(steps)
+        start = SCENARIOS[previous if transition == "ramp" else scenario]
+        end = SCENARIOS[scenario]
+        for key, (lows, highs) in bounds.items():
+            lows.append(start[key][0] + fraction * (end[key][0] - start[key][0]))
+            highs.append(start[key][1] + fraction * (end[key][1] - start[key][1]))
+        index_from = SCENARIO_NAMES.index(previous if transition == "ramp" else scenario)
+        labels.append(np.where(fraction >= 0.5, SCENARIO_NAMES.index(scenario), index_from))
+        previous = scenario
+    return (
+        {key: (np.concatenate(lows), np.concatenate(highs)) for key, (lows, highs) in bounds.items()},
+        np.concatenate(labels).astype("u1"),
+    )
+
+
+class ScenarioTimeline:
+    """A compiled timeline: one row per device, one column per step"""
+
+    def __init__(self, phases, device_ids, seed=0, step_seconds=60, uptimes=None):
+        self.phases = phases
+        self.device_ids = list(device_ids)
+        self.seed = seed
+        self.step_seconds = step_seconds
+
+        bounds, self.scenario = phase_ranges(phases, step_seconds)
+        steps = len(self.scenario)
+        devices = len(self.device_ids)
+        self.water = np.empty((devices, steps))
+        self.rain = np.empty((devices, steps))
+        self.battery = np.empty((devices, steps), dtype="i2")
+        self.wifi_rssi = np.empty((devices, steps), dtype="i2")
+        self.free_heap = np.empty((devices, steps), dtype="i4")
+
+        # One child stream per device: device i's readings depend only on (seed, i)
+        streams = np.random.SeedSequence(seed).spawn(devices)
+        water_low, water_high = bounds["water_range"]
+        rain_low, rain_high = bounds["rain_range"]
+        batt_low, batt_high = np.ceil(bounds["batt_range"][0]), np.floor(bounds["batt_range"][1])
+        for row, stream in enumerate(streams):
+            rng = np.random.default_rng(stream)
+            self.water[row] = np.round(water_low + rng.random(steps) * (water_high - water_low), 2)
+            self.rain[row] = np.round(rain_low + rng.random(steps) * (rain_high - rain_low), 1)
+            self.battery[row] = batt_low + np.floor(rng.random(steps) * (batt_high - batt_low + 1))
+            self.wifi_rssi[row] = rng.integers(-120, -70, steps, endpoint=True)
+            self.free_heap[row] = rng.integers(80000, 120000, steps, endpoint=True)
+
+        start_uptime = np.zeros(devices, dtype="i8") if uptimes is None else np.asarray(uptimes, dtype="i8")
+        self.uptime = start_uptime[:, None] + (step_seconds * np.arange(1, steps + 1)).astype("i8")
+
+    @property
+    def steps(self):
+        return len(self.scenario)
+
+    @property
+    def duration_seconds(self):
+        return self.steps * self.step_seconds
+
+    def digest(self):
+        """SHA-256 over every compiled array; equal digests mean identical traffic"""
+        sha = hashlib.sha256()
+        for array in (self.scenario, self.water, self.rain, self.battery, self.wifi_rssi, self.free_heap, self.uptime):
+            sha.update(np.ascontiguousarray(array).tobytes())
+        return sha.hexdigest()
+
+    def messages(self, step, timestamp):
+        """(topic, payload, retain) for every device at one step"""
+        water = self.water[:, step].tolist()
+        rain = self.rain[:, step].tolist()
+        battery = self.battery[:, step].tolist()
+        wifi = self.wifi_rssi[:, step].tolist()
+        heap = self.free_heap[:, step].tolist()
+        uptime = self.uptime[:, step].tolist()
+        messages = []
+        for i, device_id in enumerate(self.device_ids):
+            messages.append((f"iot/devices/{device_id}/data", SENSOR_TEMPLATE.render(water[i], rain[i], timestamp), False))
+            messages.append((
+                f"iot/devices/{device_id}/status",
+                STATUS_TEMPLATE.render(battery[i], wifi[i], uptime[i], heap[i], timestamp),
+                True
+            ))
+        return messages
+
+    def play(self, publish, speed=60.0, sim_start=None, report_every=60):
+        """Publish every step; `speed` simulated seconds per wall second (0 = no waiting).
+
+        publish(topic, payload, retain) returns True on success. Timestamps
+        follow the simulated clock, in the WIB + "Z" format of mqtt-dummy.py.
+        Ctrl+C stops playback after the step being published. Returns
+        (published, failed, last_step): last_step is the index of the last
+        step fully published (-1 if none), so callers can carry state such
+        as uptime forward from the column that was actually sent.
+        """
+        sim_start = datetime.utcnow() + timedelta(hours=7) if sim_start is None else sim_start
+        published = failed = 0
+        last_step = -1
+        wall_start = time.time()
+        try:
+            for step in range(self.steps):
+                if speed > 0:
+                    delay = wall_start + step * self.step_seconds / speed - time.time()
+                    if delay > 0:
+                        time.sleep(delay)
+                sim_time = sim_start + timedelta(seconds=(step + 1) * self.step_seconds)
+                timestamp = sim_time.isoformat() + "Z"
+                for topic, payload, retain in self.messages(step, timestamp):
+                    if publish(topic, payload, retain):
+                        published += 1
+                    else:
+                        failed += 1
+                last_step = step
+                if (step + 1) % report_every == 0 or step == self.steps - 1:
+                    print(
+                        f"⏱️  sim {sim_time.strftime('%Y-%m-%d %H:%M')} | "
+                        f"{SCENARIO_NAMES[self.scenario[step]]:<15} | "
+                        f"water {self.water[:, step].mean():6.2f} cm | rain {self.rain[:, step].mean():5.1f} mm | "
+                        f"published {published} | failed {failed}"
+                    )
+        except KeyboardInterrupt:
+            pass
+        return published, failed, last_step
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play a seeded AWLR scenario timeline")
+    parser.add_argument("--timeline", default="flood_event",
+                        help=f"preset ({', '.join(TIMELINES)}) or phases like NORMAL:120,BAHAYA~30")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default 0)")
+    parser.add_argument("--devices", type=int, default=4, help="number of virtual AWLR devices (default 4)")
+    parser.add_argument("--step", type=float, default=60, help="simulated seconds between readings (default 60)")
+    parser.add_argument("--speed", type=float, default=60,
+                        help="simulated seconds per wall second (default 60 = 1 hour per minute, 0 = max)")
+    parser.add_argument("--sim-start", default=None,
+                        help="simulated start time, e.g. 2025-06-17T08:00:00 (default: now in WIB); fix it for byte-identical replays")
+    parser.add_argument("--digest", action="store_true", help="only compile and print the timeline digest")
+    parser.add_argument("--dry-run", action="store_true", help="play without publishing to a broker")
+    add_broker_arguments(parser)
+    args = parser.parse_args()
+
+    phases = parse_timeline(args.timeline)
+    device_ids = [f"{DEVICE_ID_PREFIX}{index:012d}" for index in range(1, args.devices + 1)]
+    start = time.perf_counter()
+    timeline = ScenarioTimeline(phases, device_ids, seed=args.seed, step_seconds=args.step)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    print(f"🌊 Timeline '{args.timeline}' (seed {args.seed}): {timeline.steps} steps, "
+          f"{timeline.duration_seconds / 3600:.1f} simulated hours, {len(device_ids)} devices")
+    for scenario, minutes, transition in phases:
+        print(f"   {transition:<4} {scenario:<15} {minutes:g} min")
+    print(f"   Compiled in {compile_ms:.1f} ms | digest {timeline.digest()[:16]}")
+    if args.digest:
+        return
+
+    transport = NullTransport() if args.dry_run else PahoTransport(**broker_options(args))
+    print("=" * 60)
+    try:
+        sim_start = None if args.sim_start is None else datetime.fromisoformat(args.sim_start)
+        _, _, last_step = timeline.play(transport.publish, speed=args.speed, sim_start=sim_start)
+        if last_step < timeline.steps - 1:
+            print(f"\n🛑 Playback stopped by user after {last_step + 1} of {timeline.steps} steps")
+    finally:
+        transport.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Physically shaped sensor models, computed for whole fleets in one shot.
+
+fleet.generate_sensor_data draws every reading as independent uniform
+noise, which no deadband filter, compressor or forecaster can exploit.
+These models produce autocorrelated series with the structure real
+stations show:
+
+    temperature     diurnal cycle (minimum near sunrise, maximum mid
+                    afternoon, WIB), synoptic anomalies lasting days,
+                    cooling under rain
+    humidity        relative humidity from the dew point (Magnus), so it
+                    falls as temperature rises; moist air masses, saturation
+                    under rain
+    pressure        semidiurnal atmospheric tide, synoptic anomalies that
+                    move against humidity (low-pressure spells are the
+                    humid ones), a cold-pool bump under storms
+    curah_hujan     convective storm cells (mm/h): mostly afternoon, more in
+                    the wet season, moving across the region so nearby
+                    devices see the same storm
+    ketinggian_air  river level (cm) from rain through a Nash cascade (quick
+                    flow) and a slow reservoir (baseflow), then a power-law
+                    rating: a lagged rise and a long recession
+
+Every field is a (devices, steps) float array. Slow noise is drawn on a
+coarse grid and interpolated; the filters are FFT convolutions with the
+truncated reservoir kernel, so a week of minute data for a thousand
+devices takes a few seconds.
+
+    python -m simulator.sensor_models --devices 100 --days 30 --seed 1
+    python -m simulator.sensor_models --devices 1000 --days 7 --output model.npz
+"""
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+FIELDS = ("temperature", "humidity", "pressure", "curah_hujan", "ketinggian_air")
+WIB_OFFSET_HOURS = 7
+# Upper bound for one FFT block (devices x FFT length complex values), in bytes
+FFT_BLOCK_BYTES = 256 * 2 ** 20
+
+
+def exp_filter(signal, step_seconds, tau_seconds, reservoirs=1):
+    """Unit-gain cascade of `reservoirs` linear reservoirs along the last axis.
+
+    One reservoir is y[t] = (1 - phi) * sum_k phi**k * x[t - k] with
+    phi = exp(-step / tau); n in series have the kernel
+    (1 - phi)**n * C(k + n - 1, n - 1) * phi**k (a discrete Nash cascade).
+    The kernel is truncated at 1e-6 and applied by FFT in blocks of rows;
+    all-zero rows are skipped.
+    """
+    signal = np.atleast_2d(signal)
+    steps = signal.shape[-1]
+    phi = np.exp(-step_seconds / tau_seconds)
+    length = steps
+    if phi > 0:
+        # The tail of the cascade kernel decays like k**(n-1) * phi**k
+        length = min(steps, int(np.ceil((np.log(1e-6) - 3 * (reservoirs - 1)) / np.log(phi))) + 1)
+    k = np.arange(length, dtype=np.float64)
+    kernel = (1 - phi) ** reservoirs * phi ** k
+    for order in range(1, reservoirs):
+        kernel *= (k + order) / order
+    size = 1 << (steps + length - 1).bit_length()
+    spectrum = np.fft.rfft(kernel, size)
+    out = np.zeros(signal.shape)
+    active = np.flatnonzero(signal.any(axis=-1))
+    block = max(1, FFT_BLOCK_BYTES // (size * 16))
+    for first in range(0, len(active), block):
+        rows = active[first:first + block]
+        transformed = np.fft.rfft(signal[rows], size, axis=-1)
+        out[rows] = np.fft.irfft(transformed * spectrum, size, axis=-1)[:, :steps]
+    return out
+
+
+def red_noise(rng, count, seconds, tau_seconds, std):
+    """AR(1) noise with time constant `tau_seconds` and stationary `std`, sampled at `seconds`.
+
+    Drawn on a grid of tau/12 (never finer than the sample spacing) with a
+    warm-up so the series starts stationary, then interpolated linearly.
+    """
+    spacing = seconds[1] - seconds[0] if len(seconds) > 1 else tau_seconds
+    grid_step = max(spacing, tau_seconds / 12)
+    warmup = int(np.ceil(7 * tau_seconds / grid_step))
+    points = int(np.ceil((seconds[-1] - seconds[0]) / grid_step)) + 2
+    phi = np.exp(-grid_step / tau_seconds)
+    white = rng.standard_normal((count, warmup + points))
+    # exp_filter has unit gain: rescale so the output has the requested std
+    coarse = exp_filter(white, grid_step, tau_seconds)[:, warmup:] * std * np.sqrt((1 + phi) / (1 - phi))
+    position = (seconds - seconds[0]) / grid_step
+    index = np.minimum(position.astype(np.int64), points - 2)
+    weight = position - index
+    return coarse[:, index] * (1 - weight) + coarse[:, index + 1] * weight
+
+
+def saturation_vapour_pressure(celsius):
+    """Magnus formula, hPa"""
+    return 6.112 * np.exp(17.62 * celsius / (243.12 + celsius))
+
+
+def wet_season(seconds):
+    """1 around mid January, -1 around mid July (Java monsoon)"""
+    day_of_year = (seconds / 86400.0) % 365.25
+    return np.cos(2 * np.pi * (day_of_year - 15) / 365.25)
+
+
+def local_hours(seconds):
+    return (seconds / 3600.0 + WIB_OFFSET_HOURS) % 24
+
+
+class StormCells:
+    """Catalogue of convective cells over a square region, shared by every device in it.
+
+    Cells start mostly in the afternoon (around 15:00 WIB), are more frequent
+    in the wet season, and drift across the region while they rain. Rain
+    rate at a point falls off as a Gaussian of the distance to the cell
+    centre and rises then decays over the cell's life.
+    """
+
+    def __init__(self, start_epoch, seconds, seed=None, region_km=40.0, per_day=3.0):
+        rng = np.random.default_rng(seed)
+        self.start_epoch = start_epoch
+        self.region_km = region_km
+        days = int(np.ceil(seconds / 86400)) + 1
+        day_starts = start_epoch + 86400 * np.arange(-1, days)  # the day before can still be raining
+        rate = per_day * (1 + 0.6 * wet_season(day_starts))
+        counts = rng.poisson(rate)
+        total = int(counts.sum())
+        # Local day boundaries, then a start hour around mid afternoon
+        local_midnight = day_starts - (day_starts + WIB_OFFSET_HOURS * 3600) % 86400
+        hours = np.clip(rng.normal(15, 2.5, total), 0, 24)
+        self.start = np.repeat(local_midnight, counts) + hours * 3600
+        self.rise = rng.lognormal(np.log(20 * 60), 0.4, total)      # seconds to peak
+        self.peak = np.minimum(rng.gamma(1.5, 10, total), 150.0)      # mm/h at the centre
+        self.radius = rng.lognormal(np.log(6), 0.4, total)            # km
+        margin = 2 * self.radius
+        self.x = rng.uniform(-margin, region_km + margin)
+        self.y = rng.uniform(-margin, region_km + margin)
+        speed = rng.uniform(10, 30, total) / 3600                     # km/s
+        heading = rng.normal(np.pi, 0.6, total)                       # mostly westward drift
+        self.vx = speed * np.cos(heading)
+        self.vy = speed * np.sin(heading)
+
+    def __len__(self):
+        return len(self.start)
+
+    def rain(self, x, y, seconds):
+        """(devices, steps) rain rate in mm/h for devices at (x, y) km"""
+        rain = np.zeros((len(x), len(seconds)))
+        x = np.asarray(x, dtype=float)[:, None]
+        y = np.asarray(y, dtype=float)[:, None]
+        for cell in range(len(self)):
+            start = self.start[cell]
+            rise = self.rise[cell]
+            # t/rise * exp(1 - t/rise): peak at `rise`, down to 1% after ~8 rises
+            first, stop = np.searchsorted(seconds, (start, start + 8 * rise))
+            if first == stop:
+                continue
+            age = seconds[first:stop] - start
+            shape = age / rise * np.exp(1 - age / rise)
+            dx = x - (self.x[cell] + self.vx[cell] * age)
+            dy = y - (self.y[cell] + self.vy[cell] * age)
+            rain[:, first:stop] += self.peak[cell] * shape * np.exp(-(dx * dx + dy * dy) / (2 * self.radius[cell] ** 2))
+        # Tipping-bucket resolution: the far tail of a cell reads as dry
+        rain[rain < 0.2] = 0.0
+        return rain
+
+
+class WeatherModel:
+    """Per-device site parameters plus the shared storm catalogue.
+
+    `storms` may be shared between models (e.g. one per device in separate
+    processes) so they see the same regional weather.
+    """
+
+    def __init__(self, count, start_epoch, steps, step_seconds=60, seed=None, storms=None, region_km=40.0):
+        if steps < 1:
+            raise ValueError(f"A model needs at least one step, got {steps}")
+        self.count = count
+        self.start_epoch = start_epoch
+        self.steps = steps
+        self.step_seconds = step_seconds
+        self.rng = np.random.default_rng(seed)
+        self.seconds = start_epoch + step_seconds * np.arange(steps, dtype=np.float64)
+        if storms is None:
+            storms = StormCells(start_epoch, steps * step_seconds, seed=self.rng.integers(2 ** 63), region_km=region_km)
+        self.storms = storms
+
+        rng = self.rng
+        region = storms.region_km
+        self.x = rng.uniform(0, region, count)
+        self.y = rng.uniform(0, region, count)
+        elevation = rng.uniform(0, 1200, count)                       # m, coast to Garut highlands
+        self.mean_temperature = 27.5 - 0.0065 * elevation             # lapse rate
+        self.amplitude = rng.uniform(3.5, 5.5, count)                 # half the diurnal range
+        self.mean_pressure = rng.uniform(1007, 1013, count)           # reduced to sea level
+        self.base_level = rng.uniform(6, 12, count)                   # cm at dry-season baseflow
+        self.level_gain = rng.lognormal(np.log(12), 0.25, count)      # cm per (mm/h)**0.6
+        self.quick_tau = rng.uniform(30, 60, count) * 60              # Nash cascade reservoirs, s
+
+    def generate(self, fields=FIELDS):
+        """{field: (devices, steps) float array}"""
+        rng = self.rng
+        seconds = self.seconds
+        count = self.count
+        step = self.step_seconds
+        column = np.newaxis
+        hours = local_hours(seconds)
+        season = wet_season(seconds)
+
+        rain = self.storms.rain(self.x, self.y, seconds)
+        # Wetness of the air and ground over the last hour, 0..1
+        recent = exp_filter(rain, step, 3600)
+        wet = recent / (recent + 2.0)
+        # One synoptic anomaly drives temperature, moisture and pressure together
+        synoptic = red_noise(rng, count, seconds, 3 * 86400, 1.0)
+
+        values = {}
+        phase = 2 * np.pi * (hours - 14.5) / 24
+        diurnal = np.cos(phase) + 0.2 * np.cos(2 * phase + 0.5)
+        temperature = (
+            self.mean_temperature[:, column]
+            + self.amplitude[:, column] * diurnal[column, :]
+            + 0.8 * synoptic
+            + red_noise(rng, count, seconds, 1800, 0.3)
+            - 3.0 * wet
+        )
+        values["temperature"] = temperature + 0.05 * rng.standard_normal((count, self.steps))
+
+        if "humidity" in fields:
+            # Night-time air is near saturation; the synoptic anomaly raises the dew point
+            # faster than the temperature, so low-pressure spells are the humid ones
+            dew_point = (
+                self.mean_temperature[:, column] - self.amplitude[:, column] - 0.5
+                + 1.6 * synoptic + red_noise(rng, count, seconds, 6 * 3600, 0.6)
+                + 1.0 * season[column, :]
+            )
+            dew_point = np.minimum(dew_point + wet * (temperature - dew_point), temperature)
+            humidity = 100 * saturation_vapour_pressure(dew_point) / saturation_vapour_pressure(temperature)
+            values["humidity"] = np.clip(humidity + 0.3 * rng.standard_normal((count, self.steps)), 15, 100)
+
+        if "pressure" in fields:
+            tide = 1.2 * np.cos(4 * np.pi * (hours - 10) / 24) + 0.5 * np.cos(2 * np.pi * (hours - 4) / 24)
+            values["pressure"] = (
+                self.mean_pressure[:, column] + tide[column, :]
+                - 1.5 * synoptic + 1.2 * wet
+                + 0.05 * rng.standard_normal((count, self.steps))
+            )
+
+        if "curah_hujan" in fields:
+            values["curah_hujan"] = rain
+
+        if "ketinggian_air" in fields:
+            values["ketinggian_air"] = self.river_level(rain, season)
+
+        return {field: values[field] for field in fields}
+
+    def river_level(self, rain, season):
+        """Rain (mm/h) -> stage (cm): Nash cascade of 3 reservoirs plus a slow baseflow reservoir"""
+        step = self.step_seconds
+        quick = rain * 0.6
+        # Reservoirs differ per device; group devices by rounded time constant to share kernels
+        taus = np.round(self.quick_tau / 300) * 300
+        for tau in np.unique(taus):
+            rows = taus == tau
+            quick[rows] = exp_filter(quick[rows], step, tau, reservoirs=3)
+        slow = exp_filter(rain * 0.15, step, 18 * 3600)
+        flow = np.maximum(quick + slow, 0.0)
+        base = self.base_level[:, np.newaxis] + 3.0 * (1 + season[np.newaxis, :])
+        noise = red_noise(self.rng, self.count, self.seconds, 600, 0.2)
+        return np.maximum(base + self.level_gain[:, np.newaxis] * flow ** 0.6 + noise, 0.0)
+
+
+def lag1_autocorrelation(values):
+    """Mean over devices of the lag-1 autocorrelation"""
+    centred = values - values.mean(axis=1, keepdims=True)
+    numerator = (centred[:, 1:] * centred[:, :-1]).sum(axis=1)
+    denominator = (centred * centred).sum(axis=1)
+    return float(np.mean(numerator[denominator > 0] / denominator[denominator > 0])) if (denominator > 0).any() else 0.0
+
+
+def describe(model, values, elapsed):
+    steps = model.steps
+    print(f"🌦️  {model.count} devices × {steps} steps ({steps * model.step_seconds / 86400:.1f} days every "
+          f"{model.step_seconds}s) | {len(model.storms)} storm cells | generated in {elapsed * 1000:.0f} ms "
+          f"({model.count * steps * len(values) / elapsed / 1e6:.1f} M values/s)")
+    print(f"   {'field':<15} {'mean':>8} {'min':>8} {'max':>8} {'lag-1 r':>8}  (uniform noise: lag-1 r ≈ 0)")
+    for field, array in values.items():
+        print(f"   {field:<15} {array.mean():8.2f} {array.min():8.2f} {array.max():8.2f} {lag1_autocorrelation(array):8.3f}")
+    if {"temperature", "humidity", "pressure"} <= set(values):
+        flat = [values[field].ravel() for field in ("temperature", "humidity", "pressure")]
+        r = np.corrcoef(flat)
+        print(f"   corr temperature~humidity {r[0, 1]:+.2f} | temperature~pressure {r[0, 2]:+.2f} | "
+              f"humidity~pressure {r[1, 2]:+.2f}")
+        per_day = 86400 // model.step_seconds
+        days = steps // per_day
+        if days >= 2:
+            # Daily means remove the diurnal cycle and leave the synoptic anomaly
+            daily = [values[field][:, :days * per_day].reshape(model.count, days, per_day).mean(axis=2).ravel()
+                     for field in ("humidity", "pressure")]
+            print(f"   corr of daily means humidity~pressure {np.corrcoef(daily)[0, 1]:+.2f}")
+    if "curah_hujan" in values:
+        rain = values["curah_hujan"]
+        wet = rain > 0
+        print(f"   raining {wet.mean():.1%} of readings | wettest device {rain.sum(axis=1).max() * model.step_seconds / 3600:.0f} mm")
+    if "ketinggian_air" in values:
+        level = values["ketinggian_air"]
+        print(f"   water level above 40 cm (BAHAYA) {(level > 40).mean():.2%} of readings, "
+              f"20-40 cm (WASPADA) {((level > 20) & (level <= 40)).mean():.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate physically shaped sensor series for a fleet")
+    parser.add_argument("--devices", type=int, default=100, help="number of devices (default 100)")
+    parser.add_argument("--days", type=float, default=7, help="length in days (default 7)")
+    parser.add_argument("--interval", type=int, default=60, help="seconds between readings (default 60)")
+    parser.add_argument("--start", default="2025-01-01T00:00:00", help="first reading, UTC (default 2025-01-01T00:00:00)")
+    parser.add_argument("--region", type=float, default=40, help="side of the square region in km (default 40)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--output", default=None, help="save every field plus timestamps to this .npz file")
+    args = parser.parse_args()
+
+    start_epoch = int(datetime.fromisoformat(args.start).replace(tzinfo=timezone.utc).timestamp())
+    if args.interval < 1:
+        parser.error("--interval must be at least 1 second")
+    steps = int(args.days * 86400 // args.interval)
+    if steps < 1:
+        parser.error(f"--days {args.days} is shorter than one --interval of {args.interval}s")
+    started = time.perf_counter()
+    model = WeatherModel(args.devices, start_epoch, steps, args.interval, seed=args.seed, region_km=args.region)
+    values = model.generate()
+    elapsed = time.perf_counter() - started
+    describe(model, values, elapsed)
+    if args.output:
+        np.savez(args.output, seconds=model.seconds, **{field: array.astype(np.float32) for field, array in values.items()})
+        print(f"💾 Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
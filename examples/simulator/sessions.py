@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+One MQTT session per virtual device, multiplexed over one asyncio event loop.
+
+Every device gets its own paho client (own client id, keepalive and optional
+last will). The clients run without loop_start(): their sockets are
+registered with the event loop through paho's on_socket_* callbacks, so 10k
+sessions cost 10k sockets and no threads. Blocking TCP connects run in a
+small thread pool.
+
+    python -m simulator.sessions --devices 10000 --connect-rate 500 --interval 60 --lwt
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import resource
+import socket
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import fleet
+from .engine import AsyncFleetEngine
+from .faults import FaultInjector, add_fault_arguments
+from .loadgen import latency_histogram, percentile_ms
+from .transport import add_broker_arguments, broker_options
+
+LWT_PAYLOAD = json.dumps({"status": "offline"})
+CONNACK_TIMEOUT = 30
+RECONNECT_MIN_DELAY = 1
+RECONNECT_MAX_DELAY = 60
+
+
+class SessionStats:
+    """Session counters for one reporting window"""
+
+    def __init__(self):
+        self.connects = 0
+        self.reconnects = 0
+        self.failures = 0
+        self.disconnects = 0
+        self.histogram = latency_histogram()
+
+    def add(self, other):
+        self.connects += other.connects
+        self.reconnects += other.reconnects
+        self.failures += other.failures
+        self.disconnects += other.disconnects
+        self.histogram.merge(other.histogram)
+
+
+class DeviceSession:
+    __slots__ = ("device", "client", "connected", "connect_started", "attempts", "connections", "retry_handle", "held")
+
+    def __init__(self, device, client):
+        self.device = device
+        self.client = client
+        self.connected = False
+        self.connect_started = None
+        self.attempts = 0      # connect attempts since the last successful CONNACK
+        self.connections = 0   # successful connects over the whole run
+        self.retry_handle = None
+        self.held = False      # dropped on purpose; no automatic reconnect
+
+
+class SessionMultiplexer:
+    """Owns one paho client per device and drives all their sockets from the event loop.
+
+    publish(topic, payload) routes to the session of the device in the topic
+    and fails while that session is down, so it can be handed to
+    AsyncFleetEngine like any other transport.
+    """
+
+    def __init__(self, devices, broker, port, username=None, password=None, transport="tcp",
+                 keepalive=60, lwt=False, connect_rate=200, connect_workers=32, max_queued=100, seed=None):
+        import paho.mqtt.client as mqtt
+
+        self.mqtt = mqtt
+        self.broker = broker
+        self.port = port
+        self.keepalive = keepalive
+        self.connect_rate = connect_rate
+        self.rng = random.Random(seed)
+        self.executor = ThreadPoolExecutor(max_workers=connect_workers, thread_name_prefix="connect")
+        self.loop = None
+        self.loop_thread = None
+        self.closing = False
+        self.window = SessionStats()
+        self.total = SessionStats()
+        self.on_session_connect = None  # called with the device dict after each CONNACK
+
+        self.sessions = {}
+        for device in devices:
+            client = mqtt.Client(client_id=device["id"], transport=transport)
+            if username:
+                client.username_pw_set(username, password)
+            if port in (443, 8883):
+                client.tls_set(tls_version=ssl.PROTOCOL_TLS)
+            if lwt:
+                client.will_set(f"iot/devices/{device['id']}/status", LWT_PAYLOAD, qos=1)
+            # Bounded per-session memory: a session that is down drops instead of queueing forever
+            client.max_queued_messages_set(max_queued)
+            client.max_inflight_messages_set(20)
+
+            session = DeviceSession(device, client)
+            client.user_data_set(session)
+            client.on_connect = self._on_connect
+            client.on_disconnect = self._on_disconnect
+            client.on_socket_open = self._on_socket_open
+            client.on_socket_close = self._on_socket_close
+            client.on_socket_register_write = self._on_socket_register_write
+            client.on_socket_unregister_write = self._on_socket_unregister_write
+            self.sessions[device["id"]] = session
+
+    @property
+    def active(self):
+        return sum(1 for session in self.sessions.values() if session.connected)
+
+    # --- socket registration (paho calls these from the loop or a connect thread) ---
+
+    def _in_loop(self, callback, *args):
+        if threading.get_ident() == self.loop_thread:
+            callback(*args)
+        else:
+            self.loop.call_soon_threadsafe(callback, *args)
+
+    def _readable(self, client):
+        client.loop_read()
+        # TLS and websocket wrappers can hold decoded bytes the selector never sees
+        sock = client.socket()
+        while sock is not None and hasattr(sock, "pending") and sock.pending():
+            client.loop_read()
+            sock = client.socket()
+
+    def _on_socket_open(self, client, session, sock):
+        self._in_loop(self.loop.add_reader, sock, self._readable, client)
+
+    def _on_socket_close(self, client, session, sock):
+        # Pass the fd, not the socket: paho closes it right after this callback
+        self._in_loop(self.loop.remove_reader, sock.fileno())
+
+    def _on_socket_register_write(self, client, session, sock):
+        self._in_loop(self.loop.add_writer, sock, client.loop_write)
+
+    def _on_socket_unregister_write(self, client, session, sock):
+        self._in_loop(self.loop.remove_writer, sock.fileno())
+
+    # --- session lifecycle ---
+
+    def _connect(self, session):
+        """Runs in the connect pool: blocking TCP (+TLS) connect and CONNECT packet"""
+        session.attempts += 1
+        session.connect_started = time.perf_counter()
+        try:
+            session.client.connect(self.broker, self.port, self.keepalive)
+        except Exception:
+            self.loop.call_soon_threadsafe(self._connect_failed, session)
+
+    def _start_connect(self, session):
+        session.retry_handle = None
+        if self.closing or session.connected or session.held:
+            return
+        self.executor.submit(self._connect, session)
+        # No CONNACK in time counts as a failure and is retried
+        session.retry_handle = self.loop.call_later(CONNACK_TIMEOUT, self._connack_timeout, session)
+
+    def _connack_timeout(self, session):
+        session.retry_handle = None
+        if not session.connected and not self.closing:
+            self._connect_failed(session)
+
+    def _connect_failed(self, session):
+        self.window.failures += 1
+        self._schedule_reconnect(session)
+
+    def _schedule_reconnect(self, session):
+        if self.closing or session.held:
+            return
+        if session.retry_handle is not None:
+            session.retry_handle.cancel()
+        delay = min(RECONNECT_MAX_DELAY, RECONNECT_MIN_DELAY * 2 ** min(session.attempts, 6))
+        session.retry_handle = self.loop.call_later(delay * self.rng.uniform(0.5, 1.0), self._start_connect, session)
+
+    def _on_connect(self, client, session, flags, rc):
+        if rc != 0:
+            self._connect_failed(session)
+            return
+        if session.retry_handle is not None:
+            session.retry_handle.cancel()
+            session.retry_handle = None
+        session.connected = True
+        window = self.window
+        window.connects += 1
+        if session.connections > 0:
+            window.reconnects += 1
+        session.connections += 1
+        window.histogram.record((time.perf_counter() - session.connect_started) * 1e6)
+        session.attempts = 0
+        if self.on_session_connect is not None:
+            self.on_session_connect(session.device)
+
+    def _on_disconnect(self, client, session, rc):
+        was_connected = session.connected
+        session.connected = False
+        if self.closing:
+            return
+        if was_connected:
+            self.window.disconnects += 1
+        self._schedule_reconnect(session)
+
+    # --- fleet-facing API ---
+
+    def drop(self, device_ids):
+        """Cut sessions without DISCONNECT (the broker fires their LWT) and hold them down"""
+        for device_id in device_ids:
+            session = self.sessions[device_id]
+            session.held = True
+            if session.retry_handle is not None:
+                session.retry_handle.cancel()
+                session.retry_handle = None
+            sock = session.client.socket()
+            if sock is not None:
+                # Websocket sessions wrap the TCP socket
+                sock = getattr(sock, "_socket", sock)
+                try:
+                    # paho sees EOF on its next read and runs the normal disconnect path
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def restore(self, device_ids, within=0):
+        """Release held sessions; each reconnects at a random moment within `within` seconds"""
+        for device_id in device_ids:
+            session = self.sessions[device_id]
+            session.held = False
+            session.attempts = 0
+            session.retry_handle = self.loop.call_later(self.rng.uniform(0, within), self._start_connect, session)
+
+    def publish(self, topic, payload, retain=False):
+        session = self.sessions.get(topic.split("/", 3)[2])
+        if session is None or not session.connected:
+            return False
+        return session.client.publish(topic, payload, retain=retain).rc == self.mqtt.MQTT_ERR_SUCCESS
+
+    async def start(self):
+        """Open every session at `connect_rate` per second; returns when the ramp is issued"""
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        self.misc_task = asyncio.ensure_future(self._misc_loop())
+        start = self.loop.time()
+        for index, session in enumerate(self.sessions.values()):
+            due = start + index / self.connect_rate
+            delay = due - self.loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._start_connect(session)
+
+    async def wait_connected(self, timeout):
+        deadline = self.loop.time() + timeout
+        while self.active < len(self.sessions) and self.loop.time() < deadline:
+            await asyncio.sleep(0.2)
+
+    async def _misc_loop(self):
+        # Keepalive PINGREQs and ping timeouts for every session, once a second
+        while not self.closing:
+            for session in self.sessions.values():
+                if session.connected:
+                    session.client.loop_misc()
+            await asyncio.sleep(1)
+
+    def report(self, elapsed):
+        window = self.window
+        self.total.add(window)
+        self.window = SessionStats()
+        print(
+            f"🔌 {time.strftime('%H:%M:%S')} | sessions {self.active}/{len(self.sessions)} | "
+            f"connects {window.connects / elapsed:.1f}/s | reconnects {window.reconnects} | "
+            f"disconnects {window.disconnects} | failures {window.failures} | "
+            f"connect p50 {percentile_ms(window.histogram, 50):.1f} ms "
+            f"p99 {percentile_ms(window.histogram, 99):.1f} ms"
+        )
+
+    async def report_loop(self, interval):
+        last = self.loop.time()
+        while not self.closing:
+            await asyncio.sleep(interval)
+            now = self.loop.time()
+            self.report(now - last)
+            last = now
+
+    async def close(self):
+        self.closing = True
+        for session in self.sessions.values():
+            if session.retry_handle is not None:
+                session.retry_handle.cancel()
+            if session.connected:
+                session.client.disconnect()
+        await asyncio.sleep(0.5)  # let the DISCONNECT packets drain
+        for session in self.sessions.values():
+            sock = session.client.socket()
+            if sock is not None:
+                self.loop.remove_reader(sock)
+                self.loop.remove_writer(sock)
+        self.executor.shutdown(wait=False)
+        self.total.add(self.window)
+        self.window = SessionStats()
+
+    def print_summary(self, rss_before_kb):
+        total = self.total
+        histogram = total.histogram
+        rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print("=" * 60)
+        print(f"🔌 Sessions: {len(self.sessions)} | connects {total.connects} | reconnects {total.reconnects} | "
+              f"disconnects {total.disconnects} | failures {total.failures}")
+        print(
+            f"   Connect time p50 {percentile_ms(histogram, 50):.1f} ms | "
+            f"p90 {percentile_ms(histogram, 90):.1f} ms | "
+            f"p99 {percentile_ms(histogram, 99):.1f} ms | "
+            f"max {percentile_ms(histogram, 100):.1f} ms"
+        )
+        print(f"   Peak RSS {rss_kb / 1024:.0f} MB (~{(rss_kb - rss_before_kb) * 1024 / max(len(self.sessions), 1):.0f} bytes/session)")
+
+
+def raise_file_limit(needed):
+    """Each session holds one socket; lift the soft fd limit as far as allowed"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+    if soft < target:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+    if target < needed:
+        print(f"⚠️  Open file limit is {hard}; only about {hard - 64} sessions can connect (raise ulimit -n)")
+
+
+async def run(args):
+    devices = fleet.make_fleet(args.devices, seed=args.seed)
+    rss_before_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    mux = SessionMultiplexer(
+        devices, keepalive=args.keepalive, lwt=args.lwt, connect_rate=args.connect_rate,
+        connect_workers=args.connect_workers, seed=args.seed, **broker_options(args)
+    )
+    rng = random.Random(args.seed)
+    step = lambda device: fleet.device_step(device, rng)
+    injector = None
+    if args.fault:
+        injector = FaultInjector(args.fault, devices, step, mux.publish, mux=mux, seed=args.seed)
+        step = injector.wrap_step(step)
+    engine = AsyncFleetEngine(
+        devices,
+        step=step,
+        publish=mux.publish,
+        period=args.interval,
+        report_interval=args.report,
+        seed=args.seed
+    )
+
+    print(f"🔌 Opening {args.devices} sessions at {args.connect_rate:.0f}/s "
+          f"(keepalive {args.keepalive}s, LWT {'on' if args.lwt else 'off'})")
+    print("=" * 60)
+    report_task = None
+    try:
+        await mux.start()
+        report_task = asyncio.ensure_future(mux.report_loop(args.report))
+        await mux.wait_connected(CONNACK_TIMEOUT)
+        duration = None if args.duration is None else args.duration * 60
+        if injector is not None:
+            injector.start()
+        await engine.run(duration)
+    finally:
+        if report_task is not None:
+            report_task.cancel()
+        if injector is not None:
+            injector.stop()
+        await mux.close()
+        mux.print_summary(rss_before_kb)
+        if injector is not None:
+            injector.print_summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate devices with one MQTT session each, multiplexed on asyncio")
+    parser.add_argument("--devices", type=int, default=1000, help="number of device sessions (default 1000)")
+    parser.add_argument("--interval", type=float, default=60, help="publish period per device in seconds (default 60)")
+    parser.add_argument("--duration", type=float, default=None, help="run time in minutes after the ramp (default: until Ctrl+C)")
+    parser.add_argument("--keepalive", type=int, default=60, help="MQTT keepalive per session in seconds (default 60)")
+    parser.add_argument("--lwt", action="store_true", help='register {"status":"offline"} as each session\'s last will')
+    parser.add_argument("--connect-rate", type=float, default=200, help="new sessions per second during the ramp (default 200)")
+    parser.add_argument("--connect-workers", type=int, default=32, help="threads doing blocking TCP connects (default 32)")
+    parser.add_argument("--report", type=float, default=10, help="stats report interval in seconds (default 10)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    add_fault_arguments(parser)
+    add_broker_arguments(parser)
+    args = parser.parse_args()
+
+    raise_file_limit(args.devices + 256)
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        print("\n🛑 Simulation stopped by user")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Multi-process sharded fleet simulator with shared-memory statistics.
+
+The fleet is split into one contiguous slice per worker process. Each worker
+owns its slice's state, its own MQTT connection and its own event loop
+(AsyncFleetEngine, or WheelFleetEngine with --mix). Per-second counters
+(published, failed, bytes, publish-call latency buckets) are written into
+one shared-memory block of int64 cells; the parent reads them in place,
+with no queue and no pickling, and prints one aggregated dashboard line per
+second.
+
+    python -m simulator.sharded --devices 100000 --interval 60 --workers 4 --dry-run
+    python -m simulator.sharded --devices 200000 --mix weather:0.2,awlr:0.8 --workers 8 --broker 127.0.0.1 --port 1883 --transport tcp
+"""
+
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import random
+import sys
+import time
+from array import array
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from . import fleet
+from .engine import AsyncFleetEngine
+from .loadgen import latency_histogram, percentile_ms
+from .transport import NullTransport, PahoTransport, add_broker_arguments, broker_options
+
+# Per worker: a header, then a ring of per-second rows
+HEADER = ("state", "second", "devices", "missed")
+FIELDS = ("published", "failed", "bytes", "ticks")
+RING = 16
+# Publish-call latency histogram rows: fixed width, microseconds up to a minute
+LATENCY_MAX_US = 60 * 1000000
+HISTOGRAM_BUCKETS = len(latency_histogram(LATENCY_MAX_US).counts)
+ROW = len(FIELDS) + HISTOGRAM_BUCKETS
+WORKER_CELLS = len(HEADER) + RING * ROW
+
+STARTING, RUNNING, DONE, FAILED = range(4)
+
+
+class SharedCounters:
+    """One worker's view of the shared block: counts in Python ints, rows written once per second.
+
+    Only the owning worker writes its cells. A row is complete once the
+    worker's "second" header cell has moved past it.
+    """
+
+    def __init__(self, buffer, worker_id, start_time):
+        self.cells = buffer.cast("q")
+        self.base = worker_id * WORKER_CELLS
+        self.start_time = start_time
+        self.second = 0
+        self.reset()
+
+    def reset(self):
+        self.published = self.failed = self.bytes = self.ticks = 0
+        self.histogram = latency_histogram(LATENCY_MAX_US)
+
+    def set(self, name, value):
+        self.cells[self.base + HEADER.index(name)] = value
+
+    def record(self, ok, size, started, latency):
+        second = int(started - self.start_time)
+        if second != self.second:
+            self.roll(second)
+        if ok:
+            self.published += 1
+            self.bytes += size
+        else:
+            self.failed += 1
+        self.histogram.record(latency * 1e6)
+
+    def roll(self, second=None):
+        """Write the current second's row and move on to `second` (default: now)"""
+        if second is None:
+            second = int(time.time() - self.start_time)
+        if second <= self.second:
+            return
+        row = self.base + len(HEADER) + (self.second % RING) * ROW
+        cells = self.cells
+        for offset, value in enumerate((self.published, self.failed, self.bytes, self.ticks)):
+            cells[row + offset] = value
+        row += len(FIELDS)
+        cells[row:row + HISTOGRAM_BUCKETS] = array("q", self.histogram.counts)
+        self.reset()
+        self.second = second
+        self.set("second", second)
+
+
+def worker_main(worker_id, args, first, count, shm_name, start_value, go):
+    if not args.verbose:
+        sys.stdout = open(os.devnull, "w")  # the parent prints the dashboard
+    shm = shared_memory.SharedMemory(name=shm_name)
+    counters = None
+    transport = None
+    try:
+        seed = None if args.seed is None else args.seed + worker_id
+        devices = fleet.make_fleet(count, seed=seed, start_index=first + 1)
+        if args.mix:
+            from .timing_wheel import WheelFleetEngine, assign_profiles, parse_mix
+
+            assign_profiles(devices, parse_mix(args.mix), seed=seed)
+            engine_class = WheelFleetEngine
+        else:
+            engine_class = AsyncFleetEngine
+
+        if args.dry_run:
+            transport = NullTransport()
+        else:
+            transport = PahoTransport(client_id=f"sharded-{worker_id}-{random.getrandbits(30)}", **broker_options(args))
+
+        counters = SharedCounters(shm.buf, worker_id, 0.0)
+        counters.set("devices", count)
+        counters.set("state", RUNNING)
+        go.wait()
+        counters.start_time = start_value.value
+
+        clock = time.time
+        send = transport.publish
+
+        def publish(topic, payload):
+            started = clock()
+            ok = send(topic, payload)
+            counters.record(ok, len(payload), started, clock() - started)
+            return ok
+
+        rng = random.Random(seed)
+
+        def step(device):
+            counters.ticks += 1
+            return fleet.device_step(device, rng)
+
+        engine = engine_class(devices, step=step, publish=publish, period=args.interval,
+                              report_interval=3600, seed=seed)
+
+        async def run():
+            async def roll():
+                while True:
+                    await asyncio.sleep(0.1)
+                    counters.roll()  # idle seconds still get a row
+            roller = asyncio.ensure_future(roll())
+            # The deadline is the shared start + duration, however long the setup took
+            duration = None
+            if args.duration is not None:
+                duration = max(counters.start_time + args.duration - clock(), 0.0)
+            try:
+                total = await engine.run(duration)
+                counters.set("missed", total.missed)
+            finally:
+                roller.cancel()
+
+        asyncio.run(run())
+        counters.roll(counters.second + 1)
+        counters.set("state", DONE)
+    except KeyboardInterrupt:
+        if counters is not None:
+            counters.roll(counters.second + 1)
+            counters.set("state", DONE)
+    except Exception as e:
+        sys.stderr.write(f"❌ Worker {worker_id} failed: {e}\n")
+        SharedCounters(shm.buf, worker_id, 0.0).set("state", FAILED)
+    finally:
+        if transport is not None:
+            transport.close()
+        # Release the cast memoryview before closing the mapping
+        counters = None
+        shm.close()
+
+
+class Dashboard:
+    """Reads every worker's rows straight from the shared block"""
+
+    def __init__(self, buffer, workers):
+        self.cells = np.ndarray((workers, WORKER_CELLS), dtype=np.int64, buffer=buffer)
+        self.workers = workers
+        self.next_second = 0
+        self.total = np.zeros(ROW, dtype=np.int64)
+        self.per_worker = np.zeros((workers, len(FIELDS)), dtype=np.int64)
+        self.seconds = 0
+        self.peak_rate = 0
+
+    def header(self, name):
+        return self.cells[:, HEADER.index(name)]
+
+    def rows(self, second):
+        start = len(HEADER) + (second % RING) * ROW
+        return self.cells[:, start:start + ROW]
+
+    def poll(self, final=False):
+        """Print every second that all running workers have finished"""
+        state = self.header("state")
+        seconds = self.header("second")
+        active = state == RUNNING
+        if final or not active.any():
+            complete = int(seconds.max(initial=0))
+        else:
+            complete = int(seconds[active].min())
+        if complete - self.next_second > RING:
+            print(f"⚠️  Dashboard fell {complete - self.next_second - RING} s behind the ring; skipping")
+            self.next_second = complete - RING
+        while self.next_second < complete:
+            rows = self.rows(self.next_second).copy()
+            # Workers that stopped earlier never wrote this second; their ring slot is stale
+            rows[seconds <= self.next_second] = 0
+            self.print_second(self.next_second, rows)
+            self.next_second += 1
+
+    def print_second(self, second, rows):
+        totals = rows.sum(axis=0)
+        self.total += totals
+        self.per_worker += rows[:, :len(FIELDS)]
+        self.seconds += 1
+        published, failed, sent_bytes, ticks = (int(value) for value in totals[:len(FIELDS)])
+        self.peak_rate = max(self.peak_rate, published)
+        histogram = latency_histogram(LATENCY_MAX_US)
+        histogram.add_counts(totals[len(FIELDS):].tolist())
+        per_worker = rows[:, 0]
+        print(
+            f"⏱️  t={second:4d}s | {published:7d} msg/s | workers {int(per_worker.min())}–{int(per_worker.max())} | "
+            f"failed {failed} | {sent_bytes / 1e6:6.2f} MB/s | ticks {ticks} | "
+            f"publish p50 {percentile_ms(histogram, 50):.3f} ms p99 {percentile_ms(histogram, 99):.3f} ms"
+        )
+
+    def print_summary(self, elapsed):
+        published, failed, sent_bytes, ticks = (int(value) for value in self.total[:len(FIELDS)])
+        histogram = latency_histogram(LATENCY_MAX_US)
+        histogram.add_counts(self.total[len(FIELDS):].tolist())
+        seconds = max(self.seconds, 1)
+        print("=" * 60)
+        print(f"📊 {self.workers} workers, {int(self.header('devices').sum())} devices over {elapsed:.1f}s")
+        print(f"   Published: {published} ({published / seconds:.1f} msg/s avg, peak {self.peak_rate}) | "
+              f"Failed: {failed} | Bytes: {sent_bytes} | Device ticks: {ticks}")
+        print("   Per worker: " + " | ".join(
+            f"w{worker} {int(row[0]) / seconds:.0f} msg/s" for worker, row in enumerate(self.per_worker)
+        ))
+        print(f"   Publish call latency p50 {percentile_ms(histogram, 50):.3f} ms | "
+              f"p99 {percentile_ms(histogram, 99):.3f} ms | "
+              f"max bucket {percentile_ms(histogram, 100):.3f} ms")
+        missed = int(self.header("missed").sum())
+        if missed:
+            print(f"⚠️  Missed ticks: {missed} device ticks were due before --duration ran out but never sent "
+                  f"(workers could not keep up; add workers or lengthen --interval)")
+
+
+def run(args):
+    workers = max(1, args.workers)
+    shm = shared_memory.SharedMemory(create=True, size=workers * WORKER_CELLS * 8)
+    shm.buf[:] = bytes(shm.size)
+    start_value = mp.Value("d", 0.0, lock=False)
+    go = mp.Event()
+
+    # Contiguous device slices, sizes differing by at most one
+    bounds = [args.devices * worker // workers for worker in range(workers + 1)]
+    processes = [
+        mp.Process(target=worker_main, daemon=True,
+                   args=(worker, args, bounds[worker], bounds[worker + 1] - bounds[worker], shm.name, start_value, go))
+        for worker in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    dashboard = Dashboard(shm.buf, workers)
+    try:
+        while (dashboard.header("state") == STARTING).any():
+            if not any(process.is_alive() for process in processes):
+                break
+            time.sleep(0.05)
+        failed = int((dashboard.header("state") == FAILED).sum())
+        if failed:
+            print(f"⚠️  {failed} workers failed to start")
+
+        # Everyone connected: start on the next whole second
+        start_value.value = float(int(time.time()) + 1)
+        go.set()
+        print(f"🚀 {args.devices} devices across {workers} workers "
+              f"({'profile mix ' + args.mix if args.mix else f'every {args.interval}s'})")
+        print("=" * 60)
+        while any(process.is_alive() for process in processes):
+            dashboard.poll()
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        print("\n🛑 Simulation stopped by user")
+    finally:
+        for process in processes:
+            process.join(timeout=10)
+        dashboard.poll(final=True)
+        dashboard.print_summary(max(time.time() - start_value.value, 0.0) if start_value.value else 0.0)
+        del dashboard
+        shm.close()
+        shm.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a fleet split across worker processes")
+    parser.add_argument("--devices", type=int, default=100000, help="number of virtual devices (default 100000)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (default: CPU count)")
+    parser.add_argument("--interval", type=float, default=60, help="publish period per device in seconds (default 60)")
+    parser.add_argument("--mix", default=None, help="per-device profiles as in engine --mix (uses the timing wheel)")
+    parser.add_argument("--duration", type=float, default=None, help="run time in seconds (default: until Ctrl+C)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed (worker w uses seed + w)")
+    parser.add_argument("--verbose", action="store_true", help="let workers print their own engine output")
+    parser.add_argument("--dry-run", action="store_true", help="generate messages without publishing to a broker")
+    add_broker_arguments(parser)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""
+DeviceStatusSimulator: the status/sensor simulator the device-status-dummy
+and telegram-testing scripts share.
+
+One class instead of one copy per script: the scripts pick a device set
+(device_sets.py), a status walk (how battery / WiFi / heap drift per cycle)
+and the optional pieces they need: threshold alerts through the event
+engine, columnar recording and the streaming Excel export. Optional pieces
+import their backends (numpy, pyarrow, paho-mqtt) only when enabled, so a
+plain or --dry-run worker starts without them.
+
+    python -m simulator run --devices status --duration 5 --interval 30
+    python -m simulator run --devices monitoring --monitor --excel device_data_log.xlsx
+    python -m simulator run --devices fleet:100 --dry-run --device-delay 0 --duration 1
+"""
+
+import argparse
+import json
+import os
+import random
+import ssl
+import time
+from datetime import datetime, timezone
+
+from .device_sets import DEFAULT_WALKS, DEVICE_SETS, device_set
+from .payload_template import SENSOR_TEMPLATE, STATUS_TEMPLATE
+from .transport import (MQTT_BROKER, MQTT_PASSWORD, MQTT_PORT, MQTT_TRANSPORT, MQTT_USERNAME,
+                        NullTransport, PahoTransport, add_broker_arguments, broker_options)
+
+# Last Will: the broker publishes this on a device's status topic when its session drops
+LWT_PAYLOAD = json.dumps({"status": "offline"})
+LWT_KEEPALIVE = 60
+
+
+class StatusWalk:
+    """Per-cycle drift of generate_device_status: (low, high) steps and floors, optional pinned values"""
+    __slots__ = ("battery", "battery_min", "wifi_rssi", "free_heap", "free_heap_min", "pinned")
+
+    def __init__(self, battery=(-2, 1), battery_min=10, wifi_rssi=(-10, 10), free_heap=(-10000, 5000),
+                 free_heap_min=50000, pinned=None):
+        self.battery = battery
+        self.battery_min = battery_min
+        self.wifi_rssi = wifi_rssi
+        self.free_heap = free_heap
+        self.free_heap_min = free_heap_min
+        self.pinned = pinned or {}
+
+
+STATUS_WALKS = {
+    # device-status-dummy: slow drain, battery never below 10%
+    "steady": StatusWalk(),
+    # telegram-testing: battery only drains, down to 0%, so every alert eventually fires
+    "drain": StatusWalk(battery=(-3, 0), battery_min=0, wifi_rssi=(-5, 5), free_heap=(-5000, 3000), free_heap_min=0),
+    # test-dummy-all-sensor-edit: battery and WiFi held at the bottom to test alerting
+    "low-battery": StatusWalk(battery_min=5, pinned={"battery": 5, "wifi_rssi": -100}),
+}
+
+# Thresholds for event monitoring
+THRESHOLDS = {
+    "battery_critical": 10,
+    "battery_low": 20,
+    "wifi_weak": -80,
+    "memory_low": 10000  # in bytes
+}
+
+# A condition clears only once the value is this far back past its threshold
+HYSTERESIS = {
+    "battery_critical": 3,
+    "battery_low": 3,
+    "wifi_weak": 3,
+    "memory_low": 2000
+}
+
+# Event types
+EVENTS = {
+    "battery_critical": "Battery Critical (Error)",
+    "battery_low": "Low Battery Warning",
+    "wifi_weak": "Weak WiFi Signal",
+    "memory_low": "Low Memory Warning",
+    "device_connected": "Device Connected",
+    "device_disconnected": "Device Disconnected"
+}
+# Events logged when a condition clears (others use "<event> Cleared")
+EXIT_EVENTS = {
+    "device_connected": "device_disconnected"
+}
+
+# Excel export column titles for recorder columns (payload keys keep their names)
+EXPORT_NAMES = {"device_id": "Device ID", "device_name": "Device Name", "type": "Type",
+                "event": "Event", "transition": "Transition", "message": "Message", "timestamp": "Timestamp"}
+
+OTA_OPTIONS = ["available", "up_to_date", "updating", None]
+
+
+class DeviceStatusSimulator:
+    """Publishes status (and sensor data while online) for a list of DeviceRecords, one cycle at a time.
+
+    `monitor` turns on threshold alerts (EventEngine, numpy), `recording_dir`
+    records every payload and alert in columnar part files (pyarrow), and
+    `dry_run` publishes into a NullTransport without a broker.
+    """
+
+    def __init__(self, devices, broker=MQTT_BROKER, port=MQTT_PORT, username=MQTT_USERNAME, password=MQTT_PASSWORD,
+                 transport=MQTT_TRANSPORT, walk="steady", monitor=False, thresholds=None, hysteresis=None,
+                 recording_dir=None, recording_format="parquet", recording_chunk_rows=65536,
+                 dry_run=False, device_delay=1.0, verbose=True, seed=None):
+        self.devices = devices
+        self.broker = broker
+        self.port = port
+        self.username = username
+        self.password = password
+        self.mqtt_transport = transport
+        self.walk = STATUS_WALKS[walk] if isinstance(walk, str) else walk
+        self.dry_run = dry_run
+        self.device_delay = device_delay
+        self.verbose = verbose
+        self.rng = random.Random(seed)
+        self.running = False
+        self.presence_clients = {}  # device_id -> session carrying the device's last will
+        self.client = None
+        self.transport = NullTransport() if dry_run else None
+
+        # Store published data and alerts for export and monitoring, in bounded memory
+        self.data_recorder = self.alert_recorder = None
+        if recording_dir:
+            from .recorder import ALERT_COLUMNS, DATA_COLUMNS, ColumnarRecorder
+
+            run_dir = os.path.join(recording_dir, datetime.now().strftime("%Y%m%d-%H%M%S"))
+            self.data_recorder = ColumnarRecorder(run_dir, "device_data", DATA_COLUMNS,
+                                                  chunk_rows=recording_chunk_rows, format=recording_format)
+            self.alert_recorder = ColumnarRecorder(run_dir, "alerts", ALERT_COLUMNS,
+                                                   chunk_rows=recording_chunk_rows, format=recording_format)
+
+        # Alerts fire on enter/exit transitions only, not on every cycle a condition holds
+        self.event_engine = None
+        if monitor:
+            from .events import EventEngine, conditions_from_thresholds
+
+            conditions = conditions_from_thresholds(
+                THRESHOLDS if thresholds is None else thresholds, HYSTERESIS if hysteresis is None else hysteresis
+            )
+            self.event_engine = EventEngine(conditions, len(devices))
+
+    def mqtt_client(self, client_id=""):
+        import paho.mqtt.client as mqtt
+
+        client = mqtt.Client(client_id=client_id, transport=self.mqtt_transport)
+        if self.username:
+            client.username_pw_set(self.username, self.password)
+        # Set TLS for WSS / MQTTS
+        if self.port in (443, 8883):
+            client.tls_set(tls_version=ssl.PROTOCOL_TLS)
+        return client
+
+    def on_connect(self, client, userdata, flags, rc):
+        if rc == 0:
+            print("✅ Connected to MQTT Broker successfully")
+            self.running = True
+        else:
+            print(f"❌ Failed to connect to MQTT Broker. Return code: {rc}")
+
+    def on_disconnect(self, client, userdata, rc):
+        print("🔌 Disconnected from MQTT Broker")
+        self.running = False
+
+    def on_publish(self, client, userdata, mid):
+        print(f"📤 Message published with ID: {mid}")
+
+    def connect(self, presence=True):
+        """Connect to MQTT broker; `presence` opens a last-will session per device of the set"""
+        if self.dry_run:
+            print("🧪 Dry run: payloads are generated but not published")
+            self.running = True
+            return True
+        try:
+            print(f"🔗 Connecting to MQTT Broker at {self.broker}:{self.port}")
+            self.client = self.mqtt_client()
+            self.client.on_connect = self.on_connect
+            self.client.on_disconnect = self.on_disconnect
+            if self.verbose:
+                self.client.on_publish = self.on_publish
+            self.transport = PahoTransport(client=self.client)
+            self.client.connect(self.broker, self.port, 60)
+            self.client.loop_start()
+            if presence:
+                for device in self.devices:
+                    self.register_last_will(device)
+            time.sleep(2)  # Wait for connection
+            return self.running
+        except Exception as e:
+            print(f"❌ Connection error: {e}")
+            return False
+
+    def register_last_will(self, device):
+        """Open a presence session whose last will marks the device offline"""
+        # A connection carries a single will, so every device needs its own session
+        client = self.mqtt_client(client_id=f"{device.id}-presence")
+        client.will_set(f"iot/devices/{device.id}/status", LWT_PAYLOAD, qos=1)
+        client.connect(self.broker, self.port, LWT_KEEPALIVE)
+        client.loop_start()
+        self.presence_clients[device.id] = client
+
+    def disconnect(self):
+        """Disconnect from MQTT broker"""
+        self.running = False
+        # A clean DISCONNECT discards the will, so a normal stop does not mark devices offline
+        for client in self.presence_clients.values():
+            client.loop_stop()
+            client.disconnect()
+        self.presence_clients.clear()
+        if self.client is not None:
+            self.client.loop_stop()
+            self.client.disconnect()
+
+    def generate_sensor_data(self, device):
+        """Generate random sensor data for a device"""
+        rng = self.rng
+        return {
+            "temperature": round(rng.uniform(20, 35), 1),
+            "humidity": round(rng.uniform(40, 80), 1),
+            "pressure": round(rng.uniform(1000, 1020), 1),
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+
+    def generate_device_status(self, device):
+        """Step the device along the status walk and return its status payload"""
+        rng = self.rng
+        walk = self.walk
+        battery = max(walk.battery_min, min(100, device.battery + rng.randint(*walk.battery)))
+        wifi_rssi = device.wifi_rssi
+        if wifi_rssi is not None:
+            wifi_rssi = max(-100, min(-30, wifi_rssi + rng.randint(*walk.wifi_rssi)))
+        uptime = device.uptime + rng.randint(60, 300)  # Add 1-5 minutes
+        free_heap = device.free_heap
+        if free_heap is not None:
+            free_heap = max(walk.free_heap_min, free_heap + rng.randint(*walk.free_heap))
+        ota_update = rng.choice(OTA_OPTIONS)
+
+        # Update device data; pinned fields stay put while the payload still drifts around them
+        device.battery = walk.pinned.get("battery", battery)
+        device.wifi_rssi = walk.pinned.get("wifi_rssi", wifi_rssi) if wifi_rssi is not None else None
+        device.uptime = uptime
+        device.free_heap = free_heap
+        device.ota_update = ota_update
+
+        return {
+            "status": device.status,
+            "battery": battery,
+            "wifi_rssi": wifi_rssi,
+            "uptime": uptime,
+            "free_heap": free_heap,
+            "ota_update": ota_update,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+
+    def check_events(self):
+        """Evaluate the thresholds for the whole fleet and log only condition changes"""
+        if self.event_engine is None:
+            return
+        from .events import device_columns
+
+        timestamp = datetime.now().isoformat()
+        for transition in self.event_engine.evaluate(device_columns(self.devices, self.event_engine.fields)):
+            if transition.escalated:
+                # battery_low handing off to battery_critical: the critical enter is the alert
+                continue
+            device = self.devices[transition.index]
+            # An exit with its own event (device_connected -> Device Disconnected) is an alert, not a recovery
+            exit_event = None if transition.entered else EXIT_EVENTS.get(transition.key)
+            if transition.entered:
+                event = EVENTS[transition.key]
+            elif exit_event is not None:
+                event = EVENTS[exit_event]
+            else:
+                event = f"{EVENTS[transition.key]} Cleared"
+            alert_entry = {
+                "device_id": device.id,
+                "event": event,
+                "transition": "enter" if transition.entered else "exit",
+                "message": transition.message(),
+                "timestamp": timestamp
+            }
+            if self.alert_recorder is not None:
+                self.alert_recorder.append(alert_entry)
+            icon = "🔔 ALERT" if transition.entered or exit_event is not None else "✅ CLEARED"
+            print(f"{icon}: {alert_entry['event']} for device {device.name} - {alert_entry['message']}")
+
+    def publish_sensor_data(self, device):
+        """Publish sensor data for a device"""
+        if device.status != "online":
+            return
+
+        sensor_data = self.generate_sensor_data(device)
+        topic = f"iot/devices/{device.id}/data"
+
+        try:
+            if self.transport.publish(topic, SENSOR_TEMPLATE.render_mapping(sensor_data)):
+                if self.verbose:
+                    print(f"📊 Sensor data sent for {device.name}: T={sensor_data['temperature']}°C, H={sensor_data['humidity']}%")
+                if self.data_recorder is not None:
+                    self.data_recorder.append({"device_id": device.id, "device_name": device.name, "type": "sensor", **sensor_data})
+            else:
+                print(f"❌ Failed to publish sensor data for {device.name}")
+        except Exception as e:
+            print(f"❌ Error publishing sensor data: {e}")
+
+    def publish_device_status(self, device):
+        """Publish device status"""
+        status_data = self.generate_device_status(device)
+        topic = f"iot/devices/{device.id}/status"
+
+        try:
+            if self.transport.publish(topic, STATUS_TEMPLATE.render_mapping(status_data)):
+                if self.verbose:
+                    print(f"🔋 Status sent for {device.name}: Battery={status_data['battery']}%, WiFi={status_data['wifi_rssi']}dBm")
+                if self.data_recorder is not None:
+                    self.data_recorder.append({"device_id": device.id, "device_name": device.name, "type": "status", **status_data})
+            else:
+                print(f"❌ Failed to publish status for {device.name}")
+        except Exception as e:
+            print(f"❌ Error publishing device status: {e}")
+
+    def simulate_device_offline(self, device):
+        """Randomly simulate device going offline/online"""
+        if self.rng.randint(1, 20) == 1:  # 5% chance
+            if device.status == "online":
+                device.status = "offline"
+                print(f"🔴 {device.name} went OFFLINE")
+            else:
+                device.status = "online"
+                print(f"🟢 {device.name} came ONLINE")
+
+    def run_cycle(self):
+        """One pass over every device, then the alerts for what changed"""
+        for device in self.devices:
+            # Randomly simulate device status changes
+            self.simulate_device_offline(device)
+
+            # Publish device status
+            self.publish_device_status(device)
+
+            # Publish sensor data (only if online)
+            self.publish_sensor_data(device)
+
+            if self.device_delay:
+                time.sleep(self.device_delay)  # Small delay between devices
+
+        self.check_events()
+
+    def export_data_to_excel(self, filename="device_data_log.xlsx"):
+        """Export logged device data and alerts to Excel file"""
+        if self.data_recorder is None:
+            print("⚠️ Recording is off, nothing to export")
+            return
+        if not len(self.data_recorder) and not len(self.alert_recorder):
+            print("⚠️ No data or alerts to export")
+            return
+        from .excel_export import recorder_rows, write_workbook
+
+        # Rows stream from the recorders straight into the workbook
+        written = write_workbook(filename, [
+            ("Device Data", [EXPORT_NAMES.get(name, name) for name in self.data_recorder.names],
+             recorder_rows(self.data_recorder)),
+            ("Alerts", [EXPORT_NAMES.get(name, name) for name in self.alert_recorder.names],
+             recorder_rows(self.alert_recorder)),
+        ])
+
+        print(f"📥 {written['Device Data']} data rows and {written['Alerts']} alerts exported to {filename}")
+
+    def run(self, duration_minutes=None, interval_seconds=60, excel_file=None):
+        """Publish a cycle every `interval_seconds` until the duration ends (None: until Ctrl+C)"""
+        if not self.connect():
+            return
+
+        if duration_minutes is None:
+            print(f"🔄 Starting continuous device status simulation")
+        else:
+            print(f"🚀 Starting device status simulation for {duration_minutes} minutes")
+        print(f"📡 Publishing data every {interval_seconds} seconds")
+        print("Press Ctrl+C to stop")
+        print("=" * 60)
+
+        end_time = None if duration_minutes is None else time.time() + duration_minutes * 60
+        cycle_count = 0
+
+        try:
+            while self.running and (end_time is None or time.time() < end_time):
+                cycle_count += 1
+                print(f"\n🔄 Cycle {cycle_count} - {datetime.now().strftime('%H:%M:%S')}")
+                self.run_cycle()
+
+                if end_time is not None and time.time() + interval_seconds >= end_time:
+                    break
+                print(f"⏱️  Waiting {interval_seconds} seconds for next cycle...")
+                time.sleep(interval_seconds)
+
+        except KeyboardInterrupt:
+            print("\n🛑 Simulation stopped by user")
+        finally:
+            if self.data_recorder is not None:
+                self.data_recorder.flush()
+                self.alert_recorder.flush()
+                if excel_file:
+                    self.export_data_to_excel(excel_file)
+            self.disconnect()
+            if self.dry_run:
+                print(f"🧪 {self.transport.count} messages, {self.transport.bytes} bytes generated")
+            print("✅ Simulation completed")
+
+    def run_simulation(self, duration_minutes=60, interval_seconds=30, excel_file=None):
+        """Run the simulation for specified duration"""
+        self.run(duration_minutes, interval_seconds, excel_file)
+
+    def run_continuous(self, interval_seconds=60, excel_file=None):
+        """Run continuous simulation"""
+        self.run(None, interval_seconds, excel_file)
+
+    def test_connection(self):
+        if self.connect():
+            print("✅ Connection test successful!")
+            time.sleep(2)
+            self.disconnect()
+        else:
+            print("❌ Connection test failed!")
+
+    def run_fleet(self, device_count=10000, interval_seconds=60, duration_minutes=None):
+        """Run template-generated virtual devices on the async engine"""
+        import asyncio
+
+        from . import fleet
+        from .engine import AsyncFleetEngine
+
+        # Keep the per-message log quiet; the engine reports aggregate rates instead
+        self.verbose = False
+        # Last wills belong to the generated devices, not to this simulator's device set
+        if not self.connect(presence=False):
+            return
+
+        devices = fleet.make_fleet(device_count)
+        engine = AsyncFleetEngine(
+            devices,
+            step=fleet.device_step,
+            publish=self.transport.publish,
+            period=interval_seconds
+        )
+
+        print(f"🚀 Starting async fleet simulation: {device_count} virtual devices")
+        print(f"📡 Each device publishes every {interval_seconds} seconds")
+        print("Press Ctrl+C to stop")
+        print("=" * 60)
+
+        async def run(duration):
+            presence = None
+            if not self.dry_run:
+                from .sessions import CONNACK_TIMEOUT, SessionMultiplexer, raise_file_limit
+
+                # One presence session per generated device, multiplexed on this event loop
+                raise_file_limit(device_count + 256)
+                presence = SessionMultiplexer(
+                    devices, self.broker, self.port, self.username, self.password,
+                    transport=self.mqtt_transport, keepalive=LWT_KEEPALIVE, lwt=True
+                )
+                print(f"🔌 Opening {device_count} presence sessions with last wills")
+                await presence.start()
+                await presence.wait_connected(CONNACK_TIMEOUT)
+            try:
+                await engine.run(duration)
+            finally:
+                if presence is not None:
+                    # A clean DISCONNECT discards the wills, so a normal stop marks nobody offline
+                    await presence.close()
+
+        try:
+            asyncio.run(run(None if duration_minutes is None else duration_minutes * 60))
+        except KeyboardInterrupt:
+            print("\n🛑 Simulation stopped by user")
+        finally:
+            self.disconnect()
+            print("✅ Simulation completed")
+
+
+def print_devices(devices, broker, port):
+    print(f"📡 MQTT Broker: {broker}:{port}")
+    print(f"📱 Devices: {len(devices)}")
+    for device in devices[:20]:
+        print(f"   - {device.name} ({device.id[:8]}...)")
+    if len(devices) > 20:
+        print(f"   ... and {len(devices) - 20} more")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish device status and sensor data for a named device set")
+    parser.add_argument("--devices", default="status",
+                        help=f"device set: {', '.join(DEVICE_SETS)} or fleet:<N> (default status)")
+    parser.add_argument("--walk", choices=sorted(STATUS_WALKS), default=None,
+                        help="status drift per cycle (default: the walk the device set was written for)")
+    parser.add_argument("--duration", type=float, default=None, help="run time in minutes (default: until Ctrl+C)")
+    parser.add_argument("--interval", type=float, default=60, help="seconds between cycles (default 60)")
+    parser.add_argument("--device-delay", type=float, default=1.0, help="pause between devices in a cycle (default 1)")
+    parser.add_argument("--monitor", action="store_true", help="threshold alerts with hysteresis (loads numpy)")
+    parser.add_argument("--record", metavar="DIR", default=None, help="record payloads and alerts as columnar parts (loads pyarrow)")
+    parser.add_argument("--record-format", choices=("parquet", "arrow"), default="parquet", help="recording format (default parquet)")
+    parser.add_argument("--excel", metavar="FILE", default=None, help="export the recording to Excel at the end (implies --record recordings)")
+    parser.add_argument("--quiet", action="store_true", help="no per-message output")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for generated fleets and walks")
+    parser.add_argument("--dry-run", action="store_true", help="generate payloads without a broker")
+    parser.add_argument("--check", action="store_true", help="test the broker connection and exit")
+    add_broker_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        devices = device_set(args.devices, seed=args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    record = args.record or ("recordings" if args.excel else None)
+    simulator = DeviceStatusSimulator(
+        devices,
+        walk=args.walk or DEFAULT_WALKS.get(args.devices, "steady"),
+        monitor=args.monitor,
+        recording_dir=record,
+        recording_format=args.record_format,
+        dry_run=args.dry_run,
+        device_delay=args.device_delay,
+        verbose=not args.quiet,
+        seed=args.seed,
+        **broker_options(args)
+    )
+    print("🚀 MQTT Device Status Simulator")
+    print_devices(devices, args.broker, args.port)
+    if args.check:
+        simulator.test_connection()
+    else:
+        simulator.run(args.duration, args.interval, args.excel)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import numpy as np
+
+from .events import EventEngine, conditions_from_thresholds
+from .status_sim import HYSTERESIS, THRESHOLDS
+
+
+def battery_steps(engine, levels):
+    """[(key, entered, escalated), ...] per battery level of a single device"""
+    steps = []
+    for level in levels:
+        columns = {"battery": np.array([level], dtype=np.float64), "wifi_rssi": np.array([np.nan]),
+                   "free_heap": np.array([np.nan]), "online": np.array([1.0])}
+        steps.append(sorted((t.key, t.entered, t.escalated) for t in engine.evaluate(columns)))
+    return steps
+
+
+def test_low_critical_low_hands_off_between_tiers():
+    engine = EventEngine(conditions_from_thresholds(THRESHOLDS, HYSTERESIS, connected_key=None), 1)
+    low, critical, recovered = battery_steps(engine, [15, 8, 14])
+    assert low == [("battery_low", True, False)]
+    # Dropping into critical hands battery_low off; it is not a recovery
+    assert critical == [("battery_critical", True, False), ("battery_low", False, True)]
+    assert recovered == [("battery_critical", False, False), ("battery_low", True, False)]
+
+
+def test_drop_straight_to_critical_enters_critical_only():
+    engine = EventEngine(conditions_from_thresholds(THRESHOLDS, HYSTERESIS, connected_key=None), 1)
+    assert battery_steps(engine, [50, 8, 30]) == [
+        [], [("battery_critical", True, False)], [("battery_critical", False, False)]
+    ]
+
+
+def test_escalated_exit_is_not_reported_as_recovered():
+    engine = EventEngine(conditions_from_thresholds(THRESHOLDS, HYSTERESIS, connected_key=None), 1)
+    battery_steps(engine, [15])
+    columns = {"battery": np.array([8.0]), "wifi_rssi": np.array([np.nan]), "free_heap": np.array([np.nan])}
+    messages = {t.key: t.message() for t in engine.evaluate(columns)}
+    assert messages["battery_low"] == "Battery level 8% (escalated)"
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Hashed timing wheel for mixed-rate fleets.
+
+Real stations publish at different rates (weather stations every 10 s, AWLR
+every minute, LoRa nodes every 15 min) and some sleep between bursts. Each
+virtual device here has its own period, jitter and duty cycle, and every
+fire is filed into the wheel slot of its tick: scheduling is an append,
+firing is a pop, so the cost per event stays the same at 1k or 100k devices
+(loop.call_at keeps a heap, O(log n) per timer).
+
+    python -m simulator.engine --devices 100000 --scheduler wheel --mix weather:0.2,awlr:0.5,lora:0.2,sleepy:0.1 --dry-run
+    python -m simulator.timing_wheel --bench
+"""
+
+import argparse
+import asyncio
+import heapq
+import random
+import time
+
+from .engine import EngineStats, missed_ticks
+
+# period / jitter in seconds; devices with awake + sleep publish only while awake
+# (ESP32 deep_sleep: awake for `awake` seconds, then off for `sleep` seconds)
+PROFILES = {
+    "weather": {"period": 10, "jitter": 0.5, "awake": 0, "sleep": 0},
+    "awlr": {"period": 60, "jitter": 2, "awake": 0, "sleep": 0},
+    "lora": {"period": 900, "jitter": 30, "awake": 0, "sleep": 0},
+    "sleepy": {"period": 60, "jitter": 2, "awake": 300, "sleep": 1800},
+}
+
+
+def parse_profile(spec):
+    """A PROFILES name, or PERIOD[/JITTER[/AWAKE/SLEEP]] in seconds"""
+    if spec in PROFILES:
+        return dict(PROFILES[spec])
+    parts = [float(part) for part in spec.split("/")]
+    if len(parts) not in (1, 2, 4) or parts[0] <= 0:
+        raise ValueError(f"Invalid profile '{spec}' (use {', '.join(PROFILES)} or PERIOD[/JITTER[/AWAKE/SLEEP]])")
+    parts += [0.0] * (4 - len(parts))
+    return dict(zip(("period", "jitter", "awake", "sleep"), parts))
+
+
+def parse_mix(spec):
+    """"weather:0.3,awlr:0.5,900/30:0.2" -> [(name, profile, share), ...]"""
+    mix = []
+    for part in spec.split(","):
+        name, _, share = part.strip().rpartition(":")
+        if not name:
+            name, share = share, "1"
+        mix.append((name, parse_profile(name), float(share)))
+    total = sum(share for _, _, share in mix)
+    if total <= 0:
+        raise ValueError("Profile shares must add up to more than 0")
+    return [(name, profile, share / total) for name, profile, share in mix]
+
+
+def assign_profiles(devices, mix, seed=None):
+    """Give every device a profile from the mix (exact shares, shuffled)"""
+    names = []
+    for name, profile, share in mix:
+        names.extend([(name, profile)] * round(share * len(devices)))
+    names = (names + [(mix[-1][0], mix[-1][1])] * len(devices))[:len(devices)]
+    random.Random(seed).shuffle(names)
+    for device, (name, profile) in zip(devices, names):
+        device["profile"] = name
+        device.update(profile)
+    return devices
+
+
+class TimingWheel:
+    """Hashed wheel of `slots` buckets, one per `tick` seconds.
+
+    Entries are (due tick, item) appended to bucket due % slots. Visiting a
+    bucket hands out the entries that are due and re-files the rest (due a
+    whole revolution or more later) in place, so with a wheel spanning the
+    common periods every entry is touched once per fire.
+    """
+
+    def __init__(self, tick=0.1, slots=4096):
+        if slots & (slots - 1):
+            raise ValueError("slots must be a power of two")
+        self.tick = tick
+        self.mask = slots - 1
+        self.buckets = [[] for _ in range(slots)]
+        self.current = 0  # next tick to visit
+        self.count = 0
+
+    def schedule(self, item, due_tick):
+        due_tick = max(int(due_tick), self.current)
+        self.buckets[due_tick & self.mask].append((due_tick, item))
+        self.count += 1
+
+    def advance(self, to_tick):
+        """Items due up to and including `to_tick`"""
+        due = []
+        buckets = self.buckets
+        mask = self.mask
+        for tick in range(self.current, to_tick + 1):
+            bucket = buckets[tick & mask]
+            if not bucket:
+                continue
+            buckets[tick & mask] = later = []
+            for entry in bucket:
+                if entry[0] <= tick:
+                    due.append(entry[1])
+                else:
+                    later.append(entry)
+        self.current = max(self.current, to_tick + 1)
+        self.count -= len(due)
+        return due
+
+
+class WheelFleetEngine:
+    """Drives a fleet from a TimingWheel with per-device period, jitter and duty cycle.
+
+    Same step/publish contract as AsyncFleetEngine. Device keys "period",
+    "jitter", "awake" and "sleep" override the defaults; see assign_profiles().
+    """
+
+    def __init__(self, devices, step, publish, period=60, tick=0.1, report_interval=10, seed=None):
+        self.devices = devices
+        self.step = step
+        self.publish = publish
+        self.report_interval = report_interval
+        self.rng = random.Random(seed)
+
+        self.periods = [float(device.get("period", period)) for device in devices]
+        self.jitter = [float(device.get("jitter", 0)) for device in devices]
+        self.awake = [float(device.get("awake", 0)) for device in devices]
+        self.sleep = [float(device.get("sleep", 0)) for device in devices]
+        # Nominal fires are anchor + cycle * period; a wake-up moves the anchor
+        self.anchors = [self.rng.uniform(0, p) for p in self.periods]
+        self.cycles = [0] * len(devices)
+        self.duty_origin = [self.rng.uniform(0, a + s) if s else 0.0 for a, s in zip(self.awake, self.sleep)]
+        self.scheduled = [0.0] * len(devices)
+
+        # Enough slots for the longest period in one revolution (capped), power of two
+        span = max(self.periods, default=period) / tick
+        self.wheel = TimingWheel(tick, 1 << min(max(int(span), 1).bit_length(), 16))
+        self.window = EngineStats()
+        self.total = EngineStats()
+        self.wakeups = 0
+        self.loop = None
+        self.start_time = None
+
+    @property
+    def target_rate(self):
+        """Target device ticks per second, counting only awake time"""
+        return sum(
+            (1.0 / p) * (a / (a + s) if s else 1.0)
+            for p, a, s in zip(self.periods, self.awake, self.sleep)
+        )
+
+    def _schedule_next(self, index):
+        nominal = self.anchors[index] + self.cycles[index] * self.periods[index]
+        sleep = self.sleep[index]
+        if sleep:
+            cycle = self.awake[index] + sleep
+            position = (nominal - self.duty_origin[index]) % cycle
+            if position >= self.awake[index]:
+                # Asleep: the device boots at the end of the window and publishes right away
+                nominal += cycle - position
+                self.anchors[index] = nominal
+                self.cycles[index] = 0
+                self.wakeups += 1
+        jitter = self.jitter[index]
+        at = nominal + (self.rng.uniform(-jitter, jitter) if jitter else 0.0)
+        # Jitter may pull a fire before the tick the wheel is on; that is not lag
+        at = max(at, self.wheel.current * self.wheel.tick)
+        self.scheduled[index] = at
+        self.wheel.schedule(index, at / self.wheel.tick)
+
+    def _fire(self, index, now):
+        window = self.window
+        lag = now - self.scheduled[index]
+        if lag > window.max_lag:
+            window.max_lag = lag
+        window.ticks += 1
+        for topic, payload in self.step(self.devices[index]):
+            if self.publish(topic, payload):
+                window.published += 1
+                window.bytes += len(payload)
+            else:
+                window.failed += 1
+        self.cycles[index] += 1
+        self._schedule_next(index)
+
+    def report(self, elapsed):
+        window = self.window
+        self.total.add(window)
+        self.window = EngineStats()
+        print(
+            f"⏱️  {time.strftime('%H:%M:%S')} | devices {len(self.devices)} | "
+            f"target {self.target_rate:.1f} ticks/s | achieved {window.ticks / elapsed:.1f} ticks/s | "
+            f"{window.published / elapsed:.1f} msg/s | failed {window.failed} | "
+            f"max lag {window.max_lag * 1000:.1f} ms | wake-ups {self.wakeups}"
+        )
+
+    async def run(self, duration=None):
+        """Run until `duration` seconds have passed (or forever when None)"""
+        self.loop = asyncio.get_running_loop()
+        self.start_time = self.loop.time()
+        for index in range(len(self.devices)):
+            self._schedule_next(index)
+
+        tick = self.wheel.tick
+        last_report = 0.0
+        try:
+            while duration is None or self.loop.time() - self.start_time < duration:
+                now = self.loop.time() - self.start_time
+                for index in self.wheel.advance(int(now / tick)):
+                    if duration is not None and self.loop.time() - self.start_time >= duration:
+                        # Overloaded past the deadline: the rest of this batch counts as missed
+                        break
+                    self._fire(index, now)
+                if now - last_report >= self.report_interval:
+                    self.report(now - last_report)
+                    last_report = now
+                # Sleep to the next tick boundary
+                await asyncio.sleep(max(0.0, (int(now / tick) + 1) * tick - (self.loop.time() - self.start_time)))
+        finally:
+            if duration is not None:
+                self.window.missed = missed_ticks(self.scheduled, self.periods, duration)
+            self.total.add(self.window)
+            self.window = EngineStats()
+
+        self.print_summary(self.loop.time() - self.start_time)
+        return self.total
+
+    def print_summary(self, elapsed):
+        total = self.total
+        achieved = total.ticks / elapsed if elapsed > 0 else 0
+        print("=" * 60)
+        print(f"📊 {len(self.devices)} devices over {elapsed:.1f}s (timing wheel, {self.wheel.mask + 1} slots × {self.wheel.tick}s)")
+        print(f"   Target rate:   {self.target_rate:.1f} ticks/s")
+        print(f"   Achieved rate: {achieved:.1f} ticks/s ({total.published / elapsed if elapsed > 0 else 0:.1f} msg/s)")
+        print(f"   Published: {total.published} | Failed: {total.failed} | Bytes: {total.bytes}")
+        print(f"   Max schedule lag: {total.max_lag * 1000:.1f} ms | wake-ups from deep sleep: {self.wakeups}")
+        if total.missed:
+            print(f"   Missed ticks: {total.missed} (due before the deadline, engine could not keep up)")
+
+
+class HeapQueue:
+    """TimingWheel interface on a binary heap, the structure behind loop.call_at (benchmark baseline)"""
+
+    def __init__(self, tick=0.1):
+        self.tick = tick
+        self.heap = []
+        self.counter = 0
+        self.current = 0  # next tick to visit, as in TimingWheel
+
+    def schedule(self, item, due_tick):
+        self.counter += 1
+        heapq.heappush(self.heap, (max(int(due_tick), self.current), self.counter, item))
+
+    def advance(self, to_tick):
+        due = []
+        heap = self.heap
+        while heap and heap[0][0] <= to_tick:
+            due.append(heapq.heappop(heap)[2])
+        self.current = max(self.current, to_tick + 1)
+        return due
+
+
+def benchmark(sizes, mix, seconds=600.0):
+    """Scheduler cost per event on a virtual clock: timing wheel vs a heap"""
+    print(f"{'devices':>10} {'events':>10} {'wheel ns/event':>15} {'heap ns/event':>14}")
+    for size in sizes:
+        devices = assign_profiles([{} for _ in range(size)], mix, seed=0)
+        results = []
+        for queue in ("wheel", "heap"):
+            engine = WheelFleetEngine(devices, step=lambda device: (), publish=None, seed=0)
+            if queue == "heap":
+                engine.wheel = HeapQueue(engine.wheel.tick)
+            start = time.perf_counter()
+            for index in range(size):
+                engine._schedule_next(index)
+            events = 0
+            for tick_index in range(int(seconds / engine.wheel.tick)):
+                for index in engine.wheel.advance(tick_index):
+                    engine.cycles[index] += 1
+                    engine._schedule_next(index)
+                    events += 1
+            results.append((time.perf_counter() - start) / (events + size) * 1e9)
+        print(f"{size:>10} {events:>10} {results[0]:>15.0f} {results[1]:>14.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Timing-wheel scheduler benchmark")
+    parser.add_argument("--bench", action="store_true", help="measure scheduling cost per event for growing fleets")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="fleet sizes to measure (default 1000,10000,100000)")
+    parser.add_argument("--mix", default="weather:0.2,awlr:0.5,lora:0.2,sleepy:0.1",
+                        help="profile mix, e.g. weather:0.2,awlr:0.5,900/30:0.3")
+    parser.add_argument("--seconds", type=float, default=600, help="virtual seconds to simulate (default 600)")
+    args = parser.parse_args()
+    if not args.bench:
+        parser.print_help()
+        return
+    benchmark([int(size) for size in args.sizes.split(",")], parse_mix(args.mix), args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Trace-driven simulator: replay recorded traffic with its original timing.
+
+Sources are the Excel logs written by export_data_to_excel in
+telegram-testing/test-dummy-all-sensor.py (device_data_log.xlsx,
+device-test-17062025.xlsx; "Device Data" sheet) and the bridge's capture
+files (mqtt-to-supabase/capture.py, .ndjson / .ndjson.gz). Each source is
+converted once into a columnar cache next to it (<source>.trace.npz: arrival
+times, topic indexes, one payload blob) that later runs load directly.
+Several sources are overlaid, each starting at the same moment.
+
+Playback keeps the recorded inter-arrival gaps, optionally scaled with
+--speed, and can multiply the trace across cloned device ids so a handful of
+real devices become a fleet with the same bursty shape.
+
+    python -m simulator.trace ../device_data_log.xlsx --info
+    python -m simulator.trace ../device-test-17062025.xlsx --speed 10 --clones 100 --clone-spread 30 --dry-run
+    python -m simulator.trace capture.ndjson.gz --loop 3 --retime --broker 127.0.0.1 --port 1883 --transport tcp
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import uuid
+from datetime import datetime
+
+import numpy as np
+
+from .faults import shift_timestamp
+from .transport import NullTransport, PahoTransport, add_broker_arguments, broker_options
+
+CACHE_VERSION = 1
+_DEVICE_TOPIC = re.compile(r"^(iot/devices/)([^/]+)(/.*)$")
+# Fields the simulators send as integers; Excel hands them back as floats
+INT_FIELDS = {"battery", "wifi_rssi", "uptime", "free_heap"}
+
+
+def parse_timestamp(value):
+    if isinstance(value, datetime):
+        return value.timestamp()
+    text = str(value).strip()
+    return datetime.fromisoformat(text[:-1] + "+00:00" if text.endswith("Z") else text).timestamp()
+
+
+def read_excel_log(path):
+    """Yield (timestamp, topic, payload bytes) from an export_data_to_excel workbook"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        # Long exports continue on "Device Data (2)", "Device Data (3)", ...
+        for name in workbook.sheetnames:
+            if name == "Device Data" or name.startswith("Device Data ("):
+                yield from read_excel_sheet(workbook[name])
+    finally:
+        workbook.close()
+
+
+def read_excel_sheet(sheet):
+    rows = sheet.iter_rows(values_only=True)
+    header = next(rows)
+    fields = header[4:]  # after Device ID, Device Name, Type, Timestamp
+    for row in rows:
+        device_id, _, kind, timestamp = row[:4]
+        if device_id is None or timestamp is None:
+            continue
+        payload = {}
+        for field, value in zip(fields, row[4:]):
+            if value is None or value == "" or (isinstance(value, float) and value != value):
+                continue
+            if field in INT_FIELDS and isinstance(value, float) and value.is_integer():
+                value = int(value)
+            payload[field] = value
+        # Streaming exports keep the payload timestamp only in the Timestamp column
+        payload.setdefault("timestamp", timestamp.isoformat() if isinstance(timestamp, datetime) else str(timestamp))
+        topic = f"iot/devices/{device_id}/{'status' if kind == 'status' else 'data'}"
+        yield parse_timestamp(timestamp), topic, json.dumps(payload).encode("utf-8")
+
+
+def read_capture_file(path):
+    # capture.py lives with the bridge; it has no dependencies of its own
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mqtt-to-supabase"))
+    from capture import read_capture
+
+    return read_capture(path)
+
+
+def read_source(path):
+    if path.endswith((".xlsx", ".xlsm")):
+        return read_excel_log(path)
+    return read_capture_file(path)
+
+
+class Trace:
+    """Recorded messages as columns: arrival time, topic index, payload slice of one blob"""
+
+    def __init__(self, times, topic_index, topics, offsets, blob):
+        self.times = times
+        self.topic_index = topic_index
+        self.topics = list(topics)
+        self.offsets = offsets
+        self.blob = blob
+
+    @classmethod
+    def from_records(cls, records):
+        records = sorted(records, key=lambda record: record[0])
+        topics = {}
+        payloads = []
+        for _, topic, payload in records:
+            topics.setdefault(topic, len(topics))
+            payloads.append(payload)
+        offsets = np.zeros(len(records) + 1, dtype="i8")
+        np.cumsum([len(payload) for payload in payloads], out=offsets[1:])
+        return cls(
+            np.array([record[0] for record in records], dtype="f8"),
+            np.array([topics[record[1]] for record in records], dtype="u4"),
+            list(topics),
+            offsets,
+            np.frombuffer(b"".join(payloads), dtype="u1"),
+        )
+
+    @classmethod
+    def merge(cls, traces):
+        """Overlay several traces as if they had been recorded at the same time"""
+        traces = [trace for trace in traces if len(trace)]
+        if len(traces) == 1:
+            return traces[0]
+        start = traces[0].times[0] if traces else 0.0
+        return cls.from_records(
+            record for trace in traces for record in trace.records(shift=start - trace.times[0])
+        )
+
+    def records(self, shift=0.0):
+        blob = self.blob.tobytes()
+        times = (self.times + shift).tolist()
+        offsets = self.offsets.tolist()
+        for i, topic_index in enumerate(self.topic_index.tolist()):
+            yield times[i], self.topics[topic_index], blob[offsets[i]:offsets[i + 1]]
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def duration(self):
+        return float(self.times[-1] - self.times[0]) if len(self) else 0.0
+
+    def save(self, path):
+        with open(path, "wb") as handle:
+            np.savez(
+                handle, version=np.array(CACHE_VERSION), times=self.times, topic_index=self.topic_index,
+                topics=np.array(self.topics, dtype=str), offsets=self.offsets, blob=self.blob,
+            )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != CACHE_VERSION:
+                raise ValueError(f"{path}: cache version {int(data['version'])}, expected {CACHE_VERSION}")
+            return cls(data["times"], data["topic_index"], data["topics"].tolist(), data["offsets"], data["blob"])
+
+    def device_ids(self):
+        ids = []
+        for topic in self.topics:
+            match = _DEVICE_TOPIC.match(topic)
+            if match and match.group(2) not in ids:
+                ids.append(match.group(2))
+        return ids
+
+    def describe(self):
+        """Shape of the traffic: rates, gaps and how bursty it is"""
+        if len(self) < 2:
+            return f"{len(self)} messages"
+        gaps = np.diff(self.times)
+        per_second = np.bincount((self.times - self.times[0]).astype("i8"))
+        # Coefficient of variation of the gaps: 1 for Poisson arrivals, higher = burstier
+        cv = gaps.std() / gaps.mean() if gaps.mean() > 0 else float("inf")
+        return (
+            f"{len(self)} messages | {len(self.device_ids())} devices | {len(self.topics)} topics | "
+            f"{self.duration:.1f}s | {int(self.offsets[-1]) / 1024:.1f} KB payloads\n"
+            f"   mean {len(self) / max(self.duration, 1e-9):.2f} msg/s | peak {per_second.max()} msg/s | "
+            f"gap p50 {np.percentile(gaps, 50) * 1000:.1f} ms, p99 {np.percentile(gaps, 99) * 1000:.1f} ms, "
+            f"max {gaps.max():.2f}s | burstiness (gap CV) {cv:.2f}"
+        )
+
+
+def load_trace(path, rebuild=False):
+    """Trace for `path`, converting it once into <path>.trace.npz"""
+    cache = path + ".trace.npz"
+    if not rebuild and os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(path):
+        return Trace.load(cache), cache, False
+    trace = Trace.from_records(read_source(path))
+    trace.save(cache)
+    return trace, cache, True
+
+
+def clone_id(device_id, clone):
+    """Stable UUID for the `clone`-th copy of a device; clone 0 is the device itself"""
+    if clone == 0:
+        return device_id
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"trace-clone/{device_id.strip()}/{clone}"))
+
+
+def clone_topics(topics, clones):
+    """topics[clone][topic_index] with the device id swapped for each clone"""
+    tables = []
+    for clone in range(clones):
+        table = []
+        for topic in topics:
+            match = _DEVICE_TOPIC.match(topic)
+            table.append(topic if match is None else match.group(1) + clone_id(match.group(2), clone) + match.group(3))
+        tables.append(table)
+    return tables
+
+
+class TracePlayer:
+    """Publishes a trace with its recorded timing.
+
+    Each loop plays every clone once; clone c starts `offsets[c]` seconds
+    (0..clone_spread, seeded) after the loop start so clones do not fire in
+    perfect lockstep. With `retime`, each payload timestamp is moved by the
+    distance between the recorded arrival and the (scheduled) send time.
+    """
+
+    def __init__(self, trace, publish, speed=1.0, clones=1, clone_spread=0.0, loops=1, retime=False, seed=0):
+        self.trace = trace
+        self.publish = publish
+        self.speed = speed
+        self.clones = clones
+        self.loops = loops
+        self.retime = retime
+        self.topics = clone_topics(trace.topics, clones)
+        rng = np.random.default_rng(seed)
+        self.clone_offsets = np.concatenate([[0.0], rng.uniform(0, clone_spread, clones - 1)]) if clones > 1 else np.zeros(1)
+        self.relative = trace.times - trace.times[0] if len(trace) else trace.times
+        gaps = np.diff(trace.times)
+        # Leave a typical gap between the end of one loop and the start of the next
+        self.period = trace.duration + float(self.clone_offsets.max()) + (float(np.median(gaps)) if len(gaps) else 1.0)
+        self.published = self.failed = self.bytes = 0
+
+    def schedule(self, loop):
+        """(trace time offsets, message index, clone index) of one loop, in send order"""
+        times = (self.relative[None, :] + self.clone_offsets[:, None] + loop * self.period).ravel()
+        order = np.argsort(times, kind="stable")
+        messages = len(self.trace)
+        return times[order], order % messages, order // messages
+
+    def play(self, report_every=5.0):
+        blob = self.trace.blob.tobytes()
+        offsets = self.trace.offsets.tolist()
+        topic_index = self.trace.topic_index.tolist()
+        times_list = self.trace.times.tolist()
+        wall_start = time.time()
+        next_report = wall_start + report_every
+        last_published = 0
+        for loop in range(self.loops):
+            times, messages, clones = self.schedule(loop)
+            for at, message, clone in zip(times.tolist(), messages.tolist(), clones.tolist()):
+                send_at = wall_start + at / self.speed if self.speed > 0 else time.time()
+                now = time.time()
+                if send_at > now:
+                    time.sleep(send_at - now)
+                payload = blob[offsets[message]:offsets[message + 1]]
+                if self.retime:
+                    shift = send_at - times_list[message]
+                    payload = shift_timestamp(payload.decode("utf-8"), shift).encode("utf-8")
+                if self.publish(self.topics[clone][topic_index[message]], payload):
+                    self.published += 1
+                    self.bytes += len(payload)
+                else:
+                    self.failed += 1
+                now = time.time()
+                if now >= next_report:
+                    rate = (self.published - last_published) / (now - next_report + report_every)
+                    print(f"📼 loop {loop + 1}/{self.loops} | trace t+{at:8.1f}s | published {self.published} | "
+                          f"failed {self.failed} | {rate:.1f} msg/s")
+                    last_published = self.published
+                    next_report = now + report_every
+        return time.time() - wall_start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded device traffic with its original timing")
+    parser.add_argument("sources", nargs="+", help="device_data_log.xlsx-style workbooks and/or bridge capture files")
+    parser.add_argument("--speed", type=float, default=1.0, help="time scale, 10 = ten times faster, 0 = as fast as possible (default 1)")
+    parser.add_argument("--clones", type=int, default=1, help="copies of every device, each with its own device id (default 1)")
+    parser.add_argument("--clone-spread", type=float, default=0.0, help="start clones up to this many trace seconds apart (default 0)")
+    parser.add_argument("--loop", type=int, default=1, help="play the trace this many times (default 1)")
+    parser.add_argument("--retime", action="store_true", help="shift payload timestamps to match the replay clock")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for clone offsets (default 0)")
+    parser.add_argument("--rebuild-cache", action="store_true", help="re-read the sources even if a cache exists")
+    parser.add_argument("--info", action="store_true", help="only load the trace and print its shape")
+    parser.add_argument("--dry-run", action="store_true", help="play without publishing to a broker")
+    add_broker_arguments(parser)
+    args = parser.parse_args()
+
+    traces = []
+    for path in args.sources:
+        start = time.perf_counter()
+        trace, cache, built = load_trace(path, rebuild=args.rebuild_cache)
+        action = "converted to" if built else "loaded from"
+        print(f"📂 {path}: {len(trace)} messages {action} {cache} in {(time.perf_counter() - start) * 1000:.1f} ms")
+        traces.append(trace)
+    trace = Trace.merge(traces)
+    if len(trace) == 0:
+        print("⚠️ No messages in the trace")
+        return
+    print(f"📈 {trace.describe()}")
+    if args.info:
+        return
+
+    expected = len(trace) * args.clones * args.loop
+    duration = trace.duration / args.speed if args.speed > 0 else 0
+    print(f"▶️  Replaying {expected} messages ({args.clones} clones × {args.loop} loops) at {args.speed:g}x, "
+          f"~{duration * args.loop:.0f}s")
+
+    transport = NullTransport() if args.dry_run else PahoTransport(**broker_options(args))
+    player = TracePlayer(
+        trace, transport.publish, speed=args.speed, clones=args.clones,
+        clone_spread=args.clone_spread, loops=args.loop, retime=args.retime, seed=args.seed,
+    )
+    print("=" * 60)
+    elapsed = 0.0
+    try:
+        elapsed = player.play()
+    except KeyboardInterrupt:
+        print("\n🛑 Replay stopped by user")
+    finally:
+        transport.close()
+    rate = player.published / elapsed if elapsed > 0 else 0
+    print(f"✅ Published {player.published} | failed {player.failed} | {player.bytes / 1024:.1f} KB | "
+          f"{elapsed:.1f}s ({rate:.1f} msg/s)")
+
+
+if __name__ == "__main__":
+    main()
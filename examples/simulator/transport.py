@@ -0,0 +1,80 @@
+import ssl
+import time
+
+# Defaults match device-status-dummy/mqtt_device_status.py
+MQTT_BROKER = "mqtt.astrodev.cloud"
+MQTT_PORT = 443
+MQTT_USERNAME = "astrodev"
+MQTT_PASSWORD = "Astroboy26@"
+MQTT_TRANSPORT = "websockets"
+
+
+class NullTransport:
+    """Accepts every publish without a broker; for measuring the generator alone"""
+
+    def __init__(self):
+        self.count = 0
+        self.bytes = 0
+
+    def publish(self, topic, payload, retain=False):
+        self.count += 1
+        self.bytes += len(payload)
+        return True
+
+    def close(self):
+        pass
+
+
+class PahoTransport:
+    """Publishes through a paho-mqtt client (an existing one, or a new connection)"""
+
+    def __init__(self, client=None, broker=MQTT_BROKER, port=MQTT_PORT, username=MQTT_USERNAME,
+                 password=MQTT_PASSWORD, transport=MQTT_TRANSPORT, client_id="", keepalive=60):
+        import paho.mqtt.client as mqtt
+
+        self.mqtt = mqtt
+        self.owns_client = client is None
+        if client is None:
+            client = mqtt.Client(client_id=client_id, transport=transport)
+            if username:
+                client.username_pw_set(username, password)
+            if port in (443, 8883):
+                client.tls_set(tls_version=ssl.PROTOCOL_TLS)
+            # Let the outgoing queue grow instead of rejecting bursts
+            client.max_queued_messages_set(0)
+            client.max_inflight_messages_set(1000)
+            print(f"🔗 Connecting to MQTT Broker at {broker}:{port}")
+            client.connect(broker, port, keepalive)
+            client.loop_start()
+            time.sleep(2)  # Wait for connection
+        self.client = client
+
+    def publish(self, topic, payload, retain=False):
+        return self.client.publish(topic, payload, retain=retain).rc == self.mqtt.MQTT_ERR_SUCCESS
+
+    def close(self):
+        if self.owns_client:
+            self.client.loop_stop()
+            self.client.disconnect()
+
+
+def add_broker_arguments(parser):
+    """Broker connection options shared by the simulator CLIs"""
+    group = parser.add_argument_group("broker")
+    group.add_argument("--broker", default=MQTT_BROKER, help=f"MQTT broker host (default {MQTT_BROKER})")
+    group.add_argument("--port", type=int, default=MQTT_PORT, help=f"MQTT broker port (default {MQTT_PORT})")
+    group.add_argument("--username", default=MQTT_USERNAME, help="MQTT username")
+    group.add_argument("--password", default=MQTT_PASSWORD, help="MQTT password")
+    group.add_argument("--transport", default=MQTT_TRANSPORT, choices=("tcp", "websockets"), help=f"MQTT transport (default {MQTT_TRANSPORT})")
+    return group
+
+
+def broker_options(args):
+    """Keyword arguments for PahoTransport from parsed broker arguments"""
+    return {
+        "broker": args.broker,
+        "port": args.port,
+        "username": args.username or None,
+        "password": args.password or None,
+        "transport": args.transport,
+    }
@@ -12,6 +12,9 @@ MQTT_USERNAME = None
 MQTT_PASSWORD = None
 MQTT_TRANSPORT = "tcp"
 
+# Last Will: the broker publishes this on the status topic when the session drops
+LWT_PAYLOAD = json.dumps({"status": "offline"})
+
 SENSORS = {
     "temperature": (0, 100),
     "humidity": (0, 100),
@@ -30,6 +33,7 @@ class DeviceSimulator:
         self.device_id = device_id
         self.client = mqtt.Client(transport=MQTT_TRANSPORT)
         self.client.username_pw_set(MQTT_USERNAME, MQTT_PASSWORD)
+        self.client.will_set(f"iot/devices/{device_id}/status", LWT_PAYLOAD, qos=1)
         self.client.on_connect = self.on_connect
         self.client.on_disconnect = self.on_disconnect
         self.client.on_publish = self.on_publish
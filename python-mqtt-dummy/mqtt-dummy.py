@@ -6,7 +6,14 @@ import time
 from datetime import datetime, timedelta
 import sys
 import os
-from typing import Dict, Tuple, Optional
+from typing import Tuple, Optional
+
+# Skenario, timeline & payload template dari paket simulator bersama (examples/simulator).
+# SCENARIOS (NORMAL/WASPADA/BAHAYA/EXTREME_WEATHER) didefinisikan di simulator/awlr.py;
+# SENSOR_TEMPLATE/STATUS_TEMPLATE adalah bentuk payload AWLR yang dikompilasi sekali.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "examples"))
+from simulator.awlr import SCENARIOS, SENSOR_TEMPLATE, STATUS_TEMPLATE, TIMELINES, parse_timeline
+from simulator.device_state import DeviceRecord, device_records
 
 # --- KONFIGURASI MQTT ---
 MQTT_BROKER = os.getenv("MQTT_BROKER", "147.139.247.39")
@@ -14,44 +21,22 @@ MQTT_PORT = int(os.getenv("MQTT_PORT", 1883))
 MQTT_USERNAME = os.getenv("MQTT_USERNAME", "astrodev")
 MQTT_PASSWORD = os.getenv("MQTT_PASSWORD", "Astroboy26@")
 
+# --- LAST WILL ---
+# Broker mempublish ini ke topik status device jika sesi terputus tanpa DISCONNECT.
+# Retained, sama seperti status_payload, agar status terakhir di broker tetap konsisten.
+LWT_PAYLOAD = json.dumps({"status": "offline"})
+LWT_KEEPALIVE = 60
+
 # --- DEBUG MODE ---
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 
-# --- DEFINISI SKENARIO ---
-SCENARIOS = {
-    "NORMAL": {
-        "desc": "[OK] AMAN (Air Rendah, Cerah)",
-        "water_range": (5.0, 19.0),
-        "rain_range": (0.0, 0.0),
-        "batt_range": (80, 100)
-    },
-    "WASPADA": {
-        "desc": "[!] WASPADA (Air Sedang, Hujan Ringan)",
-        "water_range": (20.5, 39.5),
-        "rain_range": (1.0, 5.0),
-        "batt_range": (60, 80)
-    },
-    "BAHAYA": {
-        "desc": "[!!] BAHAYA (Banjir, Hujan Deras)",
-        "water_range": (41.0, 65.0),
-        "rain_range": (10.0, 20.0),
-        "batt_range": (40, 60)
-    },
-    "EXTREME_WEATHER": {
-        "desc": "[!!!] CUACA EKSTREM (Air Normal, Hujan Badai)",
-        "water_range": (10.0, 18.0),
-        "rain_range": (25.0, 50.0),
-        "batt_range": (10, 15)
-    }
-}
-
 # --- DAFTAR DEVICE ---
-DEVICES = [
+DEVICES = device_records([
     {"id": "51c11d31-1e00-47a5-b5fe-646bda4c3317", "name": "AWLR 1 (Pos 1)", "scenario": "NORMAL", "uptime": 3660},
     {"id": "aac7d59f-595f-4b61-83bd-cab4641f3ab7", "name": "AWLR 2 (Pos 2)", "scenario": "WASPADA", "uptime": 7200},
     {"id": "a76ad429-b475-4baa-8876-76a4ab0909d9", "name": "AWLR 3 (Pos 3)", "scenario": "BAHAYA", "uptime": 14400},
     {"id": "1c7ab70e-3805-4a42-a786-25c31749e9f8", "name": "AWLR 4 (Pos 4)", "scenario": "EXTREME_WEATHER", "uptime": 1980}
-]
+])
 
 class DeviceManualTrigger:
     def __init__(self):
@@ -62,6 +47,7 @@ class DeviceManualTrigger:
         self.connected = False
         self.reconnect_count = 0
         self.max_reconnect = 3
+        self.presence_clients = {}  # device_id -> session carrying the device's last will
 
     def on_connect(self, client, userdata, flags, rc, properties=None):
         if rc == 0:
@@ -85,6 +71,8 @@ class DeviceManualTrigger:
             print("[INFO] Connecting to {}:{}...".format(MQTT_BROKER, MQTT_PORT))
             self.client.connect(MQTT_BROKER, MQTT_PORT, 60)
             self.client.loop_start()
+            for dev in DEVICES:
+                self.register_last_will(dev)
             
             # Wait for connection
             for i in range(10):
@@ -104,8 +92,23 @@ class DeviceManualTrigger:
             print("[ERROR] Connection Error: {}: {}".format(type(e).__name__, e))
             return False
 
+    def register_last_will(self, dev: DeviceRecord) -> None:
+        """Open a presence session whose last will marks the device offline"""
+        # One connection carries a single will, so every device gets its own session
+        client = mqtt.Client(client_id="{}-presence".format(dev.id))
+        client.username_pw_set(MQTT_USERNAME, MQTT_PASSWORD)
+        client.will_set("iot/devices/{}/status".format(dev.id), LWT_PAYLOAD, qos=1, retain=True)
+        client.connect(MQTT_BROKER, MQTT_PORT, LWT_KEEPALIVE)
+        client.loop_start()
+        self.presence_clients[dev.id] = client
+
     def disconnect(self):
         """Safely disconnect from MQTT"""
+        # A clean DISCONNECT discards the will, so a normal exit does not mark devices offline
+        for client in self.presence_clients.values():
+            client.loop_stop()
+            client.disconnect()
+        self.presence_clients.clear()
         if self.connected:
             print("[INFO] Disconnecting...")
             self.client.loop_stop()
@@ -139,8 +142,8 @@ class DeviceManualTrigger:
             dev = DEVICES[device_index]
 
             # 1. Generate Data
-            water, rain, battery = self.get_simulated_values(dev["scenario"])
-            dev["uptime"] += 60
+            water, rain, battery = self.get_simulated_values(dev.scenario)
+            dev.uptime += 60
             wifi_rssi = random.randint(-120, -70)
             free_heap = random.randint(80000, 120000)
 
@@ -150,45 +153,33 @@ class DeviceManualTrigger:
             current_timestamp = wib_time.isoformat() + "Z"
 
             # 3. Payload Sensor (Data)
-            sensor_payload = {
-                "ketinggian_air": water,
-                "curah_hujan": rain,
-                "timestamp": current_timestamp
-            }
-
-            # 4. Payload Status
-            status_payload = {
-                "status": "online",
-                "battery": battery,
-                "wifi_rssi": wifi_rssi,
-                "uptime": dev["uptime"],
-                "free_heap": free_heap,
-                "ota_update": "idle",
-                "timestamp": current_timestamp
-            }
+            sensor_payload = SENSOR_TEMPLATE.render(water, rain, current_timestamp)
+
+            # 4. Payload Status (status "online", ota_update "idle")
+            status_payload = STATUS_TEMPLATE.render(battery, wifi_rssi, dev.uptime, free_heap, current_timestamp)
 
             # 5. Topik
-            topic_data = "iot/devices/{}/data".format(dev['id'])
-            topic_status = "iot/devices/{}/status".format(dev['id'])
+            topic_data = "iot/devices/{}/data".format(dev.id)
+            topic_status = "iot/devices/{}/status".format(dev.id)
 
             # 6. Publish
-            print("\n[SEND] Sending to {}...".format(dev['name']))
+            print("\n[SEND] Sending to {}...".format(dev.name))
 
             # Kirim ke topik data
-            info_data = self.client.publish(topic_data, json.dumps(sensor_payload))
+            info_data = self.client.publish(topic_data, sensor_payload)
             if info_data.rc != mqtt.MQTT_ERR_SUCCESS:
                 print("   [ERROR] Failed to publish to {}".format(topic_data))
                 return False
 
             # Kirim ke topik status
-            info_status = self.client.publish(topic_status, json.dumps(status_payload), retain=True)
+            info_status = self.client.publish(topic_status, status_payload, retain=True)
             if info_status.rc != mqtt.MQTT_ERR_SUCCESS:
                 print("   [ERROR] Failed to publish to {}".format(topic_status))
                 return False
 
             print("   Water: {} cm | Rain: {} mm".format(water, rain))
-            print("   Battery: {}% | RSSI: {} dBm | Uptime: {}s".format(battery, wifi_rssi, dev["uptime"]))
-            print("   DeviceID: {}".format(dev['id']))
+            print("   Battery: {}% | RSSI: {} dBm | Uptime: {}s".format(battery, wifi_rssi, dev.uptime))
+            print("   DeviceID: {}".format(dev.id))
             print("[OK] Data sent to MQTT broker!\n")
             
             if DEBUG:
@@ -201,6 +192,44 @@ class DeviceManualTrigger:
             print("[ERROR] Error sending data: {}: {}".format(type(e).__name__, e))
             return False
 
+    def play_timeline(self, spec: str, seed: int, speed: float = 60.0, sim_start: Optional[datetime] = None) -> None:
+        """Putar timeline skenario ber-seed untuk semua DEVICES (default 1 jam simulasi per menit).
+
+        `sim_start` (WIB) menetapkan jam simulasi; dengan seed dan sim_start yang sama, timeline
+        pertama setelah start mengirim payload yang identik byte-per-byte antar run (timeline
+        berikutnya melanjutkan uptime device). Tanpa sim_start jam simulasi mulai dari sekarang.
+        """
+        if not self.connected:
+            print("[ERROR] Not connected to MQTT broker!")
+            return
+
+        # numpy hanya dibutuhkan untuk mode timeline
+        from simulator.scenario import ScenarioTimeline
+
+        try:
+            phases = parse_timeline(spec)
+        except ValueError as e:
+            print("[ERROR] {}".format(e))
+            return
+
+        timeline = ScenarioTimeline(
+            phases, [dev.id for dev in DEVICES], seed=seed, uptimes=[dev.uptime for dev in DEVICES]
+        )
+        print("\n[INFO] Timeline '{}' seed {}: {} langkah, {:.1f} jam simulasi, digest {}".format(
+            spec, seed, timeline.steps, timeline.duration_seconds / 3600, timeline.digest()[:16]))
+        print("[INFO] Ctrl+C untuk berhenti\n")
+
+        def publish(topic: str, payload: str, retain: bool) -> bool:
+            return self.client.publish(topic, payload, retain=retain).rc == mqtt.MQTT_ERR_SUCCESS
+
+        _, _, last_step = timeline.play(publish, speed=speed, sim_start=sim_start)
+        if last_step < timeline.steps - 1:
+            print("\n[INFO] Timeline dihentikan setelah {} dari {} langkah".format(last_step + 1, timeline.steps))
+        # Lanjutkan uptime dari langkah terakhir yang benar-benar terkirim
+        if last_step >= 0:
+            for dev, uptime in zip(DEVICES, timeline.uptime[:, last_step].tolist()):
+                dev.uptime = uptime
+
     def show_menu(self):
         """Interactive menu for device selection and testing"""
         while True:
@@ -214,10 +243,11 @@ class DeviceManualTrigger:
                 print("=" * 70)
                 
                 for i, dev in enumerate(DEVICES):
-                    sc_desc = SCENARIOS[dev['scenario']]['desc']
-                    print("[{}] {:<30} -> {}".format(i+1, dev['name'], sc_desc))
+                    sc_desc = SCENARIOS[dev.scenario]['desc']
+                    print("[{}] {:<30} -> {}".format(i+1, dev.name, sc_desc))
                 
                 print("[A] Send ALL devices")
+                print("[T] Play scenario timeline ({})".format(", ".join(TIMELINES)))
                 print("[R] Reconnect")
                 print("[0] Exit")
                 print("-" * 70)
@@ -232,6 +262,24 @@ class DeviceManualTrigger:
                     time.sleep(1)
                     if not self.connect():
                         print("Failed to reconnect. Please check your configuration.")
+                elif choice == 'T':
+                    spec = input("Timeline [flood_event]: ").strip() or "flood_event"
+                    seed_text = input("Seed [0]: ").strip() or "0"
+                    start_text = input("Sim start WIB, e.g. 2025-06-17T08:00:00 [now]: ").strip()
+                    try:
+                        seed = int(seed_text)
+                    except ValueError:
+                        print("[ERROR] Seed must be a number.")
+                        seed = None
+                    sim_start = None
+                    if seed is not None and start_text:
+                        try:
+                            sim_start = datetime.fromisoformat(start_text)
+                        except ValueError:
+                            print("[ERROR] Sim start must look like 2025-06-17T08:00:00.")
+                            seed = None
+                    if seed is not None:
+                        self.play_timeline(spec, seed, sim_start=sim_start)
                 elif choice == 'A':
                     print("\n[INFO] Sending data to ALL devices...")
                     for idx in range(len(DEVICES)):
@@ -240,9 +288,10 @@ class DeviceManualTrigger:
                 else:
                     try:
                         idx = int(choice) - 1
-                        self.send_data(idx)
                     except ValueError:
                         print("[ERROR] Invalid input. Please enter a number.")
+                    else:
+                        self.send_data(idx)
                 
                 if choice not in ['0', 'R']:
                     input("Press Enter to continue...")